@@ -2,6 +2,8 @@ from typing import List, Dict, Any, Optional
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 import json
+from core.tool_executor import ToolCallResult, ToolExecutor
+from core.tool_selection import ToolSelector
 
 @dataclass
 class Tool:
@@ -14,21 +16,46 @@ class BaseAgent(ABC):
                  llm: Any,
                  memory: Any,
                  tools: List[Tool] = None,
-                 config: Dict[str, Any] = {}):
+                 config: Dict[str, Any] = {},
+                 tool_selector: Optional[ToolSelector] = None):
         self.llm = llm
         self.memory = memory
         self.tools = tools or []
+        self._tool_index = {t.name: t for t in self.tools}
+        self._handlers: Dict[str, Any] = {}
         self.config = config
+        self.tool_executor = ToolExecutor.from_config(self, config)
+        self.tool_selector = tool_selector
+        self._bound_tools: Optional[tuple] = None
+        if self.tool_selector is not None:
+            self.tool_selector.add(self.tools)
         self._setup_function_calling()
         
     def _setup_function_calling(self):
         """Prepare the LLM for tool/function calling"""
-        if hasattr(self.llm, 'bind_tools'):
+        # With a selector, tools are bound per request in bind_tools_for
+        if hasattr(self.llm, 'bind_tools') and self.tool_selector is None:
             self.llm.bind_tools(self.tools)
     
+    def bind_tools_for(self, request: str) -> List[Tool]:
+        """Bind only the tools relevant to request (no-op without a selector)"""
+        if self.tool_selector is None:
+            return self.tools
+        selected = self.tool_selector.select(request)
+        names = tuple(t.name for t in selected)
+        if names != self._bound_tools and hasattr(self.llm, 'bind_tools'):
+            self.llm.bind_tools(selected, preamble=self.tool_selector.preamble(selected))
+            self._bound_tools = names
+        return selected
+    
     def add_tool(self, tool: Tool):
         """Register a new tool with the agent"""
         self.tools.append(tool)
+        self._tool_index[tool.name] = tool
+        self._handlers.pop(tool.name, None)
+        if self.tool_selector is not None:
+            self.tool_selector.add([tool])
+            self._bound_tools = None
         self._setup_function_calling()
         
     @abstractmethod
@@ -36,12 +63,22 @@ class BaseAgent(ABC):
         """Base generation method to be implemented by subclasses"""
         pass
         
+    def get_tool(self, tool_name: str):
+        """Resolve a registered tool to its implementing method"""
+        handler = self._handlers.get(tool_name)
+        if handler is None:
+            if tool_name not in self._tool_index:
+                raise ValueError(f"Tool {tool_name} not found")
+            handler = self._handlers[tool_name] = getattr(self, f"tool_{tool_name}")
+        return handler
+        
     def run_tool(self, tool_name: str, params: Dict[str, Any]) -> Any:
         """Execute a registered tool"""
-        tool = next((t for t in self.tools if t.name == tool_name), None)
-        if not tool:
-            raise ValueError(f"Tool {tool_name} not found")
-        return getattr(self, f"tool_{tool_name}")(**params)
+        return self.get_tool(tool_name)(**params)
+    
+    def run_tool_calls(self, function_calls: List[Dict[str, Any]]) -> List[ToolCallResult]:
+        """Execute all function calls from one LLM turn concurrently"""
+        return self.tool_executor.run(function_calls)
     
     def __call__(self, input_text: str) -> str:
         """Standard interface for the agent"""
@@ -52,6 +89,7 @@ class BaseAgent(ABC):
             return self._format_tool_result(result)
         
         # Otherwise proceed with standard generation
+        self.bind_tools_for(input_text)
         return self.generate(input_text)
     
     # Helper methods omitted for brevity...
@@ -0,0 +1,472 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from core.vector_store import kmeans, assign_nearest, top_k
+
+
+@dataclass
+class ColBERTResult:
+    docid: int
+    text: str
+    score: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+def _segment_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenate the integer ranges [start, start + length) without a Python loop"""
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    shifts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return shifts + np.arange(total)
+
+
+def _reserve(array: np.ndarray, used: int, needed: int) -> np.ndarray:
+    """array with room for needed rows, keeping its first used rows; capacity doubles"""
+    if needed <= len(array) and array.flags.writeable:
+        return array
+    grown = np.empty((max(needed, 2 * len(array), 1024),) + array.shape[1:], dtype=array.dtype)
+    grown[:used] = array[:used]
+    return grown
+
+
+def _segment_maxsim(sim: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Sum over query tokens of the per-passage max of a (tokens, Lq) similarity block"""
+    bounds = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    return np.maximum.reduceat(sim, bounds, axis=0).sum(axis=1)
+
+
+class ResidualCodec:
+    """Centroid + n-bit residual compression of token embeddings (ColBERTv2 style)"""
+    def __init__(self, centroids: np.ndarray, bucket_cutoffs: np.ndarray,
+                 bucket_weights: np.ndarray, nbits: int):
+        self.centroids = centroids
+        self.bucket_cutoffs = bucket_cutoffs
+        self.bucket_weights = bucket_weights
+        self.nbits = nbits
+        self.per_byte = 8 // nbits
+        self._shifts = (np.arange(self.per_byte) * nbits).astype(np.uint8)
+
+    @classmethod
+    def train(cls, sample: np.ndarray, num_centroids: int, nbits: int = 2, seed: int = 0) -> "ResidualCodec":
+        centroids = kmeans(sample, num_centroids, iters=10, seed=seed)
+        residuals = sample - centroids[assign_nearest(sample, centroids)]
+        levels = 1 << nbits
+        cutoffs = np.quantile(residuals, np.arange(1, levels) / levels).astype(np.float32)
+        weights = np.quantile(residuals, (np.arange(levels) + 0.5) / levels).astype(np.float32)
+        return cls(centroids.astype(np.float32), cutoffs, weights, nbits)
+
+    def compress(self, embs: np.ndarray):
+        codes = assign_nearest(embs, self.centroids).astype(np.int32)
+        buckets = np.searchsorted(self.bucket_cutoffs, embs - self.centroids[codes]).astype(np.uint8)
+        packed = buckets.reshape(len(embs), -1, self.per_byte) << self._shifts
+        return codes, np.bitwise_or.reduce(packed, axis=2).astype(np.uint8)
+
+    def decompress(self, codes: np.ndarray, packed: np.ndarray) -> np.ndarray:
+        mask = np.uint8((1 << self.nbits) - 1)
+        buckets = (packed[:, :, None] >> self._shifts) & mask
+        residuals = self.bucket_weights[buckets.reshape(len(codes), -1)]
+        embs = self.centroids[codes] + residuals
+        return embs / np.maximum(np.linalg.norm(embs, axis=1, keepdims=True), 1e-12)
+
+
+@contextmanager
+def _replacing(path: Path, mode: str, **kwargs):
+    """Open a temp file next to path and atomically move it over path on success"""
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class PlaidColBERT:
+    """Built-in CPU ColBERT engine with PLAID-style centroid pruning.
+
+    Passages are stored as one centroid id plus an ``nbits`` residual per
+    token dimension. A query is answered in three vectorized stages:
+
+    1. candidate generation from the ``nprobe`` closest centroids per query
+       token through a centroid -> passage inverted list;
+    2. centroid interaction: MaxSim over centroid scores only, with
+       centroids scoring below ``centroid_score_threshold`` pruned, keeping
+       the best ``ndocs`` passages;
+    3. exact MaxSim over decompressed residuals for the survivors.
+
+    Passages are appended into capacity-doubling arrays and each batch is
+    added to the inverted lists of its own centroids, so ingestion cost is
+    linear in the batch rather than in the corpus. The codec is retrained
+    from a reservoir sample of token embeddings whenever the corpus grows
+    ``retrain_growth``-fold since the last training, and existing tokens are
+    re-encoded from their reconstructions. This is geometric, so the
+    amortized cost stays linear.
+
+    Indexing happens in memory. Call ``save`` to persist (e.g. once
+    ingestion finishes); saved indexes are plain ``.npy`` files that
+    ``load`` opens with ``mmap_mode="r"``. The class exposes the
+    ``index``/``search`` calls HybridRetriever makes on ColBERT's
+    ``Indexer``/``Searcher`` so it can stand in for both.
+    """
+    ARRAYS = ("centroids", "bucket_cutoffs", "bucket_weights", "codes", "residuals",
+              "doclens", "offsets", "ivf_offsets", "ivf_pids")
+
+    def __init__(self,
+                 encoder: Any = None,
+                 nbits: int = 2,
+                 nprobe: int = 4,
+                 ndocs: int = 256,
+                 centroid_score_threshold: float = 0.45,
+                 num_centroids: Optional[int] = None,
+                 max_train_tokens: int = 1 << 16,
+                 retrain_growth: Optional[float] = 4.0,
+                 index_path: Optional[str] = None):
+        self.encoder = encoder
+        self.nbits = nbits
+        self.nprobe = nprobe
+        self.ndocs = ndocs
+        self.centroid_score_threshold = centroid_score_threshold
+        self.num_centroids = num_centroids
+        self.max_train_tokens = max_train_tokens
+        self.retrain_growth = retrain_growth
+        self.index_path = Path(index_path) if index_path else None
+        self.codec: Optional[ResidualCodec] = None
+        # Token/passage columns with spare capacity; the public views cover the filled rows
+        self._codes = np.empty(0, dtype=np.int32)
+        self._residuals = np.empty((0, 0), dtype=np.uint8)
+        self._doclens = np.empty(0, dtype=np.int64)
+        self._offsets = np.empty(0, dtype=np.int64)
+        self._num_tokens = 0
+        self._num_docs = 0
+        # Inverted lists: a CSR base plus per-centroid arrays appended since the last merge
+        self.ivf_offsets = np.zeros(1, dtype=np.int64)
+        self.ivf_pids = np.empty(0, dtype=np.int64)
+        self._ivf_tail: List[List[np.ndarray]] = []
+        self._ivf_tail_size = 0
+        self._trained_tokens = 0
+        self._reservoir = np.empty((0, 0), dtype=np.float32)
+        self._reservoir_seen = 0
+        self._rng = np.random.default_rng(0)
+        self.collection: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, colbert_config: Dict[str, Any], encoder: Any = None) -> "PlaidColBERT":
+        index_path = None
+        if colbert_config.get("index_root"):
+            index_path = str(Path(colbert_config["index_root"]) / colbert_config.get("index_name", "plaid"))
+        engine = cls(
+            encoder=encoder,
+            nbits=colbert_config.get("nbits", 2),
+            nprobe=colbert_config.get("nprobe", 4),
+            ndocs=colbert_config.get("ndocs", 256),
+            centroid_score_threshold=colbert_config.get("centroid_score_threshold", 0.45),
+            num_centroids=colbert_config.get("num_centroids"),
+            retrain_growth=colbert_config.get("retrain_growth", 4.0),
+            index_path=index_path
+        )
+        if index_path and (Path(index_path) / "meta.json").exists():
+            engine.load(index_path)
+        return engine
+
+    def __len__(self) -> int:
+        return self._num_docs
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes[:self._num_tokens]
+
+    @property
+    def residuals(self) -> np.ndarray:
+        return self._residuals[:self._num_tokens]
+
+    @property
+    def doclens(self) -> np.ndarray:
+        return self._doclens[:self._num_docs]
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self._offsets[:self._num_docs]
+
+    # Encoding ---------------------------------------------------------------
+
+    @staticmethod
+    def _to_numpy(x: Any) -> np.ndarray:
+        if hasattr(x, "detach"):
+            x = x.detach().float().cpu().numpy()
+        return np.asarray(x, dtype=np.float32)
+
+    def _encode_docs(self, texts: List[str]) -> List[np.ndarray]:
+        docs = self.encoder.docFromText(texts, keep_dims=False)
+        if isinstance(docs, tuple):
+            docs = docs[0]
+        return [self._to_numpy(d) for d in docs]
+
+    def _encode_query(self, query: str) -> np.ndarray:
+        return self._to_numpy(self.encoder.queryFromText([query]))[0]
+
+    # Indexing ---------------------------------------------------------------
+
+    def index(self, name: str = None, collection: List[str] = (), metadata: List[Dict] = None, **kwargs):
+        """ColBERT Indexer-compatible entry point: encode and append passages (in memory; see ``save``)"""
+        self.add_embeddings(self._encode_docs(list(collection)), list(collection), metadata)
+
+    def add_embeddings(self,
+                       doc_embeddings: Sequence[np.ndarray],
+                       texts: Optional[List[str]] = None,
+                       metadata: Optional[List[Dict[str, Any]]] = None):
+        """Compress and append per-passage token embeddings"""
+        doc_embeddings = [np.asarray(d, dtype=np.float32) for d in doc_embeddings]
+        doclens = np.array([len(d) for d in doc_embeddings], dtype=np.int64)
+        if not len(doclens):
+            return
+        if (doclens == 0).any():
+            raise ValueError("Passages must have at least one token embedding")
+        flat = np.concatenate(doc_embeddings)
+        flat /= np.maximum(np.linalg.norm(flat, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            if self.retrain_growth:
+                self._sample_tokens(flat)
+            total = self._num_tokens + len(flat)
+            if self.codec is None or (self.retrain_growth and total >= self.retrain_growth * self._trained_tokens):
+                self._train(flat, total)
+            codes, residuals = self.codec.compress(flat)
+
+            first_pid, first_token = self._num_docs, self._num_tokens
+            self._codes = _reserve(self._codes, first_token, total)
+            if self._residuals.shape[1] != residuals.shape[1]:
+                self._residuals = np.empty((0, residuals.shape[1]), dtype=np.uint8)
+            self._residuals = _reserve(self._residuals, first_token, total)
+            self._doclens = _reserve(self._doclens, first_pid, first_pid + len(doclens))
+            self._offsets = _reserve(self._offsets, first_pid, first_pid + len(doclens))
+            self._codes[first_token:total] = codes
+            self._residuals[first_token:total] = residuals
+            self._doclens[first_pid:first_pid + len(doclens)] = doclens
+            self._offsets[first_pid:first_pid + len(doclens)] = first_token + np.cumsum(doclens) - doclens
+            self._num_tokens, self._num_docs = total, first_pid + len(doclens)
+            self.collection.extend(texts or [""] * len(doclens))
+            self.metadata.extend(metadata or [{} for _ in doclens])
+            self._add_to_ivf(codes, doclens, first_pid)
+
+    def _sample_tokens(self, flat: np.ndarray):
+        """Reservoir-sample token embeddings for codec (re)training"""
+        capacity = self.max_train_tokens
+        filled = min(self._reservoir_seen, capacity)
+        needed = min(capacity, self._reservoir_seen + len(flat))
+        if self._reservoir.shape[1] != flat.shape[1]:
+            self._reservoir = np.empty((0, flat.shape[1]), dtype=np.float32)
+        if needed > len(self._reservoir):
+            grown = np.empty((min(capacity, max(needed, 2 * len(self._reservoir))), flat.shape[1]), dtype=np.float32)
+            grown[:filled] = self._reservoir[:filled]
+            self._reservoir = grown
+        fill = needed - filled
+        self._reservoir[self._reservoir_seen:self._reservoir_seen + fill] = flat[:fill]
+        rest = np.arange(self._reservoir_seen + fill, self._reservoir_seen + len(flat))
+        if len(rest):
+            slots = (self._rng.random(len(rest)) * (rest + 1)).astype(np.int64)
+            keep = slots < capacity
+            self._reservoir[slots[keep]] = flat[fill:][keep]
+        self._reservoir_seen += len(flat)
+
+    def _training_sample(self, flat: np.ndarray) -> np.ndarray:
+        if self.retrain_growth:
+            sample = self._reservoir[:min(self._reservoir_seen, self.max_train_tokens)]
+        else:
+            sample = flat[self._rng.choice(len(flat), size=min(len(flat), self.max_train_tokens), replace=False)]
+        missing = min(self.max_train_tokens, self._num_tokens + len(flat)) - len(sample)
+        if missing > 0 and self._num_tokens and self.codec is not None:
+            # Loaded index: tokens from before this process are only available as reconstructions
+            rows = np.sort(self._rng.choice(self._num_tokens, size=min(missing, self._num_tokens), replace=False))
+            sample = np.concatenate([sample, self.codec.decompress(np.asarray(self.codes[rows]),
+                                                                   np.asarray(self.residuals[rows]))])
+        return sample
+
+    def _train(self, flat: np.ndarray, total_tokens: int, block: int = 1 << 16):
+        """Fit the codec for a corpus of total_tokens and re-encode what is already indexed"""
+        num_centroids = self.num_centroids or 1 << int(np.log2(16 * np.sqrt(total_tokens)))
+        previous = self.codec
+        self.codec = ResidualCodec.train(self._training_sample(flat), num_centroids, self.nbits)
+        self._trained_tokens = total_tokens
+        if previous is None or not self._num_tokens:
+            self.ivf_offsets = np.zeros(len(self.codec.centroids) + 1, dtype=np.int64)
+            self.ivf_pids = np.empty(0, dtype=np.int64)
+            self._ivf_tail = [[] for _ in range(len(self.codec.centroids))]
+            self._ivf_tail_size = 0
+            return
+        codes = np.empty(self._num_tokens, dtype=np.int32)
+        residuals = np.empty_like(np.asarray(self.residuals))
+        for start in range(0, self._num_tokens, block):
+            stop = min(start + block, self._num_tokens)
+            embs = previous.decompress(np.asarray(self._codes[start:stop]), np.asarray(self._residuals[start:stop]))
+            codes[start:stop], residuals[start:stop] = self.codec.compress(embs)
+        self._codes, self._residuals = codes, residuals
+        self._build_ivf()
+
+    def _build_ivf(self):
+        """Centroid -> sorted unique passage ids, in CSR layout"""
+        pids = np.repeat(np.arange(len(self.doclens)), self.doclens)
+        pairs = np.unique(np.asarray(self.codes).astype(np.int64) * len(self.doclens) + pids)
+        centroid_ids, pair_pids = np.divmod(pairs, len(self.doclens))
+        counts = np.bincount(centroid_ids, minlength=len(self.codec.centroids))
+        self.ivf_offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.ivf_pids = pair_pids
+        self._ivf_tail = [[] for _ in range(len(self.codec.centroids))]
+        self._ivf_tail_size = 0
+
+    def _add_to_ivf(self, codes: np.ndarray, doclens: np.ndarray, first_pid: int):
+        """Append a batch's passages to the inverted lists of the centroids they touch"""
+        local = np.repeat(np.arange(len(doclens)), doclens)
+        pairs = np.unique(codes.astype(np.int64) * len(doclens) + local)
+        centroid_ids, pids = np.divmod(pairs, len(doclens))
+        bounds = np.flatnonzero(np.diff(centroid_ids)) + 1
+        for centroid, group in zip(centroid_ids[np.concatenate([[0], bounds])], np.split(pids + first_pid, bounds)):
+            self._ivf_tail[centroid].append(group)
+        self._ivf_tail_size += len(pids)
+        if self._ivf_tail_size > max(len(self.ivf_pids), 1 << 12):
+            self._merge_ivf()
+
+    def _merge_ivf(self):
+        """Fold the appended lists into the CSR base; pids stay sorted within each list"""
+        num_centroids = len(self.codec.centroids)
+        counts = np.diff(self.ivf_offsets)
+        tail_counts = np.array([sum(len(a) for a in arrays) for arrays in self._ivf_tail], dtype=np.int64)
+        owners = np.concatenate([np.repeat(np.arange(num_centroids), counts),
+                                 np.repeat(np.arange(num_centroids), tail_counts)])
+        tails = [a for arrays in self._ivf_tail for a in arrays]
+        pids = np.concatenate([np.asarray(self.ivf_pids)] + tails)
+        self.ivf_pids = pids[np.argsort(owners, kind="stable")]
+        self.ivf_offsets = np.concatenate([[0], np.cumsum(counts + tail_counts)])
+        self._ivf_tail = [[] for _ in range(num_centroids)]
+        self._ivf_tail_size = 0
+
+    # Persistence ------------------------------------------------------------
+
+    def save(self, path: Optional[str] = None):
+        """Write the index to path (default ``index_path``) for ``load`` to memory-map"""
+        path = Path(path or self.index_path)
+        path.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if self._ivf_tail_size:
+                self._merge_ivf()
+        arrays = {
+            "centroids": self.codec.centroids,
+            "bucket_cutoffs": self.codec.bucket_cutoffs,
+            "bucket_weights": self.codec.bucket_weights,
+            "codes": self.codes, "residuals": self.residuals,
+            "doclens": self.doclens, "offsets": self.offsets,
+            "ivf_offsets": self.ivf_offsets, "ivf_pids": self.ivf_pids,
+        }
+        # Each file is written beside its target and swapped in: a loaded index memory-maps
+        # these paths, and overwriting them in place would corrupt the arrays being saved
+        for name, array in arrays.items():
+            with _replacing(path / f"{name}.npy", "wb") as f:
+                np.save(f, array)
+        with _replacing(path / "collection.jsonl", "w", encoding="utf-8") as f:
+            for text, meta in zip(self.collection, self.metadata):
+                f.write(json.dumps({"text": text, "metadata": meta}, default=str) + "\n")
+        with _replacing(path / "meta.json", "w") as f:
+            f.write(json.dumps({"nbits": self.nbits, "num_passages": len(self)}))
+
+    def load(self, path: Optional[str] = None, mmap: bool = True):
+        """Open a saved index; large arrays stay on disk and are paged in on demand"""
+        path = Path(path or self.index_path)
+        mode = "r" if mmap else None
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mode) for name in self.ARRAYS}
+        self.nbits = json.loads((path / "meta.json").read_text())["nbits"]
+        self.codec = ResidualCodec(np.asarray(arrays["centroids"]), np.asarray(arrays["bucket_cutoffs"]),
+                                   np.asarray(arrays["bucket_weights"]), self.nbits)
+        self._codes, self._residuals = arrays["codes"], arrays["residuals"]
+        self._doclens, self._offsets = np.asarray(arrays["doclens"]), np.asarray(arrays["offsets"])
+        self._num_tokens, self._num_docs = len(self._codes), len(self._doclens)
+        self.ivf_offsets, self.ivf_pids = np.asarray(arrays["ivf_offsets"]), arrays["ivf_pids"]
+        self._ivf_tail = [[] for _ in range(len(self.codec.centroids))]
+        self._ivf_tail_size = 0
+        self._trained_tokens = self._num_tokens
+        self._reservoir, self._reservoir_seen = np.empty((0, 0), dtype=np.float32), 0
+        self.collection, self.metadata = [], []
+        with open(path / "collection.jsonl", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                self.collection.append(record["text"])
+                self.metadata.append(record["metadata"])
+
+    # Search -----------------------------------------------------------------
+
+    def search(self, query: str, k: int = 10, pids: Optional[Sequence[int]] = None) -> List[ColBERTResult]:
+        """ColBERT Searcher-compatible entry point"""
+        pids_found, scores = self.search_embeddings(self._encode_query(query), k=k, pids=pids)
+        return [
+            ColBERTResult(docid=pid, text=self.collection[pid], score=score, metadata=self.metadata[pid])
+            for pid, score in zip(pids_found.tolist(), scores.tolist())
+        ]
+
+    def search_embeddings(self,
+                          Q: np.ndarray,
+                          k: int = 10,
+                          pids: Optional[Sequence[int]] = None):
+        """Return (pids, scores) for a (Lq, d) query embedding matrix"""
+        with self._lock:
+            if not len(self):
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            Q = np.asarray(Q, dtype=np.float32)
+            Q = Q / np.maximum(np.linalg.norm(Q, axis=1, keepdims=True), 1e-12)
+            centroid_scores = self.codec.centroids @ Q.T  # (ncentroids, Lq)
+
+            allowed = None if pids is None else np.fromiter(pids, dtype=np.int64)
+            if allowed is not None and len(allowed) <= self.ndocs:
+                # Selective filters: skip pruning and score the allowed set exactly
+                candidates = allowed
+            else:
+                candidates = self._generate_candidates(centroid_scores)
+                if allowed is not None:
+                    candidates = np.intersect1d(candidates, allowed, assume_unique=True)
+                candidates = self._centroid_interaction(candidates, centroid_scores, prune=True,
+                                                        keep=self.ndocs)
+                candidates = self._centroid_interaction(candidates, centroid_scores, prune=False,
+                                                        keep=max(self.ndocs // 4, k))
+            if not len(candidates):
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+            scores = self._exact_maxsim(candidates, Q)
+            best = top_k(scores, k)
+            return candidates[best], scores[best]
+
+    def _generate_candidates(self, centroid_scores: np.ndarray) -> np.ndarray:
+        nprobe = min(self.nprobe, len(centroid_scores))
+        probes = np.unique(np.argpartition(-centroid_scores, nprobe - 1, axis=0)[:nprobe].ravel())
+        lengths = self.ivf_offsets[probes + 1] - self.ivf_offsets[probes]
+        found = [np.asarray(self.ivf_pids[_segment_ranges(self.ivf_offsets[probes], lengths)])]
+        if self._ivf_tail_size:
+            found.extend(a for c in probes for a in self._ivf_tail[c])
+        return np.unique(np.concatenate(found))
+
+    def _centroid_interaction(self,
+                              candidates: np.ndarray,
+                              centroid_scores: np.ndarray,
+                              prune: bool,
+                              keep: int) -> np.ndarray:
+        if len(candidates) <= keep:
+            return candidates
+        lengths = self.doclens[candidates]
+        tokens = _segment_ranges(self.offsets[candidates], lengths)
+        scores = centroid_scores
+        if prune:
+            scores = np.where(centroid_scores.max(axis=1, keepdims=True) >= self.centroid_score_threshold,
+                              centroid_scores, 0.0)
+        approx = _segment_maxsim(scores[self.codes[tokens]], lengths)
+        return candidates[top_k(approx, keep)]
+
+    def _exact_maxsim(self, candidates: np.ndarray, Q: np.ndarray) -> np.ndarray:
+        lengths = self.doclens[candidates]
+        tokens = _segment_ranges(self.offsets[candidates], lengths)
+        embs = self.codec.decompress(np.asarray(self.codes[tokens]), np.asarray(self.residuals[tokens]))
+        return _segment_maxsim(embs @ Q.T, lengths).astype(np.float32)
@@ -0,0 +1,257 @@
+import inspect
+import queue
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from core.embedding import EmbeddingService, content_key
+from core.optimization.result_cache import normalize_query
+
+
+@dataclass
+class ConsolidationStats:
+    submitted: int = 0
+    merged: int = 0
+    skipped: int = 0
+    committed: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _model(embedder: Any) -> Any:
+    return embedder.embedder if isinstance(embedder, EmbeddingService) else embedder
+
+
+def _shares_embedder(retriever: Any, embedder: Any) -> bool:
+    """Whether the retriever's dense backend embeds with the same model as embedder"""
+    dense = getattr(retriever, "dense_retriever", None) or retriever
+    theirs = getattr(dense, "embedder", None)
+    return embedder is not None and theirs is not None and _model(theirs) is _model(embedder)
+
+
+class MemoryConsolidator:
+    """Moves memory items into the long-term retriever in large batches.
+
+    ``submit`` is a bounded queue append. A background worker merges
+    duplicates (same normalized text) and commits once ``batch_size``
+    distinct items are pending or ``flush_interval`` seconds have passed
+    since the oldest one arrived. A failed commit keeps its items pending
+    and is retried every ``flush_interval``; while it keeps failing the
+    worker holds at most one batch and stops draining, so a full queue
+    blocks ``submit``. ``close`` drains the queue and flushes.
+
+    Item embeddings are handed to the retriever only when ``embedder`` is
+    the model its dense backend uses; otherwise it embeds the text itself.
+    Subscribers are called from the worker with the keys of items that are
+    now in the store, including duplicates of already committed ones.
+    """
+    def __init__(self,
+                 retriever: Any,
+                 batch_size: int = 256,
+                 flush_interval: float = 5.0,
+                 max_queue: int = 10_000,
+                 remember_committed: int = 100_000,
+                 embedder: Any = None):
+        self.retriever = retriever
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.remember_committed = remember_committed
+        self.stats = ConsolidationStats()
+        self.last_error: Optional[Exception] = None
+        self._subscribers: List[Callable[[List[bytes]], None]] = []
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._pending: "OrderedDict[bytes, Any]" = OrderedDict()
+        self._pending_since: Optional[float] = None
+        self._committed: "OrderedDict[bytes, None]" = OrderedDict()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._stalled = threading.Event()
+        self._closing = threading.Event()
+        self._accepts_embeddings = (
+            "embeddings" in inspect.signature(retriever.add_documents).parameters
+            and _shares_embedder(retriever, embedder)
+        )
+
+    @classmethod
+    def from_config(cls, retriever: Any, config: Dict[str, Any], embedder: Any = None) -> "MemoryConsolidator":
+        cfg = config.get("memory", {}).get("consolidation", {})
+        return cls(
+            retriever,
+            batch_size=cfg.get("batch_size", 256),
+            flush_interval=cfg.get("flush_interval", 5.0),
+            max_queue=cfg.get("max_queue", 10_000),
+            embedder=embedder
+        )
+
+    def subscribe(self, callback: Callable[[List[bytes]], None]):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[List[bytes]], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _notify(self, keys: List[bytes]):
+        for callback in list(self._subscribers):
+            callback(keys)
+
+    @staticmethod
+    def key(item: Any) -> bytes:
+        """Identity used to merge duplicate memories"""
+        return content_key(normalize_query(item.content))
+
+    def submit(self, item: Any):
+        """Queue a MemoryItem for long-term storage; blocks only when the queue is full"""
+        self._ensure_worker()
+        self._queue.put(item)
+        self.stats.submitted += 1
+
+    def flush(self):
+        """Commit everything submitted so far (waits for the worker to catch up)"""
+        done = threading.Event()
+        self._ensure_worker()
+        if self._send(done):
+            # A stalled worker will not reach the marker until the store recovers
+            while not done.wait(0.05) and not self._stalled.is_set():
+                pass
+        if self.last_error is not None and self._pending:
+            raise self.last_error
+
+    def _send(self, message: Any) -> bool:
+        """Queue a control message; False if the worker has stopped draining a full queue"""
+        while True:
+            try:
+                self._queue.put(message, timeout=0.05)
+                return True
+            except queue.Full:
+                if self._stalled.is_set() or not self._worker.is_alive():
+                    return False
+
+    def pending(self) -> int:
+        return len(self._pending) + self._queue.qsize()
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="memory-consolidator", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            if self.last_error is not None and len(self._pending) >= self.batch_size:
+                self._stalled.set()
+                retry = max(self._pending_since + self.flush_interval - time.monotonic(), 0.0)
+                closing = self._closing.wait(retry)
+                self._commit()
+                if closing and self.last_error is not None:
+                    return
+                continue
+            self._stalled.clear()
+
+            timeout = None
+            if self._pending_since is not None:
+                timeout = max(self._pending_since + self.flush_interval - time.monotonic(), 0.0)
+            try:
+                message = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._commit()
+                continue
+
+            if message is None:
+                self._commit()
+                return
+            if isinstance(message, threading.Event):
+                self._commit()
+                message.set()
+                continue
+
+            self._merge(message)
+            if len(self._pending) >= self.batch_size and self.last_error is None:
+                self._commit()
+
+    def _merge(self, item: Any):
+        key = self.key(item)
+        if key in self._committed:
+            self.stats.skipped += 1
+            self._notify([key])
+            return
+        existing = self._pending.get(key)
+        if existing is None:
+            self._pending[key] = item
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            return
+
+        # Same memory seen again: keep the newest text, union metadata, strongest importance
+        self.stats.merged += 1
+        newer, older = (item, existing) if item.timestamp >= existing.timestamp else (existing, item)
+        self._pending[key] = newer.model_copy(update={
+            "metadata": {**older.metadata, **newer.metadata},
+            "importance": max(item.importance, existing.importance),
+            "embedding": newer.embedding if newer.embedding is not None else older.embedding
+        })
+
+    def _commit(self):
+        if not self._pending:
+            return
+        keys = list(self._pending)
+        items = list(self._pending.values())
+        texts = [item.content for item in items]
+        metadata = [dict(item.metadata, importance=item.importance, timestamp=item.timestamp) for item in items]
+        try:
+            if self._accepts_embeddings and all(item.embedding is not None for item in items):
+                embeddings = np.stack([np.asarray(item.embedding, dtype=np.float32) for item in items])
+                self.retriever.add_documents(texts, metadata, embeddings=embeddings)
+            else:
+                self.retriever.add_documents(texts, metadata)
+        except Exception as e:
+            self.last_error = e
+            self.stats.failed_batches += 1
+            # Retry on the next interval rather than spinning
+            self._pending_since = time.monotonic()
+            return
+
+        self.last_error = None
+        self.stats.batches += 1
+        self.stats.committed += len(items)
+        for key in keys:
+            del self._pending[key]
+            self._committed[key] = None
+        while len(self._committed) > self.remember_committed:
+            self._committed.popitem(last=False)
+        self._pending_since = None
+        self._notify(keys)
+
+    def close(self):
+        """Drain the queue, flush pending items and stop the worker"""
+        if self._worker is not None:
+            self._closing.set()
+            self._send(None)
+            self._worker.join()
+            self._worker = None
+            self._closing.clear()
+            self._stalled.clear()
+            self._drop_markers()
+        if self.last_error is not None and self._pending:
+            raise self.last_error
+
+    def _drop_markers(self):
+        # A worker that gave up mid-outage leaves its unread items (and the stop marker) queued
+        items = []
+        while True:
+            try:
+                message = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(message, threading.Event):
+                message.set()
+            elif message is not None:
+                items.append(message)
+        for item in items:
+            self._queue.put_nowait(item)
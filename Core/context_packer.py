@@ -0,0 +1,210 @@
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from core.embedding import content_key
+from core.optimization.result_cache import normalize_query
+
+_TOKEN_RE = re.compile(r"\S+")
+
+
+@dataclass
+class ContextChunk:
+    text: str
+    score: float = 0.0
+    source: str = ""
+    start: Optional[int] = None   # character span within the source, when known
+    end: Optional[int] = None
+    kind: str = "retrieval"       # retrieval|memory
+    timestamp: float = 0.0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class PackedContext:
+    chunks: List[ContextChunk]
+    tokens: int
+    budget: int
+    dropped: int = 0
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(chunk.text for chunk in self.chunks)
+
+
+def to_chunks(results: Iterable[Any], kind: str = "retrieval") -> List[ContextChunk]:
+    """Normalize retriever results, MemoryItems, dicts or strings into chunks"""
+    chunks = []
+    for r in results:
+        if isinstance(r, ContextChunk):
+            chunks.append(r)
+        elif isinstance(r, str):
+            chunks.append(ContextChunk(text=r, kind=kind))
+        elif isinstance(r, tuple):
+            # HybridRetriever: (text, {"score", "metadata": {...}}); backends: (text, metadata + score)
+            text, meta = r
+            doc_meta = meta.get("metadata") or meta
+            chunks.append(ContextChunk(
+                text=text,
+                score=float(meta.get("score", 0.0)),
+                source=str(doc_meta.get("source_id", doc_meta.get("doc_id", ""))),
+                start=doc_meta.get("char_start"),
+                end=doc_meta.get("char_end"),
+                kind=kind,
+                metadata=doc_meta
+            ))
+        elif isinstance(r, dict):
+            chunks.append(ContextChunk(
+                text=r["text"],
+                score=float(r.get("score", 0.0)),
+                source=str(r.get("source", "")),
+                start=r.get("start"),
+                end=r.get("end"),
+                kind=r.get("kind", kind),
+                metadata=r.get("metadata", {})
+            ))
+        else:
+            # MemoryItem
+            chunks.append(ContextChunk(
+                text=r.content,
+                score=r.score,
+                kind="memory",
+                timestamp=r.timestamp,
+                metadata=r.metadata
+            ))
+    return chunks
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = normalize_query(text).split()
+    return {tuple(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+
+class ContextPacker:
+    """Packs the best-scoring retrieved chunks and memories into a token budget.
+
+    Exact and near-duplicate texts (word-shingle Jaccard at or above
+    ``near_duplicate``) keep only their best-scoring copy, and overlapping
+    character spans from the same source are merged so the shared text is
+    paid for once. Chunks are taken greedily by score while they fit, with
+    token counts cached by content hash. The packed chunks are then emitted
+    in a deterministic order, not score order: retrieved spans by (source,
+    offset), then memories oldest first. Recurring content therefore keeps
+    the same position and the prompt prefix stays reusable across turns.
+    """
+    def __init__(self,
+                 token_budget: int = 2048,
+                 tokenizer: Any = None,
+                 near_duplicate: float = 0.8,
+                 token_cache_size: int = 50_000):
+        self.token_budget = token_budget
+        self.tokenizer = tokenizer
+        self.near_duplicate = near_duplicate
+        self.token_cache_size = token_cache_size
+        self._token_cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], tokenizer: Any = None) -> "ContextPacker":
+        cfg = config.get("context", {})
+        return cls(
+            token_budget=cfg.get("token_budget", 2048),
+            tokenizer=tokenizer,
+            near_duplicate=cfg.get("near_duplicate", 0.8),
+            token_cache_size=cfg.get("token_cache_size", 50_000)
+        )
+
+    def count_tokens(self, text: str) -> int:
+        key = content_key(text)
+        with self._lock:
+            count = self._token_cache.get(key)
+            if count is not None:
+                self._token_cache.move_to_end(key)
+                return count
+        if self.tokenizer is None:
+            count = len(_TOKEN_RE.findall(text))
+        elif callable(getattr(self.tokenizer, "encode", None)):
+            count = len(self.tokenizer.encode(text, add_special_tokens=False))
+        else:
+            count = len(self.tokenizer(text))
+        with self._lock:
+            self._token_cache[key] = count
+            while len(self._token_cache) > self.token_cache_size:
+                self._token_cache.popitem(last=False)
+        return count
+
+    def pack(self,
+             results: Iterable[Any] = (),
+             memories: Iterable[Any] = (),
+             token_budget: Optional[int] = None) -> PackedContext:
+        """Select and order chunks so their combined token count fits the budget"""
+        budget = self.token_budget if token_budget is None else token_budget
+        candidates = self._dedupe(to_chunks(results) + to_chunks(memories, kind="memory"))
+        candidates.sort(key=lambda c: -c.score)
+
+        selected: List[ContextChunk] = []
+        selected_shingles: List[set] = []
+        used = 0
+        dropped = 0
+        for chunk in candidates:
+            span_owner = self._overlapping_span(chunk, selected)
+            if span_owner is not None:
+                extension, start, end = self._extend(span_owner, chunk)
+                cost = self.count_tokens(extension[0]) + self.count_tokens(extension[1]) if extension else 0
+                if used + cost > budget:
+                    dropped += 1
+                    continue
+                span_owner.text = extension[0] + span_owner.text + extension[1] if extension else span_owner.text
+                span_owner.start, span_owner.end = start, end
+                span_owner.score = max(span_owner.score, chunk.score)
+                used += cost
+                continue
+
+            shingles = _shingles(chunk.text)
+            if any(len(shingles & other) / len(shingles | other) >= self.near_duplicate for other in selected_shingles):
+                continue
+            cost = self.count_tokens(chunk.text)
+            if used + cost > budget:
+                dropped += 1
+                continue
+            selected.append(ContextChunk(**vars(chunk)))
+            selected_shingles.append(shingles)
+            used += cost
+
+        selected.sort(key=self._order_key)
+        return PackedContext(chunks=selected, tokens=used, budget=budget, dropped=dropped)
+
+    @staticmethod
+    def _order_key(chunk: ContextChunk) -> Tuple:
+        if chunk.kind == "memory":
+            return (1, "", chunk.timestamp, chunk.text)
+        return (0, chunk.source, chunk.start if chunk.start is not None else -1, chunk.text)
+
+    @staticmethod
+    def _dedupe(chunks: List[ContextChunk]) -> List[ContextChunk]:
+        best: Dict[bytes, ContextChunk] = {}
+        for chunk in chunks:
+            key = content_key(normalize_query(chunk.text))
+            if key not in best or chunk.score > best[key].score:
+                best[key] = chunk
+        return list(best.values())
+
+    @staticmethod
+    def _overlapping_span(chunk: ContextChunk, selected: List[ContextChunk]) -> Optional[ContextChunk]:
+        if chunk.start is None or chunk.end is None or not chunk.source:
+            return None
+        for other in selected:
+            if (other.source == chunk.source and other.start is not None and other.end is not None
+                    and chunk.start < other.end and other.start < chunk.end):
+                return other
+        return None
+
+    @staticmethod
+    def _extend(owner: ContextChunk, chunk: ContextChunk) -> Tuple[Optional[Tuple[str, str]], int, int]:
+        """Text the chunk adds before/after the owner's span, and the merged span"""
+        prefix = chunk.text[:max(owner.start - chunk.start, 0)]
+        suffix = chunk.text[len(chunk.text) - max(chunk.end - owner.end, 0):] if chunk.end > owner.end else ""
+        if not prefix and not suffix:
+            return None, owner.start, owner.end
+        return (prefix, suffix), min(owner.start, chunk.start), max(owner.end, chunk.end)
@@ -0,0 +1,298 @@
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+
+def embed_texts(embedder: Any, texts: List[str]) -> np.ndarray:
+    """Embed a batch through whichever batch interface the embedder exposes"""
+    if len(texts) == 1 and hasattr(embedder, "embed"):
+        # Single texts take embed() so an EmbeddingService can coalesce concurrent callers
+        return np.asarray([embedder.embed(texts[0])], dtype=np.float32)
+    if hasattr(embedder, "embed_batch"):
+        vectors = embedder.embed_batch(texts)
+    elif hasattr(embedder, "encode"):
+        vectors = embedder.encode(texts, batch_size=len(texts))
+    else:
+        vectors = [embedder.embed(t) for t in texts]
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def content_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+@dataclass
+class EmbeddingStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    computed: int = 0
+    batches: int = 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.computed / self.batches if self.batches else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        stats = asdict(self)
+        stats["mean_batch_size"] = self.mean_batch_size
+        return stats
+
+
+class DiskEmbeddingStore:
+    """SQLite-backed content-hash -> float32 vector store"""
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)")
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys
+            ).fetchall()
+        # frombuffer wraps the blob without copying; the result is read-only
+        return {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+
+    def put_many(self, items: List[Tuple[bytes, np.ndarray]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, vec.tobytes()) for key, vec in items]
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingService:
+    """Caching, micro-batching front end for any embedder.
+
+    Single ``embed`` calls issued concurrently are coalesced into one
+    batched model call if they arrive within ``max_wait_ms`` of each other.
+    Vectors are cached by content hash in an in-memory LRU and, when
+    ``cache_path`` is set, in an on-disk store. Returned arrays are
+    read-only float32 views shared with the cache.
+    """
+    def __init__(self,
+                 embedder: Any,
+                 max_batch_size: int = 64,
+                 max_wait_ms: float = 2.0,
+                 cache_size: int = 100_000,
+                 cache_path: Optional[str] = None):
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+        self.disk = DiskEmbeddingStore(cache_path) if cache_path else None
+        self.stats = EmbeddingStats()
+        self._stats_lock = threading.Lock()
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._inflight: Dict[bytes, Future] = {}
+        self._queue: "queue.Queue[Optional[Tuple[bytes, str]]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+    @staticmethod
+    def _settings(config: Dict[str, Any]) -> Dict[str, Any]:
+        cfg = config.get("embedding", {})
+        return {
+            "max_batch_size": cfg.get("max_batch_size", 64),
+            "max_wait_ms": cfg.get("max_wait_ms", 2.0),
+            "cache_size": cfg.get("cache_size", 100_000),
+            "cache_path": cfg.get("cache_path")
+        }
+
+    @classmethod
+    def from_config(cls, embedder: Any, config: Dict[str, Any]) -> "EmbeddingService":
+        return cls(embedder, **cls._settings(config))
+
+    def _count(self, **deltas: int):
+        # Counters are bumped from callers' threads and the batching worker
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                setattr(self.stats, name, getattr(self.stats, name) + delta)
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed a single text, sharing a model call with concurrent callers"""
+        key = content_key(text)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        with self._cache_lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = Future()
+                self._queue.put((key, text))
+        self._ensure_worker()
+        return future.result()
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed a list of texts in one model call for the uncached subset"""
+        keys = [content_key(t) for t in texts]
+        vectors: Dict[bytes, np.ndarray] = {}
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            cached = self._lookup(key, check_disk=False)
+            if cached is not None:
+                vectors[key] = cached
+            else:
+                missing[key] = text
+
+        if missing and self.disk:
+            found = self.disk.get_many(list(missing))
+            self._count(disk_hits=len(found))
+            for key, vec in found.items():
+                self._remember(key, vec)
+                vectors[key] = vec
+                del missing[key]
+
+        if missing:
+            vectors.update(self._compute(missing))
+        return np.stack([vectors[key] for key in keys]) if keys else np.empty((0, 0), dtype=np.float32)
+
+    def _lookup(self, key: bytes, check_disk: bool = True) -> Optional[np.ndarray]:
+        with self._cache_lock:
+            vec = self._cache.get(key)
+            if vec is not None:
+                self._cache.move_to_end(key)
+                self._count(memory_hits=1)
+                return vec
+        if check_disk and self.disk:
+            vec = self.disk.get_many([key]).get(key)
+            if vec is not None:
+                self._count(disk_hits=1)
+                self._remember(key, vec)
+                return vec
+        return None
+
+    def _remember(self, key: bytes, vec: np.ndarray):
+        vec.flags.writeable = False
+        with self._cache_lock:
+            self._cache[key] = vec
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _compute(self, items: Dict[bytes, str]) -> Dict[bytes, np.ndarray]:
+        keys = list(items)
+        matrix = embed_texts(self.embedder, [items[k] for k in keys])
+        self._count(batches=1, computed=len(keys))
+        # Rows are views into one contiguous batch matrix, not per-item copies
+        result = dict(zip(keys, matrix))
+        for key, vec in result.items():
+            self._remember(key, vec)
+        if self.disk:
+            self.disk.put_many(list(result.items()))
+        return result
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._process(batch)
+            if stop:
+                return
+
+    def _process(self, batch: List[Tuple[bytes, str]]):
+        items = dict(batch)
+        results: Dict[bytes, np.ndarray] = {}
+        error = None
+        try:
+            if self.disk:
+                found = self.disk.get_many(list(items))
+                self._count(disk_hits=len(found))
+                for key, vec in found.items():
+                    self._remember(key, vec)
+                    del items[key]
+                results.update(found)
+            if items:
+                results.update(self._compute(items))
+        except Exception as e:
+            error = e
+
+        with self._cache_lock:
+            futures = {key: self._inflight.pop(key) for key, _ in batch if key in self._inflight}
+        for key, future in futures.items():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results[key])
+
+    def close(self):
+        """Stop the batching thread and close the disk store"""
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+        if self.disk:
+            self.disk.close()
+
+
+# Held weakly: an entry lives only as long as some component uses the service, and
+# a live service keeps its embedder alive, so the id in a key can't be reused
+_services: "weakref.WeakValueDictionary[Tuple[int, Tuple[Any, ...]], EmbeddingService]" = weakref.WeakValueDictionary()
+_services_lock = threading.Lock()
+
+
+def embedding_service(embedder: Any, config: Dict[str, Any]) -> Any:
+    """The process-wide EmbeddingService wrapping embedder, per the ``embedding`` config.
+
+    Components built from the same config share one service (and so one
+    cache and batching thread) per embedder; a different ``embedding``
+    config gets its own. Returns embedder unchanged when it is None, already
+    a service, or ``embedding.enabled`` is false.
+    """
+    if embedder is None or isinstance(embedder, EmbeddingService):
+        return embedder
+    if not config.get("embedding", {}).get("enabled", True):
+        return embedder
+    settings = EmbeddingService._settings(config)
+    key = (id(embedder), tuple(sorted(settings.items())))
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = _services[key] = EmbeddingService(embedder, **settings)
+        return service
@@ -0,0 +1,53 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+
+class BackgroundLoop:
+    """One long-lived event loop on a daemon thread for synchronous callers.
+
+    ``asyncio.run`` builds and tears down a loop per call, and loop-bound
+    resources such as the HTTP pool's keep-alive client go with it. Running
+    every synchronous turn on this loop instead lets them be reused.
+    """
+    def __init__(self, name: str = "sync-io-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro: Awaitable[Any]) -> Any:
+        """Run coro on the background loop and block until it finishes"""
+        loop = self._ensure()
+        if threading.current_thread() is self._thread:
+            if asyncio.iscoroutine(coro):
+                coro.close()
+            raise RuntimeError("BackgroundLoop.run called from its own loop; await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def close(self):
+        """Stop the loop and join its thread"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+_sync_loop = BackgroundLoop()
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """Run coro to completion from synchronous code on the shared background loop"""
+    return _sync_loop.run(coro)
@@ -0,0 +1,160 @@
+import ast
+import math
+import threading
+from collections import OrderedDict
+from functools import reduce
+from typing import Any, Dict, FrozenSet, Mapping
+import numpy as np
+from core.optimization.result_cache import CacheStats
+
+MAX_EXPRESSION_LENGTH = 1000
+MAX_NODES = 200
+# Integer powers whose result would exceed this many bits are computed in floats instead
+MAX_POW_BITS = 4096
+
+_BIN_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_UNARY_OPS = (ast.UAdd, ast.USub)
+
+SCALAR_FUNCTIONS: Dict[str, Any] = {
+    "abs": abs, "min": min, "max": max, "round": round,
+    "sqrt": math.sqrt, "log": math.log, "log10": math.log10, "exp": math.exp,
+}
+ARRAY_FUNCTIONS: Dict[str, Any] = {
+    "abs": np.abs, "round": np.round,
+    "min": lambda *args: reduce(np.minimum, args), "max": lambda *args: reduce(np.maximum, args),
+    "sqrt": np.sqrt, "log": np.log, "log10": np.log10, "exp": np.exp,
+}
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+
+def _guarded_pow(base: Any, exponent: Any) -> Any:
+    """``**`` that switches to float arithmetic before an integer power gets huge.
+
+    ``9 ** 9 ** 9`` then overflows immediately instead of building a
+    multi-million-digit int, while small integer powers stay exact.
+    """
+    if (isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1
+            and abs(base).bit_length() * exponent > MAX_POW_BITS):
+        return float(base) ** float(exponent)
+    return base ** exponent
+
+
+class _GuardPow(ast.NodeTransformer):
+    """Route every ``a ** b`` through _guarded_pow (names starting with _ can't be written by users)"""
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        if not isinstance(node.op, ast.Pow):
+            return node
+        call = ast.Call(func=ast.Name(id="_pow", ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+        return ast.copy_location(call, node)
+
+
+class CompiledExpression:
+    """Arithmetic expression validated against an AST whitelist and compiled once.
+
+    Only numeric literals, named variables, + - * / // % ** and calls to
+    the functions in ``SCALAR_FUNCTIONS`` are accepted; attribute access,
+    subscripts, comprehensions and everything else are rejected before
+    compilation, so the code object can only do arithmetic.
+    """
+    def __init__(self, source: str):
+        if len(source) > MAX_EXPRESSION_LENGTH:
+            raise ValueError(f"Expression longer than {MAX_EXPRESSION_LENGTH} characters")
+        try:
+            tree = ast.parse(source.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression: {e.msg}") from None
+        names = set()
+        for count, node in enumerate(ast.walk(tree)):
+            if count > MAX_NODES:
+                raise ValueError(f"Expression has more than {MAX_NODES} nodes")
+            self._check(node, names)
+        self.source = source
+        self.variables: FrozenSet[str] = frozenset(names - SCALAR_FUNCTIONS.keys() - CONSTANTS.keys())
+        tree = ast.fix_missing_locations(_GuardPow().visit(tree))
+        self._code = compile(tree, "<expression>", "eval")
+
+    @staticmethod
+    def _check(node: ast.AST, names: set):
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ValueError(f"Unsupported literal: {node.value!r}")
+        elif isinstance(node, ast.Name):
+            if node.id.startswith("_"):
+                raise ValueError(f"Unsupported name: {node.id}")
+            names.add(node.id)
+        elif isinstance(node, ast.BinOp):
+            if not isinstance(node.op, _BIN_OPS):
+                raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, _UNARY_OPS):
+                raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in SCALAR_FUNCTIONS or node.keywords:
+                raise ValueError(f"Unsupported function call: {ast.unparse(node.func)}")
+        elif not isinstance(node, (ast.Expression, ast.Load, ast.operator, ast.unaryop)):
+            raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+    def _namespace(self, functions: Dict[str, Any], values: Mapping[str, Any], convert) -> Dict[str, Any]:
+        missing = self.variables - values.keys()
+        if missing:
+            raise ValueError(f"Missing values for: {', '.join(sorted(missing))}")
+        namespace = {"__builtins__": {}, "_pow": _guarded_pow}
+        namespace.update(CONSTANTS)
+        namespace.update(functions)
+        namespace.update((name, convert(values[name])) for name in self.variables)
+        return namespace
+
+    def evaluate(self, values: Mapping[str, Any]) -> float:
+        """Evaluate with scalar variables; errors such as division by zero raise ValueError"""
+        try:
+            result = eval(self._code, self._namespace(SCALAR_FUNCTIONS, values, float))
+        except (ArithmeticError, TypeError, ValueError) as e:
+            raise ValueError(f"Calculation failed: {e}") from None
+        if isinstance(result, complex):
+            raise ValueError("Calculation failed: result is not a real number")
+        return result
+
+    def evaluate_batch(self, columns: Mapping[str, Any]) -> np.ndarray:
+        """Evaluate element-wise over equal-length columns; bad rows yield inf/nan"""
+        namespace = self._namespace(ARRAY_FUNCTIONS, columns, lambda c: np.asarray(c, dtype=np.float64))
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            try:
+                result = eval(self._code, namespace)
+            except (ArithmeticError, TypeError, ValueError) as e:
+                # Literal-only subexpressions (e.g. 1 / 0, 9 ** 9 ** 9) fail in Python arithmetic
+                raise ValueError(f"Calculation failed: {e}") from None
+        lengths = {len(v) for k, v in namespace.items() if k in self.variables and np.ndim(v)}
+        return np.broadcast_to(result, (lengths.pop(),) if lengths else np.shape(result)).astype(np.float64)
+
+
+class ExpressionEngine:
+    """LRU cache of compiled expressions shared by calculator-style tools"""
+    def __init__(self, cache_size: int = 1024):
+        self.cache_size = cache_size
+        self.stats = CacheStats()
+        self._compiled: "OrderedDict[str, CompiledExpression]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, source: str) -> CompiledExpression:
+        key = " ".join(source.split())
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is not None:
+                self._compiled.move_to_end(key)
+                self.stats.hits += 1
+                return compiled
+            self.stats.misses += 1
+        compiled = CompiledExpression(key)
+        with self._lock:
+            self._compiled[key] = compiled
+            while len(self._compiled) > self.cache_size:
+                self._compiled.popitem(last=False)
+                self.stats.evictions += 1
+        return compiled
+
+    def evaluate(self, source: str, **values: Any) -> float:
+        return self.compile(source).evaluate(values)
+
+    def evaluate_batch(self, source: str, columns: Mapping[str, Any]) -> np.ndarray:
+        return self.compile(source).evaluate_batch(columns)
@@ -1,8 +1,9 @@
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import numpy as np
 from pydantic import BaseModel
 import torch
 import torch.nn as nn
+from core.embedding import embed_texts
 
 class FeedbackItem(BaseModel):
     input_text: str
@@ -39,9 +40,8 @@ class FeedbackHandler:
         
     def calculate_self_score(self, input_text: str, output_text: str) -> float:
         """Score the quality of output without human feedback"""
-        # Get embeddings
-        input_emb = self.llm_embedder.embed(input_text)
-        output_emb = self.llm_embedder.embed(output_text)
+        # Get embeddings in a single batched call
+        input_emb, output_emb = embed_texts(self.llm_embedder, [input_text, output_text])
         
         # Calculate similarity
         similarity = np.dot(input_emb, output_emb) / (
@@ -61,14 +61,14 @@ class FeedbackHandler:
             return
             
         # Convert feedback to training data
-        X, y = [], []
-        for fb in self.feedback_buffer:
-            emb = self.llm_embedder.embed(fb.input_text + fb.output_text)
-            X.append(emb)
-            y.append(fb.rating)
+        X = embed_texts(
+            self.llm_embedder,
+            [fb.input_text + fb.output_text for fb in self.feedback_buffer]
+        )
+        y = np.array([fb.rating for fb in self.feedback_buffer], dtype=np.float32)
             
-        X = torch.tensor(np.array(X), dtype=torch.float32)
-        y = torch.tensor(np.array(y), dtype=torch.float32).unsqueeze(1)
+        X = torch.from_numpy(X)
+        y = torch.from_numpy(y).unsqueeze(1)
         
         # Training loop
         optimizer = torch.optim.Adam(self.reward_model.parameters())
@@ -0,0 +1,220 @@
+import asyncio
+import ipaddress
+import socket
+import threading
+import time
+import weakref
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import httpcore
+import httpx
+
+
+@dataclass
+class HTTPPoolStats:
+    requests: int = 0
+    connections_opened: int = 0
+    dns_hits: int = 0
+    dns_misses: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Fraction of requests served on an already open connection"""
+        return 1.0 - self.connections_opened / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        stats = asdict(self)
+        stats["reuse_ratio"] = self.reuse_ratio
+        return stats
+
+
+class CachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    """httpcore backend that caches DNS answers for ``dns_ttl`` seconds and counts connects"""
+    def __init__(self, stats: HTTPPoolStats, dns_ttl: float = 300.0):
+        self.stats = stats
+        self.dns_ttl = dns_ttl
+        self._backend = httpcore.AnyIOBackend()
+        self._dns: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        # Streams opened on each event loop, so a dead loop's sockets can still be closed
+        self._streams: Dict[asyncio.AbstractEventLoop, "weakref.WeakSet"] = {}
+        self._lock = threading.Lock()
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+        now = time.monotonic()
+        with self._lock:
+            cached = self._dns.get((host, port))
+            if cached is not None and cached[0] > now:
+                self.stats.dns_hits += 1
+                return cached[1]
+            self.stats.dns_misses += 1
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._dns[(host, port)] = (now + self.dns_ttl, addresses)
+        return addresses
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        # TLS server_hostname comes from the request origin, so connecting by IP keeps SNI intact
+        error: Optional[Exception] = None
+        for address in await self.resolve(host, port):
+            try:
+                stream = await self._backend.connect_tcp(address, port, timeout=timeout,
+                                                         local_address=local_address,
+                                                         socket_options=socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+                continue
+            self.stats.connections_opened += 1
+            with self._lock:
+                self._streams.setdefault(asyncio.get_running_loop(), weakref.WeakSet()).add(stream)
+            return stream
+        raise error or httpcore.ConnectError(f"No addresses for {host}")
+
+    def forget_loop(self, loop: asyncio.AbstractEventLoop, shutdown: bool = False):
+        """Stop tracking a loop's streams, shutting their connections down if the loop can't close them"""
+        with self._lock:
+            streams = list(self._streams.pop(loop, ()))
+        if shutdown:
+            for stream in streams:
+                sock = stream.get_extra_info("socket")
+                try:
+                    if sock is not None:
+                        sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass  # already closed by the peer or the transport
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+
+class _PooledTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, network_backend: httpcore.AsyncNetworkBackend, **kwargs):
+        super().__init__(**kwargs)
+        # httpx does not expose network_backend; the pool reads it on every new connection
+        self._pool._network_backend = network_backend
+
+
+class HTTPClientPool:
+    """Shared keep-alive ``httpx.AsyncClient`` for HTTP-backed tools.
+
+    Connections are kept alive for ``keepalive_expiry`` seconds and reused
+    across calls, so repeat requests to a host skip TCP/TLS setup; DNS
+    answers are cached for ``dns_ttl``. ``per_host_limit`` caps concurrent
+    requests to any one host on top of the global ``max_connections``.
+
+    Connections belong to an event loop, so one client is kept per running
+    loop. The API server runs one loop and synchronous callers share the
+    background loop in ``core.event_loop``, so in practice there are one or
+    two clients. ``aclose`` closes the current loop's client and belongs in
+    the app's shutdown hook. Clients left behind on loops that have since
+    closed are released the next time a client is created.
+    """
+    def __init__(self,
+                 max_connections: int = 100,
+                 max_keepalive: int = 20,
+                 keepalive_expiry: float = 30.0,
+                 per_host_limit: int = 10,
+                 http2: bool = False,
+                 dns_ttl: float = 300.0,
+                 timeout: float = 10.0,
+                 headers: Optional[Dict[str, str]] = None):
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive,
+                                   keepalive_expiry=keepalive_expiry)
+        self.per_host_limit = per_host_limit
+        self.http2 = http2
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.stats = HTTPPoolStats()
+        self._backend = CachingNetworkBackend(self.stats, dns_ttl)
+        self._clients: Dict[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, Dict[str, asyncio.Semaphore]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs) -> "HTTPClientPool":
+        cfg = config.get("http", {})
+        return cls(
+            max_connections=cfg.get("max_connections", 100),
+            max_keepalive=cfg.get("max_keepalive", 20),
+            keepalive_expiry=cfg.get("keepalive_expiry", 30.0),
+            per_host_limit=cfg.get("per_host_limit", 10),
+            http2=cfg.get("http2", False),
+            dns_ttl=cfg.get("dns_ttl", 300.0),
+            timeout=cfg.get("timeout", 10.0),
+            **kwargs
+        )
+
+    def _state(self) -> Tuple[httpx.AsyncClient, Dict[str, asyncio.Semaphore]]:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._clients.get(loop)
+            if state is None or state[0].is_closed:
+                self._release_dead_loops()
+                transport = _PooledTransport(self._backend, limits=self.limits, http2=self.http2)
+                client = httpx.AsyncClient(transport=transport, timeout=self.timeout, headers=self.headers)
+                state = self._clients[loop] = (client, {})
+            return state
+
+    def _release_dead_loops(self):
+        # A closed loop can't run aclose(); shut its connections down directly (caller holds the lock)
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            del self._clients[loop]
+            self._backend.forget_loop(loop, shutdown=True)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The pooled client for the running event loop"""
+        return self._state()[0]
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        client, limiters = self._state()
+        host = urlsplit(url).netloc
+        limiter = limiters.get(host)
+        if limiter is None:
+            limiter = limiters[host] = asyncio.Semaphore(self.per_host_limit)
+        async with limiter:
+            self.stats.requests += 1
+            return await client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        """Close the running loop's client, draining its keep-alive connections"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._clients.pop(loop, None)
+        if state is not None:
+            await state[0].aclose()
+        self._backend.forget_loop(loop)
+
+
+_default_pool: Optional[HTTPClientPool] = None
+_default_lock = threading.Lock()
+
+
+def default_pool() -> HTTPClientPool:
+    """Process-wide pool shared by tools that are not given one explicitly"""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = HTTPClientPool()
+        return _default_pool
+
+
+def set_default_pool(pool: HTTPClientPool):
+    global _default_pool
+    with _default_lock:
+        _default_pool = pool
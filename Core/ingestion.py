@@ -0,0 +1,373 @@
+import hashlib
+import json
+import math
+import os
+import re
+import resource
+import sys
+import time
+import zlib
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import numpy as np
+from core.embedding import embed_texts
+
+_TOKEN_RE = re.compile(r"\S+")
+# Small enough that a*x + b stays below 2**63 for 31-bit operands, so the mod is exact
+_MERSENNE_PRIME = (1 << 31) - 1
+_LOW32 = np.uint64((1 << 32) - 1)
+
+
+@dataclass
+class SourceDocument:
+    source_id: str
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Chunk:
+    text: str
+    metadata: Dict[str, Any]
+
+
+@dataclass
+class IngestionStats:
+    documents: int = 0
+    chunks: int = 0
+    duplicates: int = 0
+    batches: int = 0
+    skipped_documents: int = 0
+    elapsed_s: float = 0.0
+    peak_rss_mb: float = 0.0
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.documents / self.elapsed_s if self.elapsed_s else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        stats = asdict(self)
+        stats["docs_per_sec"] = self.docs_per_sec
+        return stats
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def iter_documents(source: Union[str, Path, Iterable[Any]],
+                   pattern: str = "*") -> Iterator[SourceDocument]:
+    """Stream documents from a file, a directory, or an iterable.
+
+    Files ending in ``.jsonl`` yield one document per line (``text`` plus any
+    other keys as metadata); other files yield one document each. Iterables
+    may contain strings, ``(text, metadata)`` pairs or dicts with ``text``.
+    """
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        files = sorted(path.rglob(pattern)) if path.is_dir() else [path]
+        for file in files:
+            if file.is_file():
+                yield from _iter_file(file)
+        return
+
+    for i, item in enumerate(source):
+        if isinstance(item, SourceDocument):
+            yield item
+        elif isinstance(item, str):
+            yield SourceDocument(source_id=str(i), text=item)
+        elif isinstance(item, dict):
+            meta = {k: v for k, v in item.items() if k != "text"}
+            yield SourceDocument(source_id=str(meta.get("id", i)), text=item["text"], metadata=meta)
+        else:
+            text, meta = item
+            yield SourceDocument(source_id=str(i), text=text, metadata=dict(meta or {}))
+
+
+def _iter_file(file: Path) -> Iterator[SourceDocument]:
+    if file.suffix == ".jsonl":
+        with open(file, encoding="utf-8") as f:
+            for line_no, line in enumerate(f):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                meta = {k: v for k, v in record.items() if k != "text"}
+                meta.setdefault("source", str(file))
+                yield SourceDocument(source_id=f"{file}:{line_no}", text=record["text"], metadata=meta)
+    else:
+        yield SourceDocument(source_id=str(file), text=file.read_text(encoding="utf-8"),
+                             metadata={"source": str(file)})
+
+
+class TokenChunker:
+    """Split text into overlapping windows of at most chunk_size tokens.
+
+    Uses the tokenizer's offset mapping when a HuggingFace tokenizer is
+    given, so chunk boundaries match what the embedder will actually see;
+    otherwise falls back to whitespace tokens.
+    """
+    def __init__(self, chunk_size: int = 512, overlap: int = 64, tokenizer: Any = None):
+        if overlap >= chunk_size:
+            raise ValueError("overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.tokenizer = tokenizer
+
+    def _token_spans(self, text: str) -> List[Tuple[int, int]]:
+        if self.tokenizer is None:
+            return [m.span() for m in _TOKEN_RE.finditer(text)]
+        encoded = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        return [tuple(span) for span in encoded["offset_mapping"]]
+
+    def chunk(self, doc: SourceDocument) -> Iterator[Chunk]:
+        spans = self._token_spans(doc.text)
+        step = self.chunk_size - self.overlap
+        for index, start in enumerate(range(0, max(len(spans), 1), step)):
+            window = spans[start:start + self.chunk_size]
+            if not window:
+                break
+            begin, end = window[0][0], window[-1][1]
+            yield Chunk(
+                text=doc.text[begin:end],
+                metadata=dict(doc.metadata, source_id=doc.source_id, chunk=index,
+                              char_start=begin, char_end=end)
+            )
+            if start + self.chunk_size >= len(spans):
+                break
+
+
+class BloomFilter:
+    """Fixed-size set membership over 64-bit keys with a bounded false-positive rate.
+
+    Sized for ``capacity`` keys at ``error_rate``; memory is fixed at
+    construction (about 2.4 bytes per key at 1e-4) however many keys are
+    added. Bit positions come from double hashing the key's two 32-bit halves.
+    """
+    def __init__(self, capacity: int, error_rate: float = 1e-4):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate in (0, 1)")
+        self.num_bits = max(64, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self._steps = np.arange(self.num_hashes, dtype=np.uint64)
+
+    def _positions(self, keys: np.ndarray) -> np.ndarray:
+        keys = np.asarray(keys, dtype=np.int64).view(np.uint64)
+        h1 = keys & _LOW32
+        h2 = (keys >> np.uint64(32)) | np.uint64(1)
+        return (h1[:, None] + self._steps * h2[:, None]) % np.uint64(self.num_bits)
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        """Per key: True if it may have been added, False if it definitely was not"""
+        positions = self._positions(keys)
+        present = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return present.all(axis=1)
+
+    def add(self, keys: np.ndarray):
+        positions = self._positions(keys).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3),
+                         np.left_shift(1, (positions & np.uint64(7)).astype(np.uint8)).astype(np.uint8))
+
+
+class MinHashDeduper:
+    """Near-duplicate detection with MinHash signatures and banded LSH.
+
+    With the defaults (10 bands x 12 rows) chunks with Jaccard similarity
+    above ~0.82 over word shingles collide with high probability. Band keys
+    go into a ``BloomFilter`` sized for ``capacity`` unique chunks, so memory
+    stays fixed however much is ingested; past capacity the false-positive
+    rate (new chunks wrongly dropped as duplicates) rises above ``error_rate``.
+    """
+    def __init__(self,
+                 bands: int = 10,
+                 rows: int = 12,
+                 shingle_size: int = 5,
+                 seed: int = 1,
+                 capacity: int = 1_000_000,
+                 error_rate: float = 1e-4):
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        num_perm = bands * rows
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        # Per-key rate; a chunk probes one key per band
+        self._seen = BloomFilter(capacity * bands, error_rate / bands)
+        self._pending: List[np.ndarray] = []
+
+    def _shingles(self, text: str) -> np.ndarray:
+        words = text.lower().split()
+        n = self.shingle_size
+        if len(words) <= n:
+            grams = [" ".join(words)]
+        else:
+            grams = [" ".join(words[i:i + n]) for i in range(len(words) - n + 1)]
+        shingles = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        return shingles % np.uint64(_MERSENNE_PRIME)
+
+    def signature(self, text: str) -> np.ndarray:
+        shingles = self._shingles(text)
+        # Universal hashing (a*x + b) mod p for all permutations at once; every
+        # operand is below 2**31, so nothing wraps in uint64
+        hashed = (np.outer(self._a, shingles) + self._b[:, None]) % np.uint64(_MERSENNE_PRIME)
+        return hashed.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> np.ndarray:
+        bands = signature.reshape(self.bands, self.rows)
+        # Stable across processes so persisted keys stay valid on resume
+        return np.array([
+            int.from_bytes(hashlib.blake2b(bytes([i]) + bands[i].tobytes(), digest_size=8).digest(),
+                           "little", signed=True)
+            for i in range(self.bands)
+        ], dtype=np.int64)
+
+    def is_duplicate(self, text: str) -> bool:
+        """Check a chunk against everything seen so far and remember it if new"""
+        keys = self._band_keys(self.signature(text))
+        if self._seen.contains(keys).any():
+            return True
+        self._seen.add(keys)
+        self._pending.append(keys)
+        return False
+
+    def save(self, path: Path) -> int:
+        """Append band keys added since the last save; returns the file's size in bytes"""
+        with open(path, "ab") as f:
+            if self._pending:
+                np.concatenate(self._pending).tofile(f)
+                self._pending.clear()
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+    def load(self, path: Path, size: Optional[int] = None, block: int = 1 << 20):
+        """Replay persisted band keys into the filter, a block at a time.
+
+        With size, the file is first cut back to that many bytes: keys
+        appended after the last checkpoint belong to documents that will be
+        ingested again and must not mark them as duplicates.
+        """
+        if not path.exists():
+            return
+        if size is not None and path.stat().st_size > size:
+            os.truncate(path, size)
+        if not path.stat().st_size:
+            return
+        keys = np.memmap(path, dtype=np.int64, mode="r")
+        for start in range(0, len(keys), block):
+            self._seen.add(np.array(keys[start:start + block]))
+
+
+class IngestionPipeline:
+    """Stream -> chunk -> dedupe -> batch embed -> bulk commit.
+
+    Memory is bounded by ``batch_size`` chunks plus the chunks of the
+    document currently being split. Commits happen on document boundaries
+    so the checkpoint (documents fully committed) is always consistent,
+    and ``run`` skips that many documents when resuming.
+    """
+    def __init__(self,
+                 retriever: Any,
+                 embedder: Any = None,
+                 chunk_size: int = 512,
+                 overlap: int = 64,
+                 batch_size: int = 256,
+                 tokenizer: Any = None,
+                 dedupe: bool = True,
+                 dedupe_capacity: int = 1_000_000,
+                 checkpoint_path: Optional[str] = None):
+        self.retriever = retriever
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.chunker = TokenChunker(chunk_size=chunk_size, overlap=overlap, tokenizer=tokenizer)
+        self.deduper = MinHashDeduper(capacity=dedupe_capacity) if dedupe else None
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else None
+        self.stats = IngestionStats()
+
+    @classmethod
+    def from_config(cls, retriever: Any, config: Dict[str, Any], **kwargs) -> "IngestionPipeline":
+        retriever_cfg = config.get("retriever", {})
+        kwargs.setdefault("chunk_size", retriever_cfg.get("chunk_size", 512))
+        kwargs.setdefault("overlap", retriever_cfg.get("chunk_overlap", 64))
+        kwargs.setdefault("batch_size", retriever_cfg.get("ingest_batch_size", 256))
+        kwargs.setdefault("dedupe_capacity", retriever_cfg.get("dedupe_capacity", 1_000_000))
+        return cls(retriever, **kwargs)
+
+    def _load_checkpoint(self) -> int:
+        if not self.checkpoint_path:
+            return 0
+        if not self.checkpoint_path.exists():
+            # Keys from a run that crashed before its first checkpoint cover nothing committed
+            if self.deduper and self._lsh_path.exists():
+                os.truncate(self._lsh_path, 0)
+            return 0
+        state = json.loads(self.checkpoint_path.read_text())
+        if self.deduper:
+            self.deduper.load(self._lsh_path, size=state.get("lsh_bytes"))
+        return state["documents_done"]
+
+    def _save_checkpoint(self, documents_done: int):
+        if not self.checkpoint_path:
+            return
+        state = {"documents_done": documents_done, "stats": self.stats.as_dict()}
+        if self.deduper:
+            # The keys file is append-only; the checkpoint records how much of it is committed
+            state["lsh_bytes"] = self.deduper.save(self._lsh_path)
+        tmp = self.checkpoint_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, self.checkpoint_path)
+
+    @property
+    def _lsh_path(self) -> Path:
+        return self.checkpoint_path.with_suffix(".lsh")
+
+    def _commit(self, batch: List[Chunk]):
+        texts = [c.text for c in batch]
+        metadata = [c.metadata for c in batch]
+        if self.embedder is not None:
+            self.retriever.add_documents(texts, metadata, embeddings=embed_texts(self.embedder, texts))
+        else:
+            self.retriever.add_documents(texts, metadata)
+        self.stats.batches += 1
+        self.stats.chunks += len(batch)
+
+    def run(self, source: Union[str, Path, Iterable[Any]]) -> IngestionStats:
+        """Ingest everything from source, resuming from the checkpoint if present"""
+        start = time.perf_counter()
+        resume_from = self._load_checkpoint()
+        documents_done = resume_from
+        batch: List[Chunk] = []
+
+        for position, doc in enumerate(iter_documents(source)):
+            if position < resume_from:
+                self.stats.skipped_documents += 1
+                continue
+            for chunk in self.chunker.chunk(doc):
+                if self.deduper and self.deduper.is_duplicate(chunk.text):
+                    self.stats.duplicates += 1
+                    continue
+                batch.append(chunk)
+            self.stats.documents += 1
+
+            if len(batch) >= self.batch_size:
+                self._commit(batch)
+                batch = []
+                documents_done = position + 1
+                self._update_timing(start)
+                self._save_checkpoint(documents_done)
+
+        if batch:
+            self._commit(batch)
+        documents_done = resume_from + self.stats.documents
+        self._update_timing(start)
+        self._save_checkpoint(documents_done)
+        return self.stats
+
+    def _update_timing(self, start: float):
+        self.stats.elapsed_s = time.perf_counter() - start
+        self.stats.peak_rss_mb = peak_rss_mb()
@@ -65,10 +65,12 @@ class QuantizedLLM:
             
         return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
     
-    def bind_tools(self, tools: List[Any]):
-        """Prepare the model for tool calling"""
+    def bind_tools(self, tools: List[Any], preamble: Optional[str] = None):
+        """Prepare the model for tool calling (preamble: pre-rendered tool section)"""
         if hasattr(self.model, 'bind_tools'):
             self.model.bind_tools(tools)
+        elif preamble is not None:
+            self.system_prompt = preamble
         else:
             # Fallback implementation
             tool_descriptions = [f"{t.name}: {t.description}" for t in tools]
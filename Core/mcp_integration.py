@@ -1,6 +1,7 @@
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
+from core.http_pool import HTTPClientPool, default_pool
 
 class MCPMessage(BaseModel):
     role: str  # "user", "agent", "system", "tool"
@@ -10,16 +11,14 @@ class MCPMessage(BaseModel):
 class MCPClient:
     def __init__(self, 
                  base_url: str = "https://api.mcp.ai/v1",
-                 api_key: Optional[str] = None):
+                 api_key: Optional[str] = None,
+                 http_pool: Optional[HTTPClientPool] = None):
         self.base_url = base_url
         self.api_key = api_key
         self.session = requests.Session()
-        
-    def send(self, 
-             messages: List[MCPMessage],
-             model_id: str = "default",
-             stream: bool = False) -> MCPMessage:
-        """Send a message to MCP endpoint"""
+        self.http_pool = http_pool
+    
+    def _request(self, messages: List[MCPMessage], model_id: str, stream: bool):
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
@@ -30,6 +29,14 @@ class MCPClient:
             "model_id": model_id,
             "stream": stream
         }
+        return headers, payload
+        
+    def send(self, 
+             messages: List[MCPMessage],
+             model_id: str = "default",
+             stream: bool = False) -> MCPMessage:
+        """Send a message to MCP endpoint"""
+        headers, payload = self._request(messages, model_id, stream)
         
         response = self.session.post(
             f"{self.base_url}/chat/completions",
@@ -43,7 +50,16 @@ class MCPClient:
         else:
             return self._handle_response(response)
     
-    def _handle_response(self, response: requests.Response) -> MCPMessage:
+    async def asend(self,
+                    messages: List[MCPMessage],
+                    model_id: str = "default") -> MCPMessage:
+        """Send a message from async code over the shared keep-alive pool"""
+        headers, payload = self._request(messages, model_id, stream=False)
+        pool = self.http_pool or default_pool()
+        response = await pool.post(f"{self.base_url}/chat/completions", json=payload, headers=headers)
+        return self._handle_response(response)
+    
+    def _handle_response(self, response) -> MCPMessage:
         """Handle non-streaming response"""
         if response.status_code != 200:
             raise ValueError(f"MCP request failed: {response.text}")
@@ -1,59 +1,556 @@
-from typing import List, Dict, Any
-from collections import deque
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from core.embedding import embed_texts, embedding_service
+from core.consolidation import MemoryConsolidator
+from core.memory_journal import MemoryJournal
+from core.summarization import EpisodicCompactor
 
 class MemoryItem(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     content: str
     metadata: Dict[str, Any]
     embedding: Optional[np.ndarray] = None
     importance: float = 0.5
+    timestamp: float = 0.0
+    score: float = 0.0
+
+class KeyInterner:
+    """Metadata key <-> small int table shared by every buffer"""
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.keys: List[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, key: str) -> int:
+        key_id = self.ids.get(key)
+        if key_id is None:
+            with self._lock:
+                key_id = self.ids.setdefault(key, len(self.keys))
+                if key_id == len(self.keys):
+                    self.keys.append(sys.intern(key))
+        return key_id
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.ids) + sys.getsizeof(self.keys) + sum(sys.getsizeof(k) for k in self.keys)
+
+METADATA_KEYS = KeyInterner()
+
+class MemoryBuffer:
+    """Columnar memory store: one contiguous embedding matrix plus importance
+    and timestamp arrays, scored in a single vectorized pass.
+
+    Records are not kept as objects: text lives in one UTF-8 arena addressed
+    by offset/length columns, metadata is a tuple of (interned key id, value)
+    pairs per slot, and MemoryItems are only built for results. With a
+    capacity it is a ring buffer that overwrites the oldest slot once full
+    (the arena is compacted once dead text outweighs live text). Columns
+    start small and grow by doubling, up to the capacity when there is one.
+    """
+    def __init__(self, capacity: Optional[int] = None, dim: Optional[int] = None):
+        self.capacity = capacity
+        size = min(capacity, 64) if capacity else 64
+        self.importance = np.zeros(size, dtype=np.float32)
+        self.timestamps = np.zeros(size, dtype=np.float64)
+        self.text_offsets = np.zeros(size, dtype=np.int64)
+        self.text_lengths = np.zeros(size, dtype=np.int32)
+        self.has_embedding = np.zeros(size, dtype=bool)
+        self.embeddings = np.zeros((size, dim), dtype=np.float32) if dim else None
+        self.metadata: List[Optional[tuple]] = [None] * size
+        self._arena = bytearray()
+        self._dead_bytes = 0
+        self._metadata_bytes = 0
+        self._next = 0
+        self._count = 0
+        # Writers (appends, the compactor's drop_oldest) and scoring passes are serialized
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _size(self) -> int:
+        return len(self.importance)
+
+    def _slots(self) -> np.ndarray:
+        """Filled slots from oldest to newest"""
+        size = self._size()
+        return (np.arange(self._count) + self._next - self._count) % size
+
+    def copy(self) -> "MemoryBuffer":
+        """Detached copy of the columns, e.g. to serialize outside the owner's lock"""
+        with self._lock:
+            clone = MemoryBuffer.__new__(MemoryBuffer)
+            clone.__dict__.update(self.__dict__)
+            for name in ("importance", "timestamps", "text_offsets", "text_lengths", "has_embedding", "embeddings"):
+                column = getattr(self, name)
+                setattr(clone, name, column.copy() if column is not None else None)
+            clone.metadata = list(self.metadata)
+            clone._arena = bytearray(self._arena)
+            clone._lock = threading.RLock()
+            return clone
+
+    def __iter__(self):
+        """Items from oldest to newest"""
+        with self._lock:
+            items = [self.item(int(slot)) for slot in self._slots()]
+        return iter(items)
+
+    def item(self, slot: int, score: float = 0.0) -> MemoryItem:
+        start = self.text_offsets[slot]
+        content = self._arena[start:start + self.text_lengths[slot]].decode("utf-8")
+        pairs = self.metadata[slot] or ()
+        return MemoryItem(
+            content=content,
+            metadata={METADATA_KEYS.keys[key_id]: value for key_id, value in pairs},
+            embedding=self.embeddings[slot].copy() if self.has_embedding[slot] else None,
+            importance=float(self.importance[slot]),
+            timestamp=float(self.timestamps[slot]),
+            score=score
+        )
+
+    def nbytes(self) -> int:
+        """Resident bytes: columns, embedding matrix, text arena and per-slot metadata"""
+        total = (self.importance.nbytes + self.timestamps.nbytes + self.text_offsets.nbytes
+                 + self.text_lengths.nbytes + self.has_embedding.nbytes
+                 + sys.getsizeof(self.metadata) + sys.getsizeof(self._arena) + self._metadata_bytes)
+        if self.embeddings is not None:
+            total += self.embeddings.nbytes
+        return total
+
+    @staticmethod
+    def _pack_metadata(metadata: Dict[str, Any]) -> Optional[tuple]:
+        if not metadata:
+            return None
+        return tuple(
+            (METADATA_KEYS.intern(key), sys.intern(value) if isinstance(value, str) and len(value) <= 64 else value)
+            for key, value in metadata.items()
+        )
+
+    @staticmethod
+    def _metadata_nbytes(pairs: Optional[tuple]) -> int:
+        if not pairs:
+            return 0
+        size = sys.getsizeof(pairs)
+        for pair in pairs:
+            value = pair[1]
+            size += sys.getsizeof(pair)
+            # Short strings are interned and shared; bools and None are singletons
+            if not (value is None or isinstance(value, bool) or (isinstance(value, str) and len(value) <= 64)):
+                size += sys.getsizeof(value)
+        return size
+
+    def _grow(self):
+        # Full buffer: rotate so the oldest item sits in slot 0, then double (up to capacity)
+        order = self._slots()
+        old_size = self._size()
+        size = old_size * 2 if self.capacity is None else min(old_size * 2, self.capacity)
+        self.metadata = [self.metadata[i] for i in order] + [None] * (size - old_size)
+        self.importance = np.resize(self.importance[order], size)
+        self.timestamps = np.resize(self.timestamps[order], size)
+        self.text_offsets = np.resize(self.text_offsets[order], size)
+        self.text_lengths = np.resize(self.text_lengths[order], size)
+        self.has_embedding = np.concatenate([self.has_embedding[order], np.zeros(size - old_size, dtype=bool)])
+        if self.embeddings is not None:
+            grown = np.zeros((size, self.embeddings.shape[1]), dtype=np.float32)
+            grown[:old_size] = self.embeddings[order]
+            self.embeddings = grown
+        self._next = old_size
+
+    def oldest(self, n: int) -> List[MemoryItem]:
+        """The n oldest items, oldest first"""
+        with self._lock:
+            return [self.item(int(slot)) for slot in self._slots()[:n]]
+
+    def drop_oldest(self, n: int):
+        """Forget the n oldest items"""
+        with self._lock:
+            n = min(n, self._count)
+            for slot in self._slots()[:n]:
+                self._dead_bytes += int(self.text_lengths[slot])
+                self._metadata_bytes -= self._metadata_nbytes(self.metadata[slot])
+                self.metadata[slot] = None
+                self.has_embedding[slot] = False
+                if self.embeddings is not None:
+                    self.embeddings[slot] = 0.0
+            self._count -= n
+
+    def _compact(self):
+        """Rewrite the arena with only live text, in slot order"""
+        arena = bytearray()
+        for slot in self._slots():
+            start, length = self.text_offsets[slot], self.text_lengths[slot]
+            self.text_offsets[slot] = len(arena)
+            arena += self._arena[start:start + length]
+        self._arena = arena
+        self._dead_bytes = 0
+
+    def append(self, item: MemoryItem) -> Optional[MemoryItem]:
+        """Store an item, returning the one it evicted (if the ring was full)"""
+        with self._lock:
+            if self._count == self._size() and (self.capacity is None or self._size() < self.capacity):
+                self._grow()
+            slot = self._next
+            evicted = None
+            if self._count == self._size():
+                evicted = self.item(slot)
+                self._dead_bytes += int(self.text_lengths[slot])
+                self._metadata_bytes -= self._metadata_nbytes(self.metadata[slot])
+
+            text = item.content.encode("utf-8")
+            self.text_offsets[slot] = len(self._arena)
+            self.text_lengths[slot] = len(text)
+            self._arena += text
+            self.metadata[slot] = self._pack_metadata(item.metadata)
+            self._metadata_bytes += self._metadata_nbytes(self.metadata[slot])
+            self.importance[slot] = item.importance
+            self.timestamps[slot] = item.timestamp
+            self.has_embedding[slot] = item.embedding is not None
+            if item.embedding is not None:
+                vector = np.asarray(item.embedding, dtype=np.float32).ravel()
+                if self.embeddings is None:
+                    self.embeddings = np.zeros((self._size(), vector.shape[0]), dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                self.embeddings[slot] = vector / norm if norm else vector
+            elif self.embeddings is not None:
+                self.embeddings[slot] = 0.0
+
+            self._next = (slot + 1) % self._size()
+            self._count = min(self._count + 1, self._size())
+            if self._dead_bytes > max(len(self._arena) - self._dead_bytes, 4096):
+                self._compact()
+            return evicted
+
+    def _live(self):
+        """Filled slots as a slice when contiguous (the common case), else an index array"""
+        if self._count == self._size():
+            return slice(0, self._count)
+        start = (self._next - self._count) % self._size()
+        if start + self._count <= self._size():
+            return slice(start, start + self._count)
+        return self._slots()
+
+    def scores(self,
+               query_embedding: Optional[np.ndarray],
+               now: float,
+               weights: Tuple[float, float, float],
+               half_life: float) -> np.ndarray:
+        """similarity * w0 + recency * w1 + importance * w2 for every filled slot"""
+        with self._lock:
+            return self._scores(self._live(), query_embedding, now, weights, half_life)
+
+    def _scores(self, live, query_embedding, now, weights, half_life) -> np.ndarray:
+        score = weights[2] * self.importance[live]
+        if weights[1]:
+            age = np.maximum(now - self.timestamps[live], 0.0)
+            score = score + weights[1] * np.exp2(-age / half_life).astype(np.float32)
+        if weights[0] and query_embedding is not None and self.embeddings is not None:
+            # Slots without an embedding are zero rows and contribute no similarity
+            score = score + weights[0] * (self.embeddings[live] @ query_embedding)
+        return score
+
+    def search(self,
+               query_embedding: Optional[np.ndarray],
+               k: int,
+               now: float,
+               weights: Tuple[float, float, float] = (0.6, 0.2, 0.2),
+               half_life: float = 3600.0) -> List[MemoryItem]:
+        """Top-k items by combined score, best first"""
+        # One locked pass: the live slots can't move between scoring and reading them back
+        with self._lock:
+            if not self._count or k <= 0:
+                return []
+            live = self._live()
+            score = self._scores(live, query_embedding, now, weights, half_life)
+            if k < len(score):
+                top = np.argpartition(-score, k - 1)[:k]
+            else:
+                top = np.arange(len(score))
+            top = top[np.argsort(-score[top], kind="stable")]
+            slots = top + live.start if isinstance(live, slice) else live[top]
+            return [self.item(int(slot), float(score[i])) for slot, i in zip(slots, top)]
 
 class AgentMemory:
-    def __init__(self, 
+    def __init__(self,
                  short_term_capacity: int = 20,
-                 long_term_retriever: Any = None):
-        # Episodic memory (context window)
-        self.episodic = []
-        
+                 long_term_retriever: Any = None,
+                 embedder: Any = None,
+                 score_weights: Tuple[float, float, float] = (0.6, 0.2, 0.2),
+                 recency_half_life: float = 3600.0,
+                 consolidator: Any = None,
+                 consolidate_importance: float = 0.8,
+                 journal: Any = None,
+                 compactor: Any = None):
+        # Episodic memory (context window): recent turns plus a rolling summary of older ones
+        self.episodic = MemoryBuffer()
+        self.episodic_summary: Optional[MemoryItem] = None
+        self.compactor = compactor
+        self._lock = threading.RLock()
+
         # Short-term memory (recent interactions)
-        self.short_term = deque(maxlen=short_term_capacity)
-        
+        self.short_term = MemoryBuffer(capacity=short_term_capacity)
+
         # Long-term memory (vector store)
         self.long_term = long_term_retriever
-        
-    def add(self, 
-            content: str, 
+
+        # Query/item embeddings for similarity scoring; recency + importance only without one
+        self.embedder = embedder
+        self.score_weights = tuple(score_weights)
+        self.recency_half_life = recency_half_life
+
+        # Batched writer into long-term memory; evicted and important items go through it
+        self.consolidator = consolidator
+        self.consolidate_importance = consolidate_importance
+
+        # Write-ahead log + snapshots; replayed here so a restart resumes where it stopped.
+        # Items queued for consolidation stay journaled until the consolidator commits them.
+        self.journal = journal
+        self._unconsolidated: "OrderedDict[bytes, MemoryItem]" = OrderedDict()
+        if journal:
+            if consolidator:
+                consolidator.subscribe(self._consolidated)
+            self._restore()
+
+    @classmethod
+    def from_config(cls,
+                    config: Dict[str, Any],
+                    long_term_retriever: Any = None,
+                    embedder: Any = None,
+                    summarizer: Any = None):
+        memory_config = config.get("memory", {})
+        embedder = embedding_service(embedder, config)
+        consolidator = None
+        if long_term_retriever is not None and memory_config.get("consolidation"):
+            consolidator = MemoryConsolidator.from_config(long_term_retriever, config, embedder=embedder)
+        return cls(
+            short_term_capacity=memory_config.get("short_term_capacity", 20),
+            long_term_retriever=long_term_retriever,
+            embedder=embedder,
+            score_weights=tuple(memory_config.get("score_weights", (0.6, 0.2, 0.2))),
+            recency_half_life=memory_config.get("recency_half_life", 3600.0),
+            consolidator=consolidator,
+            consolidate_importance=memory_config.get("consolidation", {}).get("importance_threshold", 0.8),
+            journal=MemoryJournal.from_config(config),
+            compactor=EpisodicCompactor.from_config(summarizer, config) if summarizer else None
+        )
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        if self.embedder is None:
+            return None
+        return embed_texts(self.embedder, [text])[0]
+
+    def add(self,
+            content: str,
             memory_type: str = "short_term",
+            importance: float = 0.5,
             **metadata):
         """Add item to specified memory store"""
-        item = MemoryItem(content=content, metadata=metadata)
-        
-        if memory_type == "episodic":
-            self.episodic.append(item)
-        elif memory_type == "short_term":
-            self.short_term.append(item)
-        elif memory_type == "long_term" and self.long_term:
-            self.long_term.add_documents([item.content], [item.metadata])
-        else:
+        if memory_type == "long_term" and self.long_term and not self.consolidator:
+            self.long_term.add_documents([content], [metadata])
+            return
+        if memory_type not in ("episodic", "short_term", "long_term"):
             raise ValueError(f"Invalid memory type: {memory_type}")
-            
+        if memory_type == "long_term" and not self.long_term:
+            raise ValueError("No long-term retriever configured")
+
+        item = MemoryItem(
+            content=content,
+            metadata=metadata,
+            embedding=self._embed(content),
+            importance=importance,
+            timestamp=time.time()
+        )
+        if memory_type == "long_term":
+            self._consolidate(item)
+            return
+
+        record = self._encode(memory_type, item)
+        if memory_type == "episodic":
+            with self._lock:
+                self.episodic.append(item)
+                self._journal(record)
+            if self.compactor and self.compactor.overflow(len(self.episodic)):
+                self.compactor.submit(self._compact_episodic)
+            return
+
+        with self._lock:
+            evicted = self.short_term.append(item)
+            self._journal(record)
+        if self.consolidator:
+            # Promote important items now; everything else when the ring pushes it out
+            if item.importance >= self.consolidate_importance:
+                self._consolidate(item)
+            if evicted is not None:
+                self._consolidate(evicted)
+
+    def _encode(self, tier: str, item: MemoryItem) -> Optional[bytes]:
+        return self.journal.encode(tier, item) if self.journal else None
+
+    def _journal(self, record: Optional[bytes]):
+        if record is None:
+            return
+        with self._lock:
+            self.journal.write(record)
+            if self.journal.should_snapshot():
+                self.journal.snapshot(self.snapshot_tiers(), background=True)
+
+    def _consolidate(self, item: MemoryItem):
+        if self.journal:
+            record = self._encode("long_term", item)
+            with self._lock:
+                self._unconsolidated[MemoryConsolidator.key(item)] = item
+                self._journal(record)
+        self.consolidator.submit(item)
+
+    def _consolidated(self, keys: List[bytes]):
+        # Runs on the consolidator's worker once a batch is in the long-term store
+        for key in keys:
+            record = self._encode("committed", MemoryItem(content=key.hex(), metadata={}, timestamp=time.time()))
+            with self._lock:
+                if self._unconsolidated.pop(key, None) is not None:
+                    self._journal(record)
+
+    def snapshot_tiers(self) -> Dict[str, Any]:
+        """Copies of every journaled tier, cheap enough to take under the lock"""
+        with self._lock:
+            tiers = {"episodic": self.episodic.copy(), "short_term": self.short_term.copy()}
+            if self.episodic_summary is not None:
+                tiers["summary"] = [self.episodic_summary.model_copy(update={"metadata": {"folded": 0}})]
+            if self._unconsolidated:
+                tiers["long_term"] = list(self._unconsolidated.values())
+            return tiers
+
+    def snapshot(self):
+        """Snapshot the journal now; the tiers are copied under the lock and written outside it"""
+        with self._lock:
+            self.journal.snapshot(self.snapshot_tiers(), background=True)
+        self.journal.wait()
+
+    def episodic_context(self) -> List[MemoryItem]:
+        """Rolling summary (if any) followed by the recent turns, oldest first"""
+        with self._lock:
+            turns = list(self.episodic)
+            return ([self.episodic_summary] if self.episodic_summary is not None else []) + turns
+
+    def _compact_episodic(self):
+        # Runs on the compactor's worker; the summarizer call happens outside the lock
+        while True:
+            with self._lock:
+                n = self.compactor.overflow(len(self.episodic))
+                if not n:
+                    return
+                turns = self.episodic.oldest(n)
+                summary = self.episodic_summary.content if self.episodic_summary is not None else ""
+
+            updated = self.compactor.fold(summary, turns)
+            folded = MemoryItem(
+                content=updated,
+                metadata={"folded": len(turns)},
+                importance=max(t.importance for t in turns),
+                timestamp=turns[-1].timestamp
+            )
+            record = self._encode("summary", folded)
+            with self._lock:
+                self._apply_summary(folded)
+                self._journal(record)
+
+    def _apply_summary(self, summary: MemoryItem):
+        self.episodic.drop_oldest(summary.metadata.get("folded", 0))
+        self.episodic_summary = summary.model_copy(update={"metadata": {"role": "summary"}})
+
     def retrieve(self, query: str, n_results: int = 3) -> List[MemoryItem]:
         """Search across all memory stores"""
+        query_embedding = self._embed(query)
+        if query_embedding is not None:
+            norm = np.linalg.norm(query_embedding)
+            query_embedding = query_embedding / norm if norm else query_embedding
+        now = time.time()
+
         results = []
-        
-        # Check episodic memory
-        results.extend(self._search_episodic(query))
-        
-        # Check short-term memory
-        results.extend(self._search_short_term(query))
-        
+
+        with self._lock:
+            # Check episodic memory
+            results.extend(self._search_episodic(query_embedding, n_results, now))
+
+            # Check short-term memory
+            results.extend(self._search_short_term(query_embedding, n_results, now))
+
         # Check long-term memory if available
         if self.long_term:
             long_term_results = self.long_term.search(query, k=n_results)
-            results.extend([MemoryItem(content=r[0], metadata=r[1]) for r in long_term_results])
-            
-        # Sort by relevance (simplified)
-        return sorted(results, key=lambda x: -x.importance)[:n_results]
-    
-    # Additional helper methods omitted...
+            results.extend([self._long_term_item(r) for r in long_term_results])
+
+        # Every tier scores on the same similarity/recency/importance scale
+        return sorted(results, key=lambda x: -x.score)[:n_results]
+
+    def usage_breakdown(self) -> Dict[str, int]:
+        """Resident bytes per memory tier"""
+        usage = {"episodic": self.episodic.nbytes(), "short_term": self.short_term.nbytes()}
+        if self.long_term is not None and hasattr(self.long_term, "memory_bytes"):
+            usage["long_term"] = self.long_term.memory_bytes()
+        return usage
+
+    def estimate_usage(self) -> float:
+        """Total resident memory in MB"""
+        return sum(self.usage_breakdown().values()) / (1024 * 1024)
+
+    def close(self):
+        """Finish in-flight summarization, flush pending long-term writes and close the journal"""
+        if self.compactor:
+            self.compactor.close()
+        if self.consolidator:
+            self.consolidator.close()
+        if self.journal:
+            self.journal.close()
+
+    def close_journal(self):
+        """Snapshot (if anything is unsnapshotted) and close the journal; a shared consolidator keeps running"""
+        if self.consolidator:
+            self.consolidator.unsubscribe(self._consolidated)
+        if self.journal.records_since_snapshot:
+            self.snapshot()
+        self.journal.close()
+
+    def _restore(self):
+        # Replayed writes rebuild the tiers; evictions come back through the long_term records
+        for tier, fields in self.journal.recover():
+            item = MemoryItem(**fields)
+            if tier == "summary":
+                self._apply_summary(item)
+            elif tier == "episodic":
+                self.episodic.append(item)
+            elif tier == "long_term":
+                self._unconsolidated[MemoryConsolidator.key(item)] = item
+            elif tier == "committed":
+                self._unconsolidated.pop(bytes.fromhex(item.content), None)
+            else:
+                self.short_term.append(item)
+
+        # Long-term writes that never reached the store before the restart
+        pending = list(self._unconsolidated.values())
+        if self.consolidator:
+            for item in pending:
+                self.consolidator.submit(item)
+        elif pending and self.long_term:
+            self.long_term.add_documents([i.content for i in pending], [i.metadata for i in pending])
+            self._unconsolidated.clear()
+
+    def _search_episodic(self, query_embedding: Optional[np.ndarray], k: int, now: float) -> List[MemoryItem]:
+        # Under the memory lock so a compaction can't drop turns mid-search
+        with self._lock:
+            return self.episodic.search(query_embedding, k, now, self.score_weights, self.recency_half_life)
+
+    def _search_short_term(self, query_embedding: Optional[np.ndarray], k: int, now: float) -> List[MemoryItem]:
+        with self._lock:
+            return self.short_term.search(query_embedding, k, now, self.score_weights, self.recency_half_life)
+
+    def _long_term_item(self, result: Tuple[str, Dict[str, Any]]) -> MemoryItem:
+        # Fused retriever scores are already normalized to [0, 1]; no recency signal
+        text, meta = result
+        importance = (meta.get("metadata") or {}).get("importance", 0.5)
+        score = self.score_weights[0] * meta.get("score", 0.0) + self.score_weights[2] * importance
+        return MemoryItem(content=text, metadata=meta, importance=importance, score=score)
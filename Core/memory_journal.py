@@ -0,0 +1,231 @@
+import json
+import os
+import shutil
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+_FRAME = struct.Struct("<II")       # body length, crc32(body)
+_RECORD = struct.Struct("<BdfII")   # tier, timestamp, importance, text bytes, embedding dim
+
+TIERS = ("episodic", "short_term", "summary", "long_term", "committed")
+
+
+def _segment_name(seq: int) -> str:
+    return f"journal-{seq:08d}.log"
+
+
+class MemoryJournal:
+    """Append-only write log plus periodic mmap-able snapshots for AgentMemory.
+
+    Every write is appended to the current log segment as a CRC-framed
+    binary record. ``snapshot`` rolls to a new segment and writes the live
+    contents of each tier as .npy columns (embeddings, importance,
+    timestamps) plus a JSON text arena, then drops older segments. Recovery
+    maps the latest snapshot and replays only the segments written after it,
+    so restart cost is bounded by ``snapshot_every`` regardless of history.
+    A torn record at the end of the log is truncated away.
+
+    The roll to a new segment is synchronous, so callers hand over a copy
+    of the tiers taken after their last append; writing it can then happen
+    on a background thread (``background=True``), one snapshot at a time.
+    """
+    def __init__(self, path: str, snapshot_every: int = 1000, fsync: bool = False):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.records_since_snapshot = 0
+        self._seq = self._current_snapshot_seq()
+        # A crash mid-snapshot can leave segments newer than CURRENT; keep appending after them
+        self._segment = max([self._seq] + [seq for seq, _ in self._segments()])
+        self._log = None
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["MemoryJournal"]:
+        memory_config = config.get("memory", {})
+        cfg = memory_config.get("persistence", {})
+        if not memory_config.get("long_term_persistence") or not cfg.get("path"):
+            return None
+        return cls(cfg["path"], snapshot_every=cfg.get("snapshot_every", 1000), fsync=cfg.get("fsync", False))
+
+    def _current_snapshot_seq(self) -> int:
+        current = self.path / "CURRENT"
+        return int(current.read_text().strip()) if current.exists() else 0
+
+    def _segments(self) -> List[Tuple[int, Path]]:
+        segments = []
+        for p in self.path.glob("journal-*.log"):
+            segments.append((int(p.stem.split("-")[1]), p))
+        return sorted(segments)
+
+    def _open_log(self):
+        if self._log is None:
+            self._log = open(self.path / _segment_name(self._segment), "ab")
+
+    def append(self, tier: str, item: Any):
+        """Durably record one memory write"""
+        self.write(self.encode(tier, item))
+
+    @staticmethod
+    def encode(tier: str, item: Any) -> bytes:
+        """Frame one write; done before the tier changes so a bad record leaves it untouched"""
+        text = json.dumps({"content": item.content, "metadata": item.metadata}).encode("utf-8")
+        vector = b""
+        dim = 0
+        if item.embedding is not None:
+            embedding = np.ascontiguousarray(item.embedding, dtype=np.float32).ravel()
+            vector, dim = embedding.tobytes(), embedding.shape[0]
+        body = _RECORD.pack(TIERS.index(tier), item.timestamp, item.importance, len(text), dim) + text + vector
+        return _FRAME.pack(len(body), zlib.crc32(body)) + body
+
+    def write(self, record: bytes):
+        """Durably append a record from ``encode``"""
+        with self._lock:
+            self._open_log()
+            self._log.write(record)
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            self.records_since_snapshot += 1
+
+    def should_snapshot(self) -> bool:
+        return self.records_since_snapshot >= self.snapshot_every and not self.snapshotting()
+
+    def snapshotting(self) -> bool:
+        return self._writer is not None and self._writer.is_alive()
+
+    def snapshot(self, tiers: Dict[str, Iterable[Any]], background: bool = False):
+        """Write the tier contents and discard the log they supersede"""
+        self.wait()
+        with self._lock:
+            # Later writes go to a fresh segment; the snapshot covers everything before it
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            self._segment += 1
+            self.records_since_snapshot = 0
+            seq = self._segment
+        if not background:
+            self._snapshot(seq, tiers)
+            return
+        self._writer = threading.Thread(target=self._snapshot, args=(seq, tiers), name="memory-snapshot", daemon=True)
+        self._writer.start()
+
+    def wait(self):
+        """Block until a background snapshot has been written"""
+        writer = self._writer
+        if writer is not None:
+            writer.join()
+
+    def _snapshot(self, seq: int, tiers: Dict[str, Iterable[Any]]):
+        target = self.path / f"snapshot-{seq:08d}"
+        tmp = self.path / f"snapshot-{seq:08d}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+
+        for tier, items in tiers.items():
+            self._write_tier(tmp / tier, list(items))
+        (tmp / "meta.json").write_text(json.dumps({"segment": seq, "tiers": list(tiers)}))
+        shutil.rmtree(target, ignore_errors=True)  # left behind by a crash before CURRENT moved
+        os.replace(tmp, target)
+
+        pointer = self.path / "CURRENT.tmp"
+        with open(pointer, "w") as f:
+            f.write(str(seq))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer, self.path / "CURRENT")
+
+        self._seq = seq
+        for old_seq, segment in self._segments():
+            if old_seq < seq:
+                segment.unlink()
+        for old in self.path.glob("snapshot-*"):
+            if old != target:
+                shutil.rmtree(old, ignore_errors=True)
+
+    def _write_tier(self, prefix: Path, items: List[Any]):
+        dim = next((np.asarray(i.embedding).size for i in items if i.embedding is not None), 0)
+        embeddings = np.zeros((len(items), dim), dtype=np.float32)
+        has_embedding = np.zeros(len(items), dtype=bool)
+        for row, item in enumerate(items):
+            if item.embedding is not None:
+                embeddings[row] = np.asarray(item.embedding, dtype=np.float32).ravel()
+                has_embedding[row] = True
+
+        texts = [json.dumps({"content": i.content, "metadata": i.metadata}).encode("utf-8") for i in items]
+        offsets = np.zeros(len(items) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in texts], out=offsets[1:])
+
+        np.save(f"{prefix}.embeddings.npy", embeddings)
+        np.save(f"{prefix}.has_embedding.npy", has_embedding)
+        np.save(f"{prefix}.importance.npy", np.array([i.importance for i in items], dtype=np.float32))
+        np.save(f"{prefix}.timestamps.npy", np.array([i.timestamp for i in items], dtype=np.float64))
+        np.save(f"{prefix}.offsets.npy", offsets)
+        with open(f"{prefix}.records.bin", "wb") as f:
+            f.write(b"".join(texts))
+
+    def recover(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (tier, fields) for the snapshot contents, then the log tail, in write order"""
+        if self._seq:
+            yield from self._read_snapshot(self.path / f"snapshot-{self._seq:08d}")
+        for seq, segment in self._segments():
+            if seq >= self._seq:
+                yield from self._read_segment(segment)
+
+    def _read_snapshot(self, directory: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        meta = json.loads((directory / "meta.json").read_text())
+        for tier in meta["tiers"]:
+            prefix = directory / tier
+            embeddings = np.load(f"{prefix}.embeddings.npy", mmap_mode="r")
+            has_embedding = np.load(f"{prefix}.has_embedding.npy", mmap_mode="r")
+            importance = np.load(f"{prefix}.importance.npy", mmap_mode="r")
+            timestamps = np.load(f"{prefix}.timestamps.npy", mmap_mode="r")
+            offsets = np.load(f"{prefix}.offsets.npy", mmap_mode="r")
+            arena = np.memmap(f"{prefix}.records.bin", dtype=np.uint8, mode="r") if offsets[-1] else None
+            for row in range(len(importance)):
+                record = json.loads(arena[offsets[row]:offsets[row + 1]].tobytes())
+                record.update(
+                    embedding=np.array(embeddings[row]) if has_embedding[row] else None,
+                    importance=float(importance[row]),
+                    timestamp=float(timestamps[row])
+                )
+                yield tier, record
+
+    def _read_segment(self, segment: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        data = segment.read_bytes()
+        pos = 0
+        while pos + _FRAME.size <= len(data):
+            length, crc = _FRAME.unpack_from(data, pos)
+            body = data[pos + _FRAME.size:pos + _FRAME.size + length]
+            if len(body) < length or zlib.crc32(body) != crc:
+                break
+            tier, timestamp, importance, text_len, dim = _RECORD.unpack_from(body)
+            text_end = _RECORD.size + text_len
+            record = json.loads(body[_RECORD.size:text_end])
+            record.update(
+                embedding=np.frombuffer(body, dtype=np.float32, count=dim, offset=text_end).copy() if dim else None,
+                importance=importance,
+                timestamp=timestamp
+            )
+            self.records_since_snapshot += 1
+            yield TIERS[tier], record
+            pos += _FRAME.size + length
+
+        if pos < len(data):
+            # Torn write from a crash: drop the partial record so appends stay aligned
+            with open(segment, "r+b") as f:
+                f.truncate(pos)
+
+    def close(self):
+        self.wait()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
@@ -0,0 +1,193 @@
+import threading
+from collections import defaultdict
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterable, List, Optional, Set
+import numpy as np
+from pyroaring import BitMap
+
+RANGE_OPS = {"$gt", "$gte", "$lt", "$lte"}
+
+
+def _to_sortable(value: Any) -> Optional[float]:
+    """Map numbers, dates and ISO date strings onto a single ordered axis"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime.combine(value, time()).timestamp()
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+class _RangeColumn:
+    """Sorted (value, doc_id) column answering range predicates with binary search"""
+    def __init__(self):
+        self._values: List[float] = []
+        self._doc_ids: List[int] = []
+        self._sorted_values = np.empty(0, dtype=np.float64)
+        self._sorted_ids = np.empty(0, dtype=np.uint32)
+        self._dirty = False
+
+    def add(self, doc_id: int, value: float):
+        self._values.append(value)
+        self._doc_ids.append(doc_id)
+        self._dirty = True
+
+    def _freeze(self):
+        if not self._dirty:
+            return
+        values = np.asarray(self._values, dtype=np.float64)
+        order = np.argsort(values, kind="stable")
+        self._sorted_values = values[order]
+        self._sorted_ids = np.asarray(self._doc_ids, dtype=np.uint32)[order]
+        self._dirty = False
+
+    def query(self, ops: Dict[str, Any]) -> BitMap:
+        self._freeze()
+        lo, hi = 0, len(self._sorted_values)
+        for op, bound in ops.items():
+            key = _to_sortable(bound)
+            if key is None:
+                raise ValueError(f"Range bound for {op} is not a number or date: {bound!r}")
+            if op == "$gt":
+                lo = max(lo, np.searchsorted(self._sorted_values, key, side="right"))
+            elif op == "$gte":
+                lo = max(lo, np.searchsorted(self._sorted_values, key, side="left"))
+            elif op == "$lt":
+                hi = min(hi, np.searchsorted(self._sorted_values, key, side="left"))
+            elif op == "$lte":
+                hi = min(hi, np.searchsorted(self._sorted_values, key, side="right"))
+        if lo >= hi:
+            return BitMap()
+        return BitMap(self._sorted_ids[lo:hi])
+
+
+class MetadataIndex:
+    """Per-field-value roaring bitmaps over document ids.
+
+    Filters use a small Mongo-style expression language:
+
+        {"source": "sec.gov"}
+        {"document_type": {"$in": ["guideline", "drug_interactions"]}}
+        {"$or": [{"source": "sec.gov"}, {"filed": {"$gte": "2023-01-01"}}]}
+        {"$not": {"document_type": "draft"}}
+
+    Numbers, dates and fields listed in ``range_fields`` (ISO date strings)
+    are additionally kept in sorted columns for ``$gt/$gte/$lt/$lte``.
+    """
+    def __init__(self, range_fields: Iterable[str] = ()):
+        self.range_fields: Set[str] = set(range_fields)
+        self._postings: Dict[str, Dict[Any, BitMap]] = defaultdict(dict)
+        self._ranges: Dict[str, _RangeColumn] = defaultdict(_RangeColumn)
+        self._present: Dict[str, BitMap] = defaultdict(BitMap)
+        self._all = BitMap()
+        self._lock = threading.Lock()
+
+    def add(self, doc_id: int, metadata: Dict[str, Any]):
+        with self._lock:
+            self._all.add(doc_id)
+            for field, value in metadata.items():
+                self._present[field].add(doc_id)
+                values = value if isinstance(value, (list, tuple, set)) else (value,)
+                for v in values:
+                    self._index_value(doc_id, field, v)
+
+    def add_many(self, doc_ids: Iterable[int], metadata: Iterable[Dict[str, Any]]):
+        for doc_id, meta in zip(doc_ids, metadata):
+            self.add(doc_id, meta)
+
+    def _index_value(self, doc_id: int, field: str, value: Any):
+        if isinstance(value, datetime):
+            key = value.isoformat()
+        elif isinstance(value, date):
+            key = value.isoformat()
+        else:
+            key = value
+        try:
+            self._postings[field].setdefault(key, BitMap()).add(doc_id)
+        except TypeError:
+            # Unhashable values (dicts, arrays) can only be tested for presence
+            pass
+
+        if isinstance(value, str) and field not in self.range_fields:
+            return
+        sortable = _to_sortable(value)
+        if sortable is not None:
+            self._ranges[field].add(doc_id, sortable)
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def evaluate(self, filters: Optional[Dict[str, Any]]) -> Optional[BitMap]:
+        """Resolve a filter expression to the bitmap of matching doc ids (None = no filter)"""
+        if not filters:
+            return None
+        with self._lock:
+            return self._eval(filters)
+
+    def _eval(self, expr: Dict[str, Any]) -> BitMap:
+        result = None
+        for key, value in expr.items():
+            if key == "$and":
+                bitmap = self._intersect(self._eval(e) for e in value)
+            elif key == "$or":
+                bitmap = BitMap.union(BitMap(), *(self._eval(e) for e in value))
+            elif key == "$not":
+                bitmap = self._all - self._eval(value)
+            elif key.startswith("$"):
+                raise ValueError(f"Unsupported filter operator: {key}")
+            else:
+                bitmap = self._eval_field(key, value)
+            result = bitmap if result is None else result & bitmap
+        return result if result is not None else BitMap(self._all)
+
+    def _intersect(self, bitmaps: Iterable[BitMap]) -> BitMap:
+        result = None
+        for bitmap in bitmaps:
+            result = bitmap if result is None else result & bitmap
+            if not result:
+                break
+        return result if result is not None else BitMap(self._all)
+
+    def _eval_field(self, field: str, condition: Any) -> BitMap:
+        postings = self._postings.get(field, {})
+        if not isinstance(condition, dict):
+            return BitMap(postings.get(self._key(condition), BitMap()))
+
+        result = None
+        range_ops = {op: v for op, v in condition.items() if op in RANGE_OPS}
+        if range_ops:
+            column = self._ranges.get(field)
+            result = column.query(range_ops) if column else BitMap()
+
+        for op, value in condition.items():
+            if op in RANGE_OPS:
+                continue
+            if op == "$eq":
+                bitmap = BitMap(postings.get(self._key(value), BitMap()))
+            elif op == "$ne":
+                bitmap = self._all - postings.get(self._key(value), BitMap())
+            elif op == "$in":
+                bitmap = BitMap.union(BitMap(), *(postings.get(self._key(v), BitMap()) for v in value))
+            elif op == "$nin":
+                bitmap = self._all - BitMap.union(BitMap(), *(postings.get(self._key(v), BitMap()) for v in value))
+            elif op == "$exists":
+                present = self._present.get(field, BitMap())
+                bitmap = BitMap(present) if value else self._all - present
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            result = bitmap if result is None else result & bitmap
+        return result if result is not None else BitMap(self._all)
+
+    @staticmethod
+    def _key(value: Any) -> Any:
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
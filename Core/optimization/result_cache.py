@@ -0,0 +1,195 @@
+import asyncio
+import json
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a query string used for cache keys"""
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+def canonical_filters(filters: Optional[Dict[str, Any]]) -> str:
+    """Order-independent, hashable representation of a filter expression"""
+    if not filters:
+        return ""
+    return json.dumps(filters, sort_keys=True, default=str, separators=(",", ":"))
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    stale: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        stats = asdict(self)
+        stats["hit_rate"] = self.hit_rate
+        return stats
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one execution"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn once per key; returns (result, shared) where shared marks followers"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class AsyncSingleFlight:
+    """Collapse concurrent coroutine calls for the same key into one execution.
+
+    Followers wait on the leader's result. If the leader is cancelled (e.g.
+    by its timeout) followers get a TimeoutError rather than a
+    cancellation they did not ask for.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Await fn once per key and event loop; returns (result, shared)"""
+        loop = asyncio.get_running_loop()
+        call_key = (id(loop), key)
+        with self._lock:
+            future = self._calls.get(call_key)
+            leader = future is None
+            if leader:
+                future = self._calls[call_key] = loop.create_future()
+
+        if not leader:
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    raise asyncio.TimeoutError(f"Shared call for {key!r} was cancelled") from None
+                raise
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # mark retrieved so an unobserved failure is not logged
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[call_key]
+
+
+class ResultCache:
+    """LRU result cache invalidated by an index generation counter.
+
+    Every entry remembers the generation it was computed against; a lookup
+    with a newer generation treats it as stale, so invalidation is exact
+    and never depends on a TTL.
+    """
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, Tuple[int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    def get(self, key: Hashable, generation: int) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] != generation:
+                del self._entries[key]
+                self.stats.stale += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return True, entry[1]
+
+    def put(self, key: Hashable, generation: int, value: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current[0] > generation:
+                return
+            self._entries[key] = (generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def get_or_compute(self,
+                       key: Hashable,
+                       generation: int,
+                       compute: Callable[[], Any]) -> Any:
+        """Return the cached value or compute it once across concurrent callers"""
+        found, value = self.get(key, generation)
+        if found:
+            return value
+
+        def _fill():
+            result = compute()
+            self.put(key, generation, result)
+            return result
+
+        value, shared = self._flight.do((key, generation), _fill)
+        with self._lock:
+            if shared:
+                self.stats.coalesced += 1
+            else:
+                self.stats.misses += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,201 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from core.embedding import embed_texts, embedding_service
+from core.optimization.result_cache import CacheStats, normalize_query
+
+# Goal fragments treated as parameters: quoted strings, tickers/acronyms,
+# numbers and dates, and capitalized names after the first word.
+_SLOT = re.compile(
+    r'"([^"]+)"'
+    r"|'([^']+)'"
+    r"|\b([A-Z]{2,5}(?:\.[A-Z])?)\b"
+    r"|(?<![\w.])(\d+(?:[.,/:-]\d+)*%?)"
+    r"|(?<=\s)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)"
+)
+
+
+def extract_template(goal: str) -> Tuple[str, List[str]]:
+    """Split a goal into a template with numbered slots and the slot values"""
+    values: List[str] = []
+
+    def _slot(match):
+        value = next(g for g in match.groups() if g is not None)
+        if value not in values:
+            values.append(value)
+        return "{%d}" % values.index(value)
+
+    return _SLOT.sub(_slot, goal.replace("{", "{{").replace("}", "}}")), values
+
+
+def _map_strings(obj: Any, fn) -> Any:
+    if isinstance(obj, str):
+        return fn(obj)
+    if isinstance(obj, dict):
+        return {_map_strings(k, fn): _map_strings(v, fn) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_map_strings(v, fn) for v in obj]
+    return obj
+
+
+def parametrize(tasks: Dict[str, Any], values: List[str]) -> Dict[str, Any]:
+    """Replace slot values in task names and fields with format placeholders"""
+    patterns = sorted(((re.compile(rf"(?<![^\W_]){re.escape(v)}(?![^\W_])"), i) for i, v in enumerate(values)),
+                      key=lambda p: -len(values[p[1]]))
+
+    def _fn(text: str) -> str:
+        text = text.replace("{", "{{").replace("}", "}}")
+        for pattern, i in patterns:
+            text = pattern.sub("{%d}" % i, text)
+        return text
+
+    return _map_strings(tasks, _fn)
+
+
+def instantiate(tasks: Dict[str, Any], values: List[str]) -> Dict[str, Any]:
+    return _map_strings(tasks, lambda text: text.format(*values))
+
+
+@dataclass
+class PlanCacheStats(CacheStats):
+    semantic_hits: int = 0
+
+
+@dataclass
+class PlanTemplate:
+    template: str
+    slots: int
+    tasks: Dict[str, Any]
+    created: float
+    generation: int
+    vector: Optional[np.ndarray] = None
+    uses: int = 0
+
+
+class PlanCache:
+    """Reuses validated task graphs for goals that differ only in parameters.
+
+    Goals are reduced to templates ("generate investment thesis for {0}")
+    and the stored plan has the slot values replaced by placeholders, so a
+    later goal with the same template is planned without an LLM call. With
+    an embedder, a template that misses exactly can still match a cached
+    one with the same number of slots whose cosine similarity clears
+    ``similarity_threshold``. Entries expire after ``max_age`` seconds, and
+    ``invalidate()`` drops everything planned before it (e.g. after the
+    tool set changes).
+    """
+    def __init__(self,
+                 max_entries: int = 1024,
+                 max_age: Optional[float] = 86400.0,
+                 embedder: Any = None,
+                 similarity_threshold: float = 0.92):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.stats = PlanCacheStats()
+        self._entries: "OrderedDict[str, PlanTemplate]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], embedder: Any = None) -> "PlanCache":
+        cfg = config.get("planner", {})
+        return cls(
+            max_entries=cfg.get("plan_cache_size", 1024),
+            max_age=cfg.get("plan_cache_max_age", 86400.0),
+            embedder=embedding_service(embedder, config),
+            similarity_threshold=cfg.get("plan_similarity_threshold", 0.92)
+        )
+
+    def _key(self, template: str) -> str:
+        return normalize_query(template)
+
+    def _embed(self, template: str) -> Optional[np.ndarray]:
+        if self.embedder is None:
+            return None
+        vec = embed_texts(self.embedder, [template])[0]
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _fresh(self, entry: PlanTemplate, now: float) -> bool:
+        if entry.generation != self._generation:
+            return False
+        return self.max_age is None or now - entry.created <= self.max_age
+
+    def lookup(self, goal: str) -> Optional[Dict[str, Any]]:
+        """Instantiate a cached plan for goal, or None on a miss"""
+        template, values = extract_template(goal)
+        key = self._key(template)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._fresh(entry, now):
+                del self._entries[key]
+                self.stats.stale += 1
+                entry = None
+            tasks = self._hit(entry, semantic=False) if entry is not None else None
+            if tasks is None and (self.embedder is None or not self._entries):
+                self.stats.misses += 1
+                return None
+        if tasks is not None:
+            return instantiate(tasks, values)
+
+        # Exact miss: embed outside the lock (as store does), then match semantically
+        vec = self._embed(template)
+        with self._lock:
+            entry = self._nearest(vec, len(values), now)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            tasks = self._hit(entry, semantic=True)
+        return instantiate(tasks, values)
+
+    def _hit(self, entry: PlanTemplate, semantic: bool) -> Dict[str, Any]:
+        # Caller holds the lock
+        self._entries.move_to_end(self._key(entry.template))
+        entry.uses += 1
+        self.stats.hits += 1
+        self.stats.semantic_hits += semantic
+        return entry.tasks
+
+    def _nearest(self, vec: np.ndarray, slots: int, now: float) -> Optional[PlanTemplate]:
+        candidates = [e for e in self._entries.values()
+                      if e.slots == slots and e.vector is not None and self._fresh(e, now)]
+        if not candidates:
+            return None
+        sims = np.stack([e.vector for e in candidates]) @ vec
+        best = int(np.argmax(sims))
+        return candidates[best] if sims[best] >= self.similarity_threshold else None
+
+    def store(self, goal: str, tasks: Dict[str, Any]):
+        """Cache a validated plan under the goal's template"""
+        if self.max_entries <= 0:
+            return
+        template, values = extract_template(goal)
+        entry = PlanTemplate(template, len(values), parametrize(tasks, values), time.time(),
+                             self._generation, self._embed(template))
+        with self._lock:
+            entry.generation = self._generation
+            key = self._key(template)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, goal: Optional[str] = None):
+        """Forget the template for goal, or every plan cached so far"""
+        with self._lock:
+            if goal is None:
+                self._generation += 1
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(extract_template(goal)[0]), None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
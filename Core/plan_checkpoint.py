@@ -0,0 +1,123 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class PlanCheckpointStore:
+    """SQLite-backed record of plans and every task transition.
+
+    ``record`` upserts a task's status, output, error and timing as soon as
+    it changes, so a plan interrupted mid-run can be reloaded by any worker
+    sharing the database and resumed without re-running completed tasks.
+    A worker ``claim``s a plan with a lease that every recorded transition
+    renews; a crashed worker's plans become claimable once it lapses.
+    Outputs are stored as JSON (non-JSON values fall back to ``str``).
+    """
+    def __init__(self, path: str, lease: float = 600.0):
+        self.lease = lease
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plans (plan_id TEXT PRIMARY KEY, goal TEXT, tasks TEXT NOT NULL, "
+            "done INTEGER NOT NULL DEFAULT 0, owner TEXT, lease_until REAL NOT NULL DEFAULT 0, updated REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS task_states (plan_id TEXT NOT NULL, task TEXT NOT NULL, "
+            "status INTEGER NOT NULL, output TEXT, error TEXT, started REAL, finished REAL, "
+            "PRIMARY KEY (plan_id, task))"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["PlanCheckpointStore"]:
+        cfg = config.get("planner", {})
+        if not cfg.get("checkpoint_path"):
+            return None
+        return cls(cfg["checkpoint_path"], lease=cfg.get("checkpoint_lease", 600.0))
+
+    def save_plan(self, plan_id: str, goal: str, tasks: Dict[str, Any], owner: Optional[str] = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plans (plan_id, goal, tasks, done, owner, lease_until, updated) "
+                "VALUES (?, ?, ?, 0, ?, ?, ?)",
+                (plan_id, goal, json.dumps(tasks, default=str), owner, now + self.lease if owner else 0.0, now)
+            )
+            self._conn.execute("DELETE FROM task_states WHERE plan_id = ?", (plan_id,))
+            self._conn.commit()
+
+    def record(self,
+               plan_id: str,
+               task: str,
+               status: int,
+               output: Any = None,
+               error: Optional[str] = None,
+               started: Optional[float] = None,
+               finished: Optional[float] = None,
+               done: bool = False):
+        """Persist one task transition and renew the plan's lease"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO task_states (plan_id, task, status, output, error, started, finished) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (plan_id, task, status, json.dumps(output, default=str), error, started, finished)
+            )
+            self._conn.execute(
+                "UPDATE plans SET done = ?, updated = ?, "
+                "lease_until = CASE WHEN owner IS NULL THEN lease_until ELSE ? END WHERE plan_id = ?",
+                (int(done), now, now + self.lease, plan_id)
+            )
+            self._conn.commit()
+
+    def claim(self, plan_id: str, owner: str) -> bool:
+        """Take ownership of a plan unless another worker holds a live lease"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE plans SET owner = ?, lease_until = ? "
+                "WHERE plan_id = ? AND (owner IS NULL OR owner = ? OR lease_until < ?)",
+                (owner, now + self.lease, plan_id, owner, now)
+            )
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def release(self, plan_id: str, owner: str):
+        with self._lock:
+            self._conn.execute("UPDATE plans SET owner = NULL, lease_until = 0 WHERE plan_id = ? AND owner = ?",
+                               (plan_id, owner))
+            self._conn.commit()
+
+    def load(self, plan_id: str) -> Tuple[str, Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """Return (goal, tasks, task states) for a saved plan"""
+        with self._lock:
+            row = self._conn.execute("SELECT goal, tasks FROM plans WHERE plan_id = ?", (plan_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"No checkpoint for plan {plan_id}")
+            states = self._conn.execute(
+                "SELECT task, status, output, error, started, finished FROM task_states WHERE plan_id = ?",
+                (plan_id,)
+            ).fetchall()
+        return row[0], json.loads(row[1]), {
+            task: {"status": status, "output": json.loads(output) if output is not None else None,
+                   "error": error, "started": started, "finished": finished}
+            for task, status, output, error, started, finished in states
+        }
+
+    def incomplete_plans(self, claimable_only: bool = True) -> List[str]:
+        """Plans that have not finished, oldest update first"""
+        query = "SELECT plan_id FROM plans WHERE done = 0"
+        params: Tuple = ()
+        if claimable_only:
+            query += " AND (owner IS NULL OR lease_until < ?)"
+            params = (time.time(),)
+        with self._lock:
+            return [row[0] for row in self._conn.execute(query + " ORDER BY updated", params)]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,166 @@
+import asyncio
+import heapq
+import inspect
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from core.optimization.result_cache import normalize_query
+from core.planner import Planner, TaskStatus
+
+
+@dataclass
+class TaskResult:
+    name: str
+    status: TaskStatus
+    output: Any = None
+    error: Optional[str] = None
+    started: float = 0.0
+    finished: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+class DurationEstimator:
+    """EWMA of observed task durations, keyed by tool (or normalized description)"""
+    def __init__(self, default: float = 1.0, smoothing: float = 0.3):
+        self.default = default
+        self.smoothing = smoothing
+        self._estimates: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(data: Dict[str, Any]) -> str:
+        return data.get("tool") or normalize_query(data.get("description", ""))
+
+    def estimate(self, data: Dict[str, Any]) -> float:
+        if "estimated_duration" in data:
+            return float(data["estimated_duration"])
+        return self._estimates.get(self.key(data), self.default)
+
+    def observe(self, data: Dict[str, Any], seconds: float):
+        key = self.key(data)
+        with self._lock:
+            previous = self._estimates.get(key)
+            self._estimates[key] = seconds if previous is None else previous + self.smoothing * (seconds - previous)
+
+
+class PlanExecutor:
+    """Runs a Planner's task graph with bounded concurrency.
+
+    Every ready task is dispatched as soon as a slot is free, at most
+    ``max_concurrent`` at a time. When there are more ready tasks than
+    slots, the one with the longest estimated path to the end of the plan
+    goes first, with estimates taken from past runs. A successor becomes
+    ready the moment its last predecessor completes. Descendants of a
+    failed task are skipped; independent branches keep running. Tasks that
+    are already COMPLETED count as done, so a partially run plan resumes.
+
+    ``runner(name, data, inputs)`` executes one task; ``inputs`` maps each
+    predecessor to its output. It may be a coroutine function; plain
+    functions run in worker threads.
+    """
+    def __init__(self,
+                 planner: Planner,
+                 runner: Callable[..., Any],
+                 max_concurrent: int = 4,
+                 estimator: Optional[DurationEstimator] = None):
+        self.planner = planner
+        self.runner = runner
+        self.max_concurrent = max_concurrent
+        self.estimator = estimator or DurationEstimator()
+        self._async_runner = (inspect.iscoroutinefunction(runner)
+                              or inspect.iscoroutinefunction(getattr(runner, "__call__", None)))
+
+    @classmethod
+    def from_config(cls, planner: Planner, runner: Callable[..., Any], config: Dict[str, Any], **kwargs) -> "PlanExecutor":
+        return cls(planner, runner, max_concurrent=config.get("performance", {}).get("max_concurrent", 4), **kwargs)
+
+    def critical_path_ranks(self) -> Dict[str, float]:
+        """Estimated duration from each task to the end of the plan (upward rank)"""
+        graph = self.planner.task_graph
+        order = self.planner.topological_order()
+        ranks: Dict[str, float] = {}
+        for name in reversed(order):
+            tail = max((ranks[s] for s in graph.successors(name)), default=0.0)
+            ranks[name] = self.estimator.estimate(graph.nodes[name]) + tail
+        return ranks
+
+    def run(self) -> Dict[str, TaskResult]:
+        """Execute the plan to completion from synchronous code"""
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> Dict[str, TaskResult]:
+        graph = self.planner.task_graph
+        ranks = self.critical_path_ranks()
+        results: Dict[str, TaskResult] = {}
+
+        remaining = {name: graph.in_degree(name) for name in graph.nodes}
+        for name in graph.nodes:
+            if graph.nodes[name]["status"] == TaskStatus.COMPLETED:
+                results[name] = TaskResult(name, TaskStatus.COMPLETED, graph.nodes[name].get("output"))
+                for succ in graph.successors(name):
+                    remaining[succ] -= 1
+
+        ready: List = []
+        for seq, name in enumerate(graph.nodes):
+            if remaining[name] == 0 and name not in results:
+                heapq.heappush(ready, (-ranks[name], seq, name))
+
+        running: Dict[asyncio.Task, str] = {}
+        seq = len(graph)
+        while ready or running:
+            while ready and len(running) < self.max_concurrent:
+                _, _, name = heapq.heappop(ready)
+                await self._update(name, TaskStatus.IN_PROGRESS)
+                inputs = {p: results[p].output for p in graph.predecessors(name)}
+                running[asyncio.create_task(self._execute(name, inputs))] = name
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                result = results[name] = task.result()
+                await self._update(name, result.status, output=result.output, error=result.error,
+                                   started=result.started, finished=result.finished)
+                if result.status != TaskStatus.COMPLETED:
+                    await self._skip_descendants(name, results)
+                    continue
+                for succ in graph.successors(name):
+                    remaining[succ] -= 1
+                    if remaining[succ] == 0 and succ not in results:
+                        seq += 1
+                        heapq.heappush(ready, (-ranks[succ], seq, succ))
+        return results
+
+    async def _execute(self, name: str, inputs: Dict[str, Any]) -> TaskResult:
+        data = self.planner.task_graph.nodes[name]
+        started = time.time()
+        try:
+            if self._async_runner:
+                output = await self.runner(name, data, inputs)
+            else:
+                output = await asyncio.to_thread(self.runner, name, data, inputs)
+        except Exception as e:
+            return TaskResult(name, TaskStatus.FAILED, error=f"{type(e).__name__}: {e}",
+                              started=started, finished=time.time())
+        finished = time.time()
+        self.estimator.observe(data, finished - started)
+        return TaskResult(name, TaskStatus.COMPLETED, output, started=started, finished=finished)
+
+    async def _update(self, name: str, status: TaskStatus, **attrs):
+        # Checkpoint writes are blocking SQLite commits; keep them off the event loop
+        self.planner.update_task(name, status, record=False, **attrs)
+        if self.planner.checkpoint is not None:
+            await asyncio.to_thread(self.planner.record_task, name)
+
+    async def _skip_descendants(self, name: str, results: Dict[str, TaskResult]):
+        stack = list(self.planner.task_graph.successors(name))
+        while stack:
+            succ = stack.pop()
+            if succ in results:
+                continue
+            results[succ] = TaskResult(succ, TaskStatus.SKIPPED, error=f"dependency {name} did not complete")
+            await self._update(succ, TaskStatus.SKIPPED)
+            stack.extend(self.planner.task_graph.successors(succ))
@@ -1,12 +1,19 @@
-from typing import List, Dict, Any
+import json
+import uuid
+from typing import List, Dict, Any, Iterator, Optional
 from enum import Enum
-import networkx as nx
+import numpy as np
+from core.plan_cache import PlanCache
+from core.plan_checkpoint import PlanCheckpointStore
 
 class TaskStatus(Enum):
     PENDING = 0
     IN_PROGRESS = 1
     COMPLETED = 2
     FAILED = 3
+    SKIPPED = 4
+
+_OPEN_STATES = (TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
 
 class TaskNode:
     def __init__(self, 
@@ -18,13 +25,161 @@ class TaskNode:
         self.status = TaskStatus.PENDING
         self.expected_output = expected_output
 
+class ArrayTaskGraph:
+    """Static task DAG in CSR arrays, no networkx needed.
+
+    Exposes the subset of the ``networkx.DiGraph`` interface the planner and
+    executor use: ``nodes[name]`` attribute dicts, ``successors``,
+    ``predecessors``, ``in_degree`` and ``len``.
+    """
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._edges: List[tuple] = []
+        self._succ_offsets = np.zeros(1, dtype=np.int64)
+        self._succ = np.zeros(0, dtype=np.int32)
+        self._pred_offsets = np.zeros(1, dtype=np.int64)
+        self._pred = np.zeros(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def add_node(self, name: str, **attrs):
+        if name not in self.index:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+            self.nodes[name] = {}
+        self.nodes[name].update(attrs)
+
+    def add_edge(self, source: str, target: str):
+        self._edges.append((source, target))
+
+    def freeze(self):
+        """Build the CSR adjacency once all nodes and edges are added"""
+        n = len(self.names)
+        if self._edges:
+            src = np.fromiter((self.index[a] for a, _ in self._edges), dtype=np.int32, count=len(self._edges))
+            dst = np.fromiter((self.index[b] for _, b in self._edges), dtype=np.int32, count=len(self._edges))
+        else:
+            src = dst = np.zeros(0, dtype=np.int32)
+        order = np.argsort(src, kind="stable")
+        self._succ = dst[order]
+        self._succ_offsets = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=n))])
+        order = np.argsort(dst, kind="stable")
+        self._pred = src[order]
+        self._pred_offsets = np.concatenate([[0], np.cumsum(np.bincount(dst, minlength=n))])
+        self._edges = []
+
+    def successor_ids(self, i: int) -> np.ndarray:
+        return self._succ[self._succ_offsets[i]:self._succ_offsets[i + 1]]
+
+    def successors(self, name: str) -> Iterator[str]:
+        return (self.names[j] for j in self.successor_ids(self.index[name]))
+
+    def predecessors(self, name: str) -> Iterator[str]:
+        i = self.index[name]
+        return (self.names[j] for j in self._pred[self._pred_offsets[i]:self._pred_offsets[i + 1]])
+
+    def in_degree(self, name: str) -> int:
+        i = self.index[name]
+        return int(self._pred_offsets[i + 1] - self._pred_offsets[i])
+
+    def in_degrees(self) -> np.ndarray:
+        return np.diff(self._pred_offsets).astype(np.int32)
+
+
 class Planner:
-    def __init__(self, llm: Any):
+    """Decomposes goals into a task DAG and tracks which tasks are ready.
+
+    Readiness is maintained incrementally: each task keeps a count of
+    unfinished dependencies and ``update_task`` adjusts its successors'
+    counts, so ``get_next_tasks`` is proportional to the number of ready
+    tasks rather than the size of the plan. ``graph_backend="array"`` uses
+    ``ArrayTaskGraph`` instead of networkx for very large generated plans.
+    With a ``plan_cache``, goals matching a previously planned template are
+    instantiated from the cache instead of asking the LLM. With a
+    ``checkpoint`` store every task transition is persisted, and ``resume``
+    picks an interrupted plan back up on any worker.
+    """
+    def __init__(self,
+                 llm: Any,
+                 graph_backend: str = "networkx",
+                 plan_cache: Optional[PlanCache] = None,
+                 checkpoint: Optional[PlanCheckpointStore] = None,
+                 worker_id: Optional[str] = None):
         self.llm = llm
-        self.task_graph = nx.DiGraph()
+        self.graph_backend = graph_backend
+        self.plan_cache = plan_cache
+        self.checkpoint = checkpoint
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self.plan_id: Optional[str] = None
+        self.task_graph = self._new_graph()
+        self._remaining = np.zeros(0, dtype=np.int32)
+        self._completed = 0
+        # Tasks still pending or running; the plan is terminal once this reaches zero
+        self._open = 0
+        self._index: Dict[str, int] = {}
+        self._ready: Dict[str, None] = {}
+        self._order: List[str] = []
+
+    def _new_graph(self):
+        if self.graph_backend == "array":
+            return ArrayTaskGraph()
+        import networkx as nx
+        return nx.DiGraph()
+
+    @classmethod
+    def from_config(cls, llm: Any, config: Dict[str, Any], embedder: Any = None) -> "Planner":
+        cfg = config.get("planner", {})
+        return cls(
+            llm,
+            graph_backend=cfg.get("graph_backend", "networkx"),
+            plan_cache=PlanCache.from_config(config, embedder) if cfg.get("plan_cache_size", 1024) > 0 else None,
+            checkpoint=PlanCheckpointStore.from_config(config)
+        )
         
     def create_plan(self, goal: str) -> Dict[str, TaskNode]:
         """Decompose a high-level goal into actionable tasks"""
+        task_dict = self._decompose(goal)
+        self.plan_id = None
+        if self.checkpoint is not None:
+            self.plan_id = uuid.uuid4().hex
+            self.checkpoint.save_plan(self.plan_id, goal, task_dict, owner=self.worker_id)
+        return task_dict
+    
+    def resume(self, plan_id: str) -> Dict[str, Any]:
+        """Rebuild a checkpointed plan, keeping completed tasks and re-queueing the rest"""
+        if self.checkpoint is None:
+            raise ValueError("Planner has no checkpoint store to resume from")
+        if not self.checkpoint.claim(plan_id, self.worker_id):
+            raise ValueError(f"Plan {plan_id} is held by another worker")
+        _, task_dict, states = self.checkpoint.load(plan_id)
+        self.plan_id = None
+        self._build_graph(task_dict)
+        for name, state in states.items():
+            if state["status"] == TaskStatus.COMPLETED.value and name in self._index:
+                self.update_task(name, TaskStatus.COMPLETED, output=state["output"], error=state["error"],
+                                 started=state["started"], finished=state["finished"])
+        self.plan_id = plan_id
+        return task_dict
+    
+    def _decompose(self, goal: str) -> Dict[str, Any]:
+        if self.plan_cache is not None:
+            task_dict = self.plan_cache.lookup(goal)
+            if task_dict is not None:
+                try:
+                    self._build_graph(task_dict)
+                    return task_dict
+                except (ValueError, KeyError):
+                    self.plan_cache.invalidate(goal)
+        
         prompt = f"""Break down the following goal into specific tasks:
 Goal: {goal}
 
@@ -34,34 +189,132 @@ Output as JSON with tasks and dependencies:"""
         try:
             task_dict = json.loads(response)
             self._build_graph(task_dict)
-            return task_dict
-        except json.JSONDecodeError:
+        except (ValueError, KeyError, TypeError, AttributeError):
             return self._fallback_plan(goal)
+        if self.plan_cache is not None:
+            self.plan_cache.store(goal, task_dict)
+        return task_dict
+    
+    def _fallback_plan(self, goal: str) -> Dict[str, Any]:
+        """Single-task plan used when the LLM output is not a valid task graph"""
+        task_dict = {"goal": {"description": goal, "dependencies": []}}
+        self._build_graph(task_dict)
+        return task_dict
     
     def _build_graph(self, task_dict: Dict[str, Any]):
         """Convert task dictionary into graph structure"""
         self.task_graph.clear()
         
         for task_name, task_data in task_dict.items():
+            extra = {k: v for k, v in task_data.items() if k not in ('description', 'dependencies')}
             self.task_graph.add_node(task_name, 
                                    description=task_data['description'],
-                                   status=TaskStatus.PENDING)
+                                   status=TaskStatus.PENDING,
+                                   **extra)
             
+        for task_name, task_data in task_dict.items():
             for dep in task_data.get('dependencies', []):
+                if dep not in task_dict:
+                    raise ValueError(f"Task {task_name} depends on unknown task {dep}")
                 self.task_graph.add_edge(dep, task_name)
+        
+        if isinstance(self.task_graph, ArrayTaskGraph):
+            self.task_graph.freeze()
+        self._index_graph()
+    
+    def _index_graph(self):
+        """Topologically sort (rejecting cycles) and seed dependency counters"""
+        graph = self.task_graph
+        names = list(graph.nodes)
+        self._index = {name: i for i, name in enumerate(names)}
+        if isinstance(graph, ArrayTaskGraph):
+            indegree = graph.in_degrees()
+            successors = graph.successor_ids
+        else:
+            indegree = np.fromiter((graph.in_degree(n) for n in names), dtype=np.int32, count=len(names))
+            successors = lambda i: [self._index[s] for s in graph.successors(names[i])]
+        
+        # Kahn's algorithm: anything never reaching in-degree zero sits on a cycle
+        pending = indegree.copy()
+        order = [i for i in range(len(names)) if pending[i] == 0]
+        for i in order:
+            for j in successors(i):
+                pending[j] -= 1
+                if pending[j] == 0:
+                    order.append(j)
+        if len(order) < len(names):
+            cyclic = [names[i] for i in np.flatnonzero(pending > 0)[:10]]
+            raise ValueError(f"Plan has a dependency cycle involving: {', '.join(cyclic)}")
+        
+        self._order = [names[i] for i in order]
+        self._remaining = indegree.copy()
+        self._completed = 0
+        self._open = 0
+        self._ready = {}
+        for name in names:
+            status = graph.nodes[name]['status']
+            self._open += status in _OPEN_STATES
+            if status == TaskStatus.COMPLETED:
+                self._completed += 1
+                self._release(name, -1)
+        for name in names:
+            if self._remaining[self._index[name]] == 0 and graph.nodes[name]['status'] == TaskStatus.PENDING:
+                self._ready[name] = None
+    
+    def _successor_names(self, task_name: str):
+        return self.task_graph.successors(task_name)
+    
+    def _release(self, task_name: str, delta: int):
+        """Adjust successors' unfinished-dependency counts when a task (un)completes"""
+        nodes = self.task_graph.nodes
+        for succ in self._successor_names(task_name):
+            i = self._index[succ]
+            self._remaining[i] += delta
+            if self._remaining[i] == 0 and nodes[succ]['status'] == TaskStatus.PENDING:
+                self._ready[succ] = None
+            elif delta > 0:
+                self._ready.pop(succ, None)
+    
+    def topological_order(self) -> List[str]:
+        """Tasks ordered so every task follows its dependencies"""
+        return list(self._order)
     
     def get_next_tasks(self) -> List[str]:
         """Return tasks that are ready to execute (dependencies met)"""
-        ready_tasks = []
-        for node in self.task_graph.nodes():
-            if self.task_graph.nodes[node]['status'] == TaskStatus.PENDING:
-                predecessors = list(self.task_graph.predecessors(node))
-                if all(self.task_graph.nodes[p]['status'] == TaskStatus.COMPLETED 
-                       for p in predecessors):
-                    ready_tasks.append(node)
-        return ready_tasks
+        return list(self._ready)
     
-    def update_task(self, task_name: str, status: TaskStatus):
-        """Update the status of a task"""
-        if task_name in self.task_graph.nodes:
-            self.task_graph.nodes[task_name]['status'] = status
+    def update_task(self, task_name: str, status: TaskStatus, record: bool = True, **attrs):
+        """Update the status of a task (plus any result attributes such as output)
+
+        With record=False the checkpoint write is left to the caller (see record_task).
+        """
+        if task_name not in self._index:
+            return
+        node = self.task_graph.nodes[task_name]
+        previous = node['status']
+        node['status'] = status
+        node.update(attrs)
+        if status != previous:
+            self._open += (status in _OPEN_STATES) - (previous in _OPEN_STATES)
+            if status == TaskStatus.PENDING and self._remaining[self._index[task_name]] == 0:
+                self._ready[task_name] = None
+            elif status != TaskStatus.PENDING:
+                self._ready.pop(task_name, None)
+            if status == TaskStatus.COMPLETED:
+                self._completed += 1
+                self._release(task_name, -1)
+            elif previous == TaskStatus.COMPLETED:
+                self._completed -= 1
+                self._release(task_name, +1)
+        
+        if record:
+            self.record_task(task_name)
+
+    def record_task(self, task_name: str):
+        """Write a task's current state to the checkpoint store, if there is one"""
+        if self.checkpoint is None or self.plan_id is None:
+            return
+        node = self.task_graph.nodes[task_name]
+        self.checkpoint.record(self.plan_id, task_name, node['status'].value, output=node.get('output'),
+                               error=node.get('error'), started=node.get('started'),
+                               finished=node.get('finished'), done=self._open == 0)
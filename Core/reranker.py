@@ -0,0 +1,140 @@
+import time
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+
+@dataclass
+class SearchReport:
+    """Per-stage timings (ms) and candidate counts for one search"""
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    candidates: int = 0
+    reranked: int = 0
+    budget_ms: Optional[float] = None
+    truncated: bool = False
+    cache_hit: bool = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ColBERTScorer:
+    """Late-interaction MaxSim scoring with a ColBERT checkpoint"""
+    def __init__(self, checkpoint: Any):
+        self.checkpoint = checkpoint
+
+    def score(self, query: str, texts: List[str], batch_size: int) -> np.ndarray:
+        import torch
+        with torch.no_grad():
+            Q = self.checkpoint.queryFromText([query])
+            D = self.checkpoint.docFromText(texts, bsize=batch_size, keep_dims=True)
+            if isinstance(D, tuple):
+                D = D[0]
+            # (1, Lq, d) x (N, d, Ld) -> (N, Lq, Ld); padded doc tokens are zero vectors
+            sim = torch.matmul(Q.to(D.dtype), D.transpose(1, 2))
+            return sim.max(dim=2).values.sum(dim=1).float().cpu().numpy()
+
+
+class CrossEncoderScorer:
+    """Pairwise relevance from a sentence-transformers style CrossEncoder"""
+    def __init__(self, model: Any):
+        self.model = model
+
+    def score(self, query: str, texts: List[str], batch_size: int) -> np.ndarray:
+        pairs = [(query, text) for text in texts]
+        return np.asarray(self.model.predict(pairs, batch_size=batch_size), dtype=np.float32)
+
+
+class CascadeReranker:
+    """Second-stage reranker that adapts its depth to a latency budget.
+
+    The per-document scoring cost is tracked as an EWMA; before each
+    request the number of candidates is shrunk so the expected rerank time
+    fits what is left of ``budget_ms``. Scoring runs in batches and stops
+    early if the deadline is hit, leaving the remaining candidates in
+    first-stage order after the reranked ones. When the estimate says
+    nothing fits but some budget remains, ``probe_size`` candidates are
+    still scored so a transient slowdown cannot switch reranking off for good.
+    """
+    def __init__(self,
+                 scorer: Any,
+                 max_candidates: int = 50,
+                 budget_ms: float = 50.0,
+                 batch_size: int = 16,
+                 smoothing: float = 0.2,
+                 probe_size: int = 1):
+        self.scorer = scorer
+        self.max_candidates = max_candidates
+        self.budget_ms = budget_ms
+        self.batch_size = batch_size
+        self.smoothing = smoothing
+        self.probe_size = probe_size
+        self._ms_per_doc: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, scorer: Any, config: Dict[str, Any]) -> "CascadeReranker":
+        cfg = config.get("retriever", {})
+        return cls(
+            scorer,
+            max_candidates=cfg.get("rerank_candidates", 50),
+            budget_ms=cfg.get("rerank_budget_ms", 50.0),
+            batch_size=cfg.get("rerank_batch_size", 16)
+        )
+
+    def plan_depth(self, available: int, remaining_ms: float) -> int:
+        """How many candidates can be reranked in remaining_ms"""
+        depth = min(available, self.max_candidates)
+        if remaining_ms <= 0:
+            return 0
+        if self._ms_per_doc:
+            # Keep observing even when the estimate rules reranking out, so it can recover
+            depth = min(depth, max(int(remaining_ms / self._ms_per_doc), self.probe_size))
+        return max(depth, 0)
+
+    def _observe(self, docs: int, elapsed_ms: float):
+        if not docs:
+            return
+        cost = elapsed_ms / docs
+        with self._lock:
+            if self._ms_per_doc is None:
+                self._ms_per_doc = cost
+            else:
+                self._ms_per_doc += self.smoothing * (cost - self._ms_per_doc)
+
+    def rerank(self,
+               query: str,
+               results: List[Dict[str, Any]],
+               k: Optional[int] = None,
+               elapsed_ms: float = 0.0,
+               report: Optional[SearchReport] = None) -> List[Dict[str, Any]]:
+        """Rerank first-stage results (dicts with text/score) within the remaining budget"""
+        report = report if report is not None else SearchReport()
+        report.budget_ms = self.budget_ms
+        report.candidates = len(results)
+        k = k or len(results)
+
+        start = time.perf_counter()
+        deadline = start + max(self.budget_ms - elapsed_ms, 0.0) / 1000
+        depth = self.plan_depth(len(results), (deadline - start) * 1000)
+
+        scores: List[float] = []
+        for offset in range(0, depth, self.batch_size):
+            if offset and time.perf_counter() >= deadline:
+                break
+            batch = results[offset:min(offset + self.batch_size, depth)]
+            batch_start = time.perf_counter()
+            scores.extend(self.scorer.score(query, [r["text"] for r in batch], len(batch)).tolist())
+            self._observe(len(batch), (time.perf_counter() - batch_start) * 1000)
+
+        reranked = []
+        for r, s in zip(results, scores):
+            components = dict(r.get("components", {}), first_stage=r["score"], rerank=s)
+            reranked.append(dict(r, score=s, components=components))
+        reranked.sort(key=lambda r: -r["score"])
+
+        report.reranked = len(scores)
+        report.truncated = len(scores) < min(len(results), self.max_candidates)
+        report.timings_ms["rerank"] = (time.perf_counter() - start) * 1000
+        return (reranked + results[len(scores):])[:k]
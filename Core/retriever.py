@@ -1,21 +1,94 @@
+import copy
+import inspect
+import threading
+import time
 import torch
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import Any, Iterable, List, Dict, Optional, Tuple
+from pyroaring import BitMap
 from colbert import Indexer, Searcher
 from colbert.infra import Run, RunConfig
+from core.optimization.result_cache import ResultCache, normalize_query, canonical_filters
+from core.metadata_index import MetadataIndex
+from core.reranker import CascadeReranker, ColBERTScorer, SearchReport
+from core.colbert_engine import PlaidColBERT
+
+# Backends without native filter support are over-fetched by this factor and post-filtered
+FILTER_OVERFETCH = 4
 
 class HybridRetriever:
     def __init__(self,
                  colbert_config: Dict[str, Any],
                  dense_retriever: Optional[Any] = None,
-                 sparse_retriever: Optional[Any] = None):
+                 sparse_retriever: Optional[Any] = None,
+                 result_cache_size: int = 4096,
+                 range_fields: Iterable[str] = (),
+                 reranker: Optional[CascadeReranker] = None,
+                 colbert_searcher: Optional[Any] = None):
         self.colbert_config = colbert_config
         self.dense_retriever = dense_retriever
         self.sparse_retriever = sparse_retriever
-        self._init_colbert()
+        self.reranker = reranker
+        # Doc ids are collection positions shared by every backend
+        self.metadata_index = MetadataIndex(range_fields=range_fields)
+        self._next_doc_id = 0
+        self._id_lock = threading.Lock()
+        # Bumped by every index mutation; cached results from older generations are stale
+        self.generation = 0
+        self._generation_lock = threading.Lock()
+        self.result_cache = ResultCache(max_entries=result_cache_size)
+        if colbert_searcher is not None:
+            # Pre-built engine (e.g. PlaidColBERT) serving as indexer and searcher
+            self.indexer = self.searcher = colbert_searcher
+        else:
+            self._init_colbert()
+        self._sync_with_index()
+    
+    @classmethod
+    def from_config(cls,
+                    config: Dict[str, Any],
+                    dense_retriever: Optional[Any] = None,
+                    sparse_retriever: Optional[Any] = None,
+                    scorer: Optional[Any] = None,
+                    colbert_searcher: Optional[Any] = None) -> "HybridRetriever":
+        """Build the retriever, and the rerank cascade when ``rerank_enabled`` is set"""
+        cfg = config.get("retriever", {})
+        retriever = cls(
+            cfg.get("colbert", {}),
+            dense_retriever=dense_retriever,
+            sparse_retriever=sparse_retriever,
+            result_cache_size=cfg.get("result_cache_size", 4096),
+            range_fields=cfg.get("range_fields", ()),
+            colbert_searcher=colbert_searcher
+        )
+        if cfg.get("rerank_enabled"):
+            retriever.reranker = CascadeReranker.from_config(scorer or retriever._default_scorer(), config)
+        return retriever
+    
+    def _default_scorer(self) -> ColBERTScorer:
+        """Late-interaction scorer over the first-stage checkpoint, loaded once"""
+        encoder = getattr(self.indexer, "encoder", None)
+        if encoder is None:
+            from colbert.modeling.checkpoint import Checkpoint
+            encoder = Checkpoint(self.colbert_config["checkpoint"])
+        return ColBERTScorer(encoder)
+        
+    def _sync_with_index(self):
+        """Pick up passages a pre-built or reloaded engine already holds"""
+        existing = getattr(self.indexer, "metadata", None)
+        if not existing:
+            return
+        self._next_doc_id = len(existing)
+        self.metadata_index.add_many(range(len(existing)), existing)
         
     def _init_colbert(self):
         """Initialize ColBERT components"""
+        if self.colbert_config.get("engine") == "plaid":
+            # Built-in CPU engine; one object serves as both indexer and searcher
+            from colbert.modeling.checkpoint import Checkpoint
+            encoder = Checkpoint(self.colbert_config["checkpoint"])
+            self.indexer = self.searcher = PlaidColBERT.from_config(self.colbert_config, encoder=encoder)
+            return
         with Run().context(RunConfig(nranks=1, experiment="hybrid_retriever")):
             self.indexer = Indexer(
                 checkpoint=self.colbert_config["checkpoint"],
@@ -26,49 +99,183 @@ class HybridRetriever:
                 checkpoint=self.colbert_config["checkpoint"]
             )
     
-    def add_documents(self, documents: List[str], metadata: List[Dict] = None):
+    def add_documents(self,
+                      documents: List[str],
+                      metadata: List[Dict] = None,
+                      embeddings: Optional[np.ndarray] = None):
         """Add documents to all available retrievers"""
-        metadata = metadata or [{}] * len(documents)
+        with self._id_lock:
+            start = self._next_doc_id
+            self._next_doc_id += len(documents)
+        metadata = [
+            dict(meta or {}, doc_id=start + i)
+            for i, meta in enumerate(metadata or [{}] * len(documents))
+        ]
         
         # Add to ColBERT
         with Run().context(RunConfig(nranks=1)):
             self.indexer.index(
-                name=self.colbert_config["index_name"],
+                name=self.colbert_config.get("index_name"),
                 collection=documents,
                 metadata=metadata
             )
         
         # Add to dense retriever if available
         if self.dense_retriever:
-            self.dense_retriever.add_documents(documents, metadata)
+            if embeddings is not None and "embeddings" in inspect.signature(self.dense_retriever.add_documents).parameters:
+                self.dense_retriever.add_documents(documents, metadata, embeddings=embeddings)
+            else:
+                self.dense_retriever.add_documents(documents, metadata)
             
         # Add to sparse retriever if available
         if self.sparse_retriever:
             self.sparse_retriever.add_documents(documents, metadata)
+        
+        self.metadata_index.add_many(range(start, start + len(documents)), metadata)
+        self._bump_generation()
+    
+    def _bump_generation(self):
+        """Invalidate every cached result computed against the previous index state"""
+        with self._generation_lock:
+            self.generation += 1
+    
+    def cache_stats(self) -> Dict[str, float]:
+        """Hit-rate metrics for the query-result cache"""
+        stats = self.result_cache.stats.as_dict()
+        stats["entries"] = len(self.result_cache)
+        stats["generation"] = self.generation
+        return stats
     
     def search(self, 
               query: str, 
               k: int = 5,
-              hybrid_weights: Tuple[float, float, float] = (0.4, 0.3, 0.3)) -> List[Tuple[str, Dict]]:
-        """Hybrid search combining ColBERT, dense, and sparse results"""
-        results = []
+              hybrid_weights: Tuple[float, float, float] = (0.4, 0.3, 0.3),
+              filters: Optional[Dict[str, Any]] = None,
+              return_report: bool = False):
+        """Hybrid search combining ColBERT, dense, and sparse results
+        
+        With return_report=True a (results, SearchReport) pair is returned
+        carrying per-stage timings and rerank depth.
+        """
+        start = time.perf_counter()
+        computed = []
+        
+        def compute():
+            computed.append(True)
+            return self._filtered_search(query, k, hybrid_weights, filters)
+        
+        # Normalization only decides which queries share an entry; backends get the caller's text
+        key = (normalize_query(query), k, tuple(hybrid_weights), canonical_filters(filters))
+        results, report = self.result_cache.get_or_compute(key, self.generation, compute)
+        # Cached results are shared between callers; hand out a private copy
+        results = copy.deepcopy(results)
+        if not return_report:
+            return results
+        if not computed:
+            report = SearchReport(
+                timings_ms={"cache": (time.perf_counter() - start) * 1000},
+                candidates=report.candidates,
+                reranked=report.reranked,
+                budget_ms=report.budget_ms,
+                cache_hit=True
+            )
+        return results, report
+    
+    def _filtered_search(self,
+                         query: str,
+                         k: int,
+                         hybrid_weights: Tuple[float, float, float],
+                         filters: Optional[Dict[str, Any]]) -> Tuple[List[Tuple[str, Dict]], SearchReport]:
+        """Resolve filters to a doc-id bitmap before touching any backend"""
+        report = SearchReport()
+        start = time.perf_counter()
+        allowed = self.metadata_index.evaluate(filters)
+        report.timings_ms["filter"] = (time.perf_counter() - start) * 1000
+        if allowed is not None and not allowed:
+            return [], report
+        
+        if not self.reranker:
+            stage_start = time.perf_counter()
+            results = self._search_backends(query, k, hybrid_weights, allowed)
+            report.timings_ms["first_stage"] = (time.perf_counter() - stage_start) * 1000
+            report.candidates = len(results)
+            return results, report
+        
+        # Cascade: fuse a deeper candidate list, then rerank it down to k
+        stage_start = time.perf_counter()
+        depth = max(k, self.reranker.max_candidates)
+        candidates = self._search_backends(query, depth, hybrid_weights, allowed)
+        report.timings_ms["first_stage"] = (time.perf_counter() - stage_start) * 1000
+        
+        reranked = self._rerank_results(
+            query,
+            [item for _, item in candidates],
+            k=k,
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+            report=report
+        )
+        return [(item["text"], item) for item in reranked], report
+    
+    def _rerank_results(self,
+                        query: str,
+                        results: List[Dict[str, Any]],
+                        k: Optional[int] = None,
+                        elapsed_ms: float = 0.0,
+                        report: Optional[SearchReport] = None) -> List[Dict[str, Any]]:
+        """Rerank fused results within the remaining latency budget"""
+        if not self.reranker:
+            return sorted(results, key=lambda r: -r["score"])[:k]
+        return self.reranker.rerank(query, results, k=k, elapsed_ms=elapsed_ms, report=report)
+    
+    def _backend_search(self,
+                        retriever: Any,
+                        query: str,
+                        k: int,
+                        allowed: Optional[BitMap]) -> List[Tuple[str, Dict]]:
+        """Search one backend, pushing the filter bitmap down when it is supported"""
+        if allowed is None:
+            return retriever.search(query, k=k)
+        if "allowed_ids" in inspect.signature(retriever.search).parameters:
+            return retriever.search(query, k=k, allowed_ids=allowed)
+        
+        # Fallback for backends without pre-filtering: over-fetch in proportion to
+        # the filter's selectivity, doubling until k matches survive or the
+        # backend has nothing more to return
+        corpus = max(self._next_doc_id, len(allowed))
+        fetch = min(k * FILTER_OVERFETCH * -(-corpus // len(allowed)), corpus)
+        while True:
+            results = retriever.search(query, k=fetch)
+            matches = [r for r in results if r[1].get("doc_id") in allowed]
+            if len(matches) >= k or len(results) < fetch or fetch >= corpus:
+                return matches[:k]
+            fetch = min(fetch * 2, corpus)
+    
+    def _search_backends(self,
+                         query: str,
+                         k: int,
+                         hybrid_weights: Tuple[float, float, float],
+                         allowed: Optional[BitMap] = None) -> List[Tuple[str, Dict]]:
+        """Run all backends and fuse their normalized scores"""
         
-        # Get ColBERT results
-        colbert_results = self.searcher.search(query, k=k)
+        # Get ColBERT results, restricted to the filtered passage ids
+        if allowed is None:
+            colbert_results = self.searcher.search(query, k=k)
+        else:
+            colbert_results = self.searcher.search(query, k=k, pids=list(allowed))
         colbert_scores = [r.score for r in colbert_results]
         colbert_max = max(colbert_scores) if colbert_scores else 1.0
         
         # Get dense results if available
         dense_results = []
         if self.dense_retriever:
-            dense_results = self.dense_retriever.search(query, k=k)
+            dense_results = self._backend_search(self.dense_retriever, query, k, allowed)
             dense_scores = [r[1]["score"] for r in dense_results]
             dense_max = max(dense_scores) if dense_scores else 1.0
         
         # Get sparse results if available
         sparse_results = []
         if self.sparse_retriever:
-            sparse_results = self.sparse_retriever.search(query, k=k)
+            sparse_results = self._backend_search(self.sparse_retriever, query, k, allowed)
             sparse_scores = [r[1]["score"] for r in sparse_results]
             sparse_max = max(sparse_scores) if sparse_scores else 1.0
         
@@ -0,0 +1,227 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from core.embedding import content_key, embedding_service
+from core.memory import AgentMemory
+from core.memory_journal import MemoryJournal
+from core.summarization import EpisodicCompactor
+
+
+@dataclass
+class SessionStats:
+    page_ins: int = 0
+    spills: int = 0
+    created: int = 0
+    idle_evictions: int = 0
+    budget_evictions: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class SessionMemoryManager:
+    """One AgentMemory per session under a global RAM budget.
+
+    Sessions are kept in LRU order. Those idle for longer than
+    ``idle_timeout`` seconds, or the least recently used ones once the
+    resident footprint exceeds ``memory_budget_mb``, are snapshotted to
+    their own journal directory and dropped from RAM. The next ``get`` for
+    that session maps the snapshot back in. A session's footprint is
+    refreshed when it is fetched and again when the next session is.
+    Sessions held through ``session()`` are pinned and never spilled, so a
+    caller can keep using its AgentMemory across awaits. A spilled shard is
+    written out after the manager's lock is released; fetching it again
+    waits for that write to finish.
+    """
+    def __init__(self,
+                 spill_path: str,
+                 memory_factory: Optional[Callable[[MemoryJournal], AgentMemory]] = None,
+                 memory_budget_mb: float = 512.0,
+                 idle_timeout: float = 900.0,
+                 snapshot_every: int = 1000):
+        self.spill_path = Path(spill_path)
+        self.spill_path.mkdir(parents=True, exist_ok=True)
+        self.memory_factory = memory_factory or (lambda journal: AgentMemory(journal=journal))
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.idle_timeout = idle_timeout
+        self.snapshot_every = snapshot_every
+        self.stats = SessionStats()
+        self._sessions: "OrderedDict[str, AgentMemory]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self._pins: Dict[str, int] = {}
+        self._spilling: Dict[str, threading.Event] = {}
+        self._resident_bytes = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls,
+                    config: Dict[str, Any],
+                    embedder: Any = None,
+                    long_term_retriever: Any = None,
+                    summarizer: Any = None):
+        cfg = config.get("memory", {}).get("sessions", {})
+        memory_config = config.get("memory", {})
+        embedder = embedding_service(embedder, config)
+
+        def factory(journal: MemoryJournal) -> AgentMemory:
+            return AgentMemory(
+                short_term_capacity=memory_config.get("short_term_capacity", 20),
+                long_term_retriever=long_term_retriever,
+                embedder=embedder,
+                score_weights=tuple(memory_config.get("score_weights", (0.6, 0.2, 0.2))),
+                recency_half_life=memory_config.get("recency_half_life", 3600.0),
+                journal=journal,
+                # Per session: a compactor runs one fold at a time for the memory it serves
+                compactor=EpisodicCompactor.from_config(summarizer, config) if summarizer else None
+            )
+
+        return cls(
+            cfg.get("spill_path", "data/sessions"),
+            memory_factory=factory,
+            memory_budget_mb=cfg.get("memory_budget_mb", 512.0),
+            idle_timeout=cfg.get("idle_timeout", 900.0),
+            snapshot_every=memory_config.get("persistence", {}).get("snapshot_every", 1000)
+        )
+
+    def _session_dir(self, session_id: str) -> Path:
+        # Hashed so arbitrary client ids can't escape the spill directory
+        return self.spill_path / content_key(session_id).hex()
+
+    def get(self, session_id: str) -> AgentMemory:
+        """The session's memory, paged in from disk or created on first use"""
+        return self._checkout(session_id, pin=False)
+
+    def _checkout(self, session_id: str, pin: bool) -> AgentMemory:
+        while True:
+            with self._lock:
+                writing = self._spilling.get(session_id)
+                if writing is None:
+                    memory, spilled = self._get(session_id)
+                    if pin:
+                        self._pins[session_id] = self._pins.get(session_id, 0) + 1
+                    break
+            # Its snapshot is still being written; page it in once that is done
+            writing.wait()
+        self._write_out(spilled)
+        return memory
+
+    def _get(self, session_id: str) -> Tuple[AgentMemory, List[Tuple[str, AgentMemory]]]:
+        now = time.monotonic()
+        # The previous caller has finished its turn, so its size is now current
+        if self._sessions:
+            self._refresh_size(next(reversed(self._sessions)))
+        memory = self._sessions.get(session_id)
+        if memory is None:
+            directory = self._session_dir(session_id)
+            if directory.exists():
+                self.stats.page_ins += 1
+            else:
+                self.stats.created += 1
+            memory = self.memory_factory(MemoryJournal(str(directory), snapshot_every=self.snapshot_every))
+            self._sessions[session_id] = memory
+        self._sessions.move_to_end(session_id)
+        self._last_used[session_id] = now
+        self._refresh_size(session_id)
+
+        spilled = self._evict_idle(now)
+        spilled += self._enforce_budget(keep=session_id)
+        return memory, spilled
+
+    @contextmanager
+    def session(self, session_id: str):
+        """The session's memory, pinned in RAM until the block exits"""
+        memory = self._checkout(session_id, pin=True)
+        try:
+            yield memory
+        finally:
+            with self._lock:
+                self._pins[session_id] -= 1
+                if not self._pins[session_id]:
+                    del self._pins[session_id]
+                self._sessions.move_to_end(session_id)
+                self._last_used[session_id] = time.monotonic()
+
+    def _refresh_size(self, session_id: str):
+        memory = self._sessions[session_id]
+        size = memory.short_term.nbytes() + memory.episodic.nbytes()
+        self._resident_bytes += size - self._sizes.get(session_id, 0)
+        self._sizes[session_id] = size
+
+    def _evict_idle(self, now: float) -> List[Tuple[str, AgentMemory]]:
+        spilled = []
+        for session_id in list(self._sessions):
+            if now - self._last_used[session_id] < self.idle_timeout:
+                break
+            if session_id not in self._pins:
+                spilled.append(self._spill(session_id))
+                self.stats.idle_evictions += 1
+        return spilled
+
+    def _enforce_budget(self, keep: Optional[str] = None) -> List[Tuple[str, AgentMemory]]:
+        spilled = []
+        for session_id in list(self._sessions):
+            if self._resident_bytes <= self.memory_budget:
+                break
+            if session_id != keep and session_id not in self._pins:
+                spilled.append(self._spill(session_id))
+                self.stats.budget_evictions += 1
+        return spilled
+
+    def _spill(self, session_id: str) -> Tuple[str, AgentMemory]:
+        # Only the bookkeeping happens under the lock; _write_out does the disk work
+        memory = self._sessions.pop(session_id)
+        self._spilling[session_id] = threading.Event()
+        self._resident_bytes -= self._sizes.pop(session_id, 0)
+        del self._last_used[session_id]
+        self.stats.spills += 1
+        return session_id, memory
+
+    def _write_out(self, spilled: List[Tuple[str, AgentMemory]]):
+        for session_id, memory in spilled:
+            try:
+                # Let an in-flight summary fold land in the journal before it is snapshotted
+                if memory.compactor:
+                    memory.compactor.close()
+                # Snapshot + close only the journal: consolidators may be shared between sessions
+                memory.close_journal()
+            finally:
+                with self._lock:
+                    self._spilling.pop(session_id).set()
+
+    def evict_idle(self) -> int:
+        """Spill every session idle past the timeout; returns how many were spilled"""
+        with self._lock:
+            spilled = self._evict_idle(time.monotonic())
+        self._write_out(spilled)
+        return len(spilled)
+
+    def spill(self, session_id: str):
+        """Page a session out now, e.g. when its client disconnects; pinned sessions stay"""
+        spilled = []
+        with self._lock:
+            if session_id in self._sessions and session_id not in self._pins:
+                spilled.append(self._spill(session_id))
+        self._write_out(spilled)
+
+    def footprint(self) -> Dict[str, Any]:
+        """Resident bytes per session plus totals"""
+        with self._lock:
+            for session_id in self._sessions:
+                self._refresh_size(session_id)
+            return {
+                "sessions": dict(self._sizes),
+                "resident_sessions": len(self._sessions),
+                "resident_bytes": self._resident_bytes,
+                "budget_bytes": self.memory_budget
+            }
+
+    def close(self):
+        """Spill every resident session"""
+        with self._lock:
+            spilled = [self._spill(session_id) for session_id in list(self._sessions)]
+        self._write_out(spilled)
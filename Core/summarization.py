@@ -0,0 +1,87 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class LLMSummarizer:
+    """Folds new turns into a running summary with one bounded LLM call"""
+    def __init__(self, llm: Any, max_tokens: int = 256, temperature: float = 0.2):
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+
+    def __call__(self, summary: str, turns: List[str]) -> str:
+        prompt = (
+            "Update the conversation summary with the new turns. Keep facts, decisions "
+            "and open questions; drop small talk.\n\n"
+            f"Current summary:\n{summary or '(empty)'}\n\n"
+            "New turns:\n" + "\n".join(turns) + "\n\nUpdated summary:"
+        )
+        return self.llm.generate(prompt, max_tokens=self.max_tokens, temperature=self.temperature).strip()
+
+
+class EpisodicCompactor:
+    """Schedules rolling summarization of the oldest episodic turns.
+
+    Once more than ``buffer_size`` turns are held, the overflow (at least
+    ``fold_batch`` turns, oldest first) is folded into the running summary
+    on a single background worker. Each call only sees the previous
+    summary and the turns being folded, never the full history, so both
+    the cost per fold and the resulting context stay constant.
+    """
+    def __init__(self,
+                 summarizer: Callable[[str, List[str]], str],
+                 buffer_size: int = 5,
+                 fold_batch: int = 2,
+                 background: bool = True):
+        self.summarizer = summarizer
+        self.buffer_size = buffer_size
+        self.fold_batch = fold_batch
+        self.background = background
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="episodic-compactor") if background else None
+        self._running: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, summarizer: Callable[[str, List[str]], str], config: Dict[str, Any]) -> "EpisodicCompactor":
+        cfg = config.get("memory", {})
+        return cls(
+            summarizer,
+            buffer_size=cfg.get("episodic_buffer_size", 5),
+            fold_batch=cfg.get("episodic_fold_batch", 2)
+        )
+
+    def overflow(self, turns: int) -> int:
+        """How many of the oldest turns are due to be folded"""
+        excess = turns - self.buffer_size
+        return excess if excess >= self.fold_batch else 0
+
+    def fold(self, summary: str, turns: List[Any]) -> str:
+        return self.summarizer(summary, [self._render(t) for t in turns])
+
+    @staticmethod
+    def _render(turn: Any) -> str:
+        role = turn.metadata.get("role")
+        return f"{role}: {turn.content}" if role else turn.content
+
+    def submit(self, job: Callable[[], None]):
+        """Run job on the worker unless one is already in flight (it re-checks before exiting)"""
+        if not self.background:
+            job()
+            return
+        with self._lock:
+            if self._running is not None and not self._running.done():
+                return
+            self._running = self._executor.submit(job)
+
+    def flush(self):
+        """Wait for the in-flight fold, re-raising its error"""
+        with self._lock:
+            running = self._running
+        if running is not None:
+            running.result()
+
+    def close(self):
+        if self._executor is not None:
+            self.flush()
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,110 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from core.optimization.result_cache import AsyncSingleFlight, CacheStats, canonical_filters
+
+
+class ToolResultCache:
+    """TTL cache of tool results keyed on tool name and canonical arguments.
+
+    The TTL for a call comes from the tool itself: a ``cache_policy``
+    callable that maps arguments to seconds (so e.g. a ``freshness="day"``
+    search expires sooner than a yearly one), else ``schema.cache_ttl``,
+    else ``default_ttl``. A TTL of 0 or None opts the call out, and the
+    default is None: only tools that declare a TTL are cached. Keys are
+    built from the validated arguments (defaults filled in, values coerced)
+    so equivalent calls share an entry. Concurrent identical calls share one
+    execution; only successful results are kept, and every caller gets its
+    own copy.
+    """
+    def __init__(self, max_entries: int = 4096, default_ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = AsyncSingleFlight()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["ToolResultCache"]:
+        cfg = config.get("tools", {})
+        if cfg.get("result_cache_size", 4096) <= 0:
+            return None
+        return cls(max_entries=cfg.get("result_cache_size", 4096), default_ttl=cfg.get("result_cache_ttl"))
+
+    @staticmethod
+    def key(name: str, arguments: Dict[str, Any]) -> Hashable:
+        return name, canonical_filters(arguments)
+
+    def ttl_for(self, tool: Any, arguments: Dict[str, Any]) -> Optional[float]:
+        policy = getattr(tool, "cache_policy", None)
+        if policy is not None:
+            return policy(arguments)
+        schema = getattr(tool, "schema", None)
+        ttl = getattr(schema, "cache_ttl", None)
+        return self.default_ttl if ttl is None else ttl
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.stats.stale += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return True, entry[1]
+
+    def put(self, key: Hashable, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    async def get_or_call(self,
+                          name: str,
+                          tool: Any,
+                          arguments: Dict[str, Any],
+                          call: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a fresh cached result or run call once across concurrent identical calls"""
+        if hasattr(tool, "prepare_arguments"):
+            arguments = tool.prepare_arguments(arguments)
+        ttl = self.ttl_for(tool, arguments)
+        if not ttl or self.max_entries <= 0:
+            return await call()
+        key = self.key(name, arguments)
+        found, value = self.get(key)
+        if found:
+            return copy.deepcopy(value)
+
+        async def _fill():
+            result = await call()
+            self.put(key, result, ttl)
+            return result
+
+        value, shared = await self._flight.do(key, _fill)
+        with self._lock:
+            if shared:
+                self.stats.coalesced += 1
+            else:
+                self.stats.misses += 1
+        # The cached object is shared with every later hit; hand out a private copy
+        return copy.deepcopy(value)
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drop cached results for one tool, or all of them"""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == name]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,122 @@
+import asyncio
+import functools
+import inspect
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+from core.event_loop import run_sync
+from core.tool_cache import ToolResultCache
+
+
+@dataclass
+class ToolCallResult:
+    name: str
+    output: Any = None
+    error: Optional[str] = None
+    started: float = 0.0
+    finished: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+def parse_call(call: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """(name, kwargs) from an LLM function call whose arguments may be a JSON string"""
+    arguments = call.get("arguments") or {}
+    if isinstance(arguments, str):
+        arguments = json.loads(arguments) if arguments.strip() else {}
+    if not isinstance(arguments, dict):
+        raise ValueError(f"Arguments for {call.get('name')} must be an object")
+    return call["name"], arguments
+
+
+class ToolExecutor:
+    """Runs tool calls with native async support, a bounded thread pool and timeouts.
+
+    Coroutine tools are awaited on the event loop; plain functions run on a
+    pool of ``max_workers`` threads so they never block it. All calls from
+    one LLM turn run concurrently, so a multi-tool turn takes as long as its
+    slowest tool. Each call is bounded by ``timeout`` and cancelled when it
+    expires (a sync tool's thread cannot be interrupted, but its result is
+    discarded and the turn no longer waits for it). Failures are reported
+    per call in ``ToolCallResult.error`` rather than failing the turn.
+
+    ``tools`` is a mapping of name to tool, or any registry with a
+    ``get_tool(name)`` method. A tool is either a ``Tool`` (validated, then
+    its ``function`` is called) or a plain callable. With a ``cache``,
+    repeated identical calls are served from ``ToolResultCache``.
+    """
+    def __init__(self,
+                 tools: Any,
+                 timeout: Optional[float] = 30.0,
+                 max_workers: int = 8,
+                 cache: Optional[ToolResultCache] = None):
+        self.tools = tools
+        self.timeout = timeout
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+    @classmethod
+    def from_config(cls, tools: Any, config: Dict[str, Any]) -> "ToolExecutor":
+        cfg = config.get("tools", {})
+        return cls(tools, timeout=cfg.get("tool_timeout", 30.0), max_workers=cfg.get("max_workers", 8),
+                   cache=ToolResultCache.from_config(config))
+
+    def _resolve(self, name: str) -> Any:
+        if isinstance(self.tools, Mapping):
+            if name not in self.tools:
+                raise ValueError(f"Tool {name} not found")
+            return self.tools[name]
+        return self.tools.get_tool(name)
+
+    async def _invoke(self, tool: Any, kwargs: Dict[str, Any]) -> Any:
+        if hasattr(tool, "function"):
+            if hasattr(tool, "prepare_arguments"):
+                kwargs = tool.prepare_arguments(kwargs)
+            fn = tool.function
+        else:
+            fn = tool
+        if inspect.iscoroutinefunction(fn) or inspect.iscoroutinefunction(getattr(fn, "__call__", None)):
+            return await fn(**kwargs)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._pool, functools.partial(fn, **kwargs))
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def call(self, name: str, arguments: Union[str, Dict[str, Any], None] = None) -> ToolCallResult:
+        """Execute one tool call under the timeout"""
+        started = time.time()
+        try:
+            name, kwargs = parse_call({"name": name, "arguments": arguments})
+            tool = self._resolve(name)
+            if self.cache is not None:
+                pending = self.cache.get_or_call(name, tool, kwargs, lambda: self._invoke(tool, kwargs))
+            else:
+                pending = self._invoke(tool, kwargs)
+            output = await asyncio.wait_for(pending, self.timeout)
+        except asyncio.TimeoutError:
+            return ToolCallResult(name, error=f"TimeoutError: {name} exceeded {self.timeout}s",
+                                  started=started, finished=time.time())
+        except Exception as e:
+            return ToolCallResult(name, error=f"{type(e).__name__}: {e}", started=started, finished=time.time())
+        return ToolCallResult(name, output, started=started, finished=time.time())
+
+    async def call_many(self, calls: List[Dict[str, Any]]) -> List[ToolCallResult]:
+        """Execute a turn's function calls concurrently, results in call order"""
+        return list(await asyncio.gather(*(self.call(c.get("name"), c.get("arguments")) for c in calls)))
+
+    def run(self, calls: List[Dict[str, Any]]) -> List[ToolCallResult]:
+        """Execute a turn's function calls from synchronous code"""
+        # On the shared background loop, so loop-bound HTTP connections survive between turns
+        return run_sync(self.call_many(calls))
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
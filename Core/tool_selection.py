@@ -0,0 +1,125 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from core.embedding import embed_texts, embedding_service
+
+
+def describe_tool(tool: Any) -> Tuple[str, str]:
+    """(name, description) for an agent Tool or a schema-backed Tool"""
+    schema = getattr(tool, "schema", None)
+    if schema is not None and hasattr(schema, "name"):
+        return schema.name, schema.description
+    return tool.name, tool.description
+
+
+class ToolSelector:
+    """Retrieves the tools relevant to a request instead of binding the whole catalog.
+
+    Tool descriptions are embedded once, when a tool is added; each request
+    embeds only the query and takes the ``top_k`` most similar tools plus
+    any ``always_include`` names. The embedding matrix grows by doubling,
+    so adding tools one at a time stays linear overall. The preamble text
+    for a selected subset is cached, so a prompt's tool section stays the
+    same size however many tools are registered.
+    """
+    def __init__(self,
+                 embedder: Any,
+                 top_k: int = 8,
+                 always_include: Iterable[str] = (),
+                 preamble_cache_size: int = 256):
+        self.embedder = embedder
+        self.top_k = top_k
+        self.always_include = tuple(always_include)
+        self.preamble_cache_size = preamble_cache_size
+        self._tools: List[Any] = []
+        self._positions: Dict[str, int] = {}
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._preambles: "OrderedDict[Tuple[str, ...], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, embedder: Any, config: Dict[str, Any]) -> "ToolSelector":
+        cfg = config.get("tools", {})
+        return cls(
+            embedding_service(embedder, config),
+            top_k=cfg.get("selection_top_k", 8),
+            always_include=cfg.get("always_include", ())
+        )
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def add(self, tools: Sequence[Any]):
+        """Embed and index tools; re-adding a name with a new description replaces its entry"""
+        fresh, replaced = [], []
+        for tool in tools:
+            name, description = describe_tool(tool)
+            pos = self._positions.get(name)
+            if pos is None:
+                fresh.append(tool)
+            elif describe_tool(self._tools[pos])[1] != description:
+                replaced.append(tool)
+        texts = [": ".join(describe_tool(t)) for t in fresh + replaced]
+        if not texts:
+            return
+        vectors = self._normalize(np.asarray(embed_texts(self.embedder, texts), dtype=np.float32))
+        with self._lock:
+            if fresh:
+                base = len(self._tools)
+                self._reserve(base + len(fresh), vectors.shape[1])
+                self._matrix[base:base + len(fresh)] = vectors[:len(fresh)]
+                for i, tool in enumerate(fresh):
+                    self._positions[describe_tool(tool)[0]] = base + i
+                    self._tools.append(tool)
+            for tool, vec in zip(replaced, vectors[len(fresh):]):
+                pos = self._positions[describe_tool(tool)[0]]
+                self._tools[pos] = tool
+                self._matrix[pos] = vec
+            self._preambles.clear()
+
+    def _reserve(self, rows: int, dim: int):
+        if rows <= len(self._matrix):
+            return
+        grown = np.zeros((max(rows, 2 * len(self._matrix), 16), dim), dtype=np.float32)
+        if self._tools:
+            grown[:len(self._tools)] = self._matrix[:len(self._tools)]
+        self._matrix = grown
+
+    def select(self, query: str, k: Optional[int] = None) -> List[Any]:
+        """Most relevant tools for query, best first, after any always-included ones"""
+        k = self.top_k if k is None else k
+        with self._lock:
+            tools, matrix = list(self._tools), self._matrix[:len(self._tools)]
+        pinned = [tools[self._positions[n]] for n in self.always_include if n in self._positions]
+        if k <= 0:
+            return pinned
+        if len(tools) <= k + len(pinned):
+            return pinned + [t for t in tools if t not in pinned]
+        q = self._normalize(embed_texts(self.embedder, [query]))[0]
+        scores = matrix @ q
+        for tool in pinned:
+            scores[self._positions[describe_tool(tool)[0]]] = -np.inf
+        top = np.argpartition(-scores, k - 1)[:k]
+        return pinned + [tools[i] for i in top[np.argsort(-scores[top])]]
+
+    def preamble(self, tools: Sequence[Any]) -> str:
+        """Tool section of the system prompt for a subset, cached by the subset's names"""
+        key = tuple(sorted(describe_tool(t)[0] for t in tools))
+        with self._lock:
+            text = self._preambles.get(key)
+            if text is not None:
+                self._preambles.move_to_end(key)
+                return text
+        text = "You have access to these tools:\n" + "\n".join(
+            f"{name}: {description}" for name, description in sorted(describe_tool(t) for t in tools))
+        with self._lock:
+            self._preambles[key] = text
+            while len(self._preambles) > self.preamble_cache_size:
+                self._preambles.popitem(last=False)
+        return text
@@ -0,0 +1,81 @@
+import json
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+_MISSING = object()
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, bool):
+        raise ValueError("expected an integer, got a boolean")
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"expected an integer, got {value}")
+    return int(value)
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ("true", "false", "1", "0", "yes", "no"):
+        return value.lower() in ("true", "1", "yes")
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    raise ValueError(f"expected a boolean, got {value!r}")
+
+
+def _to_json(kind: type) -> Callable[[Any], Any]:
+    def _coerce(value: Any) -> Any:
+        if isinstance(value, str):
+            value = json.loads(value)
+        if not isinstance(value, kind):
+            raise ValueError(f"expected {kind.__name__}, got {type(value).__name__}")
+        return value
+    return _coerce
+
+
+COERCERS: Dict[str, Callable[[Any], Any]] = {
+    "integer": _to_int,
+    "number": float,
+    "boolean": _to_bool,
+    "array": _to_json(list),
+    "object": _to_json(dict),
+}
+
+
+class ArgumentValidator:
+    """Tool argument checker compiled once from a schema's parameter list.
+
+    Each parameter becomes a (name, required, default, coerce, allowed)
+    entry with its enum pre-coerced into a frozenset, so a call costs one
+    pass over the tool's own parameters with O(1) enum checks. Arguments
+    are coerced to the declared type, missing ones take their defaults,
+    and the result is a new dict; the caller's kwargs are never mutated.
+    Unknown arguments pass through untouched.
+    """
+    def __init__(self, parameters: List[Any]):
+        self._params: List[Tuple[str, bool, Any, Optional[Callable[[Any], Any]], Optional[FrozenSet[Any]]]] = []
+        for param in parameters:
+            coerce = COERCERS.get(param.type)
+            allowed = None
+            if param.enum:
+                allowed = frozenset(coerce(v) if coerce else v for v in param.enum)
+            default = _MISSING if param.default is None else param.default
+            self._params.append((param.name, param.required, default, coerce, allowed))
+
+    def __call__(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        values = dict(arguments)
+        for name, required, default, coerce, allowed in self._params:
+            value = values.get(name, _MISSING)
+            if value is _MISSING or value is None:
+                if default is not _MISSING:
+                    values[name] = default
+                elif required:
+                    raise ValueError(f"Missing required parameter: {name}")
+                continue
+            if coerce is not None:
+                try:
+                    value = values[name] = coerce(value)
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f"Invalid value for {name}: {e}") from None
+            if allowed is not None and value not in allowed:
+                raise ValueError(f"Invalid value for {name}. Must be one of: {sorted(allowed, key=str)}")
+        return values
@@ -1,12 +1,19 @@
+import asyncio
 import json
 import requests
 from typing import List, Dict, Any, Optional, Callable
 from dataclasses import dataclass
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 import inspect
 from functools import wraps
 import httpx
 from urllib.parse import urlencode
+from core.expressions import ExpressionEngine
+from core.event_loop import run_sync
+from core.http_pool import HTTPClientPool, default_pool
+from core.tool_cache import ToolResultCache
+from core.tool_executor import ToolCallResult, ToolExecutor
+from core.tool_validation import ArgumentValidator
 
 # Constants
 MCP_SEARCH_API = "https://api.mcp.ai/v1/search"
@@ -14,6 +21,10 @@ DEFAULT_HEADERS = {
     "User-Agent": "AI-Agent-Framework/1.0",
     "Accept": "application/json"
 }
+# Result reuse windows for web searches by requested freshness (seconds)
+FRESHNESS_TTL = {"day": 900.0, "week": 3600.0, "month": 6 * 3600.0, "year": 24 * 3600.0}
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", list: "array", dict: "object"}
 
 @dataclass
 class ToolParameter:
@@ -32,38 +43,60 @@ class ToolSchema(BaseModel):
     required_params: List[str] = Field(default_factory=list)
     endpoint: Optional[str] = Field(None, description="API endpoint if applicable")
     method: str = Field("GET", description="HTTP method if applicable")
+    cache_ttl: Optional[float] = Field(None, description="Seconds a result may be reused; 0 disables caching")
 
 class Tool(BaseModel):
     """Tool instance with executable function"""
     schema: ToolSchema
     function: Callable
+    cache_policy: Optional[Callable[[Dict[str, Any]], Optional[float]]] = None
     
     class Config:
         arbitrary_types_allowed = True
     
+    _validator: Optional[ArgumentValidator] = PrivateAttr(default=None)
+    
+    def compile(self) -> "Tool":
+        """Build the argument validator from the schema (done once at registration)"""
+        self._validator = ArgumentValidator(self.schema.parameters)
+        return self
+    
+    def prepare_arguments(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Validated, coerced copy of params with defaults filled in"""
+        if self._validator is None:
+            self.compile()
+        return self._validator(params)
+    
     def execute(self, **kwargs) -> Any:
         """Execute the tool with given parameters"""
         # Validate parameters against schema
-        self._validate_params(kwargs)
-        return self.function(**kwargs)
-    
-    def _validate_params(self, params: Dict[str, Any]):
-        """Validate input parameters against tool schema"""
-        for param in self.schema.parameters:
-            if param.required and param.name not in params:
-                if param.default is None:
-                    raise ValueError(f"Missing required parameter: {param.name}")
-                params[param.name] = param.default
-                
-            if param.name in params:
-                # Type checking would be more robust in production
-                if param.enum and params[param.name] not in param.enum:
-                    raise ValueError(f"Invalid value for {param.name}. Must be one of: {param.enum}")
+        result = self.function(**self.prepare_arguments(kwargs))
+        if inspect.isawaitable(result):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return run_sync(_resolve(result))
+            if inspect.iscoroutine(result):
+                result.close()
+            raise RuntimeError(f"Tool {self.schema.name} is async; use execute_async inside an event loop")
+        return result
+    
+    async def execute_async(self, **kwargs) -> Any:
+        """Execute the tool from async code, awaiting coroutine tools natively"""
+        kwargs = self.prepare_arguments(kwargs)
+        if inspect.iscoroutinefunction(self.function):
+            return await self.function(**kwargs)
+        result = await asyncio.to_thread(self.function, **kwargs)
+        return await result if inspect.isawaitable(result) else result
+
+async def _resolve(awaitable) -> Any:
+    return await awaitable
 
 class WebSearchTool:
     """MCP-standard web search implementation"""
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, http_pool: Optional[HTTPClientPool] = None):
         self.api_key = api_key
+        self.http_pool = http_pool
         self.schema = self._create_schema()
     
     def _create_schema(self) -> ToolSchema:
@@ -114,42 +147,61 @@ class WebSearchTool:
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
         
+        pool = self.http_pool or default_pool()
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    MCP_SEARCH_API,
-                    params=params,
-                    headers=headers,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                return response.json()["results"]
+            response = await pool.get(
+                MCP_SEARCH_API,
+                params=params,
+                headers=headers,
+                timeout=10.0
+            )
+            response.raise_for_status()
+            return response.json()["results"]
         except httpx.RequestError as e:
             raise ConnectionError(f"Search API request failed: {str(e)}")
     
+    def cache_ttl(self, arguments: Dict[str, Any]) -> float:
+        """Fresher searches go stale sooner"""
+        return FRESHNESS_TTL.get(arguments.get("freshness"), 1800.0)
+    
     def as_tool(self) -> Tool:
         """Convert this instance into a Tool object"""
         return Tool(
             schema=self.schema,
-            function=self.search
+            function=self.search,
+            cache_policy=self.cache_ttl
         )
 
 class ToolManager:
     """Central registry for all available tools"""
-    def __init__(self):
+    def __init__(self,
+                 tool_timeout: Optional[float] = 30.0,
+                 max_workers: int = 8,
+                 http_pool: Optional[HTTPClientPool] = None,
+                 result_cache: Optional[ToolResultCache] = None):
         self._tools: Dict[str, Tool] = {}
+        self.http_pool = http_pool
+        self.expressions = ExpressionEngine()
         self._register_core_tools()
+        self.executor = ToolExecutor(self, timeout=tool_timeout, max_workers=max_workers, cache=result_cache)
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], http_pool: Optional[HTTPClientPool] = None) -> "ToolManager":
+        cfg = config.get("tools", {})
+        return cls(tool_timeout=cfg.get("tool_timeout", 30.0), max_workers=cfg.get("max_workers", 8),
+                   http_pool=http_pool or HTTPClientPool.from_config(config),
+                   result_cache=ToolResultCache.from_config(config))
     
     def _register_core_tools(self):
         """Register built-in tools"""
-        web_search = WebSearchTool().as_tool()
+        web_search = WebSearchTool(http_pool=self.http_pool).as_tool()
         self.register_tool(web_search)
         
         # Register other core tools here
         self.register_tool(self._create_calculator_tool())
     
     def _create_calculator_tool(self) -> Tool:
-        """Create a simple calculator tool"""
+        """Create a calculator tool backed by the safe expression engine"""
         schema = ToolSchema(
             name="calculator",
             description="Perform mathematical calculations",
@@ -159,16 +211,23 @@ class ToolManager:
                     type="string",
                     description="Mathematical expression to evaluate",
                     required=True
+                ),
+                ToolParameter(
+                    name="variables",
+                    type="object",
+                    description="Values for names in the expression; lists evaluate the formula per row",
+                    required=False
                 )
-            ]
+            ],
+            cache_ttl=86400.0
         )
+        engine = self.expressions
         
-        def calculator(expression: str) -> float:
-            # WARNING: In production, use a safe eval alternative
-            try:
-                return eval(expression, {"__builtins__": None}, {})
-            except Exception as e:
-                raise ValueError(f"Calculation failed: {str(e)}")
+        def calculator(expression: str, variables: Optional[Dict[str, Any]] = None):
+            variables = variables or {}
+            if any(isinstance(v, (list, tuple)) for v in variables.values()):
+                return engine.evaluate_batch(expression, variables).tolist()
+            return engine.evaluate(expression, **variables)
         
         return Tool(schema=schema, function=calculator)
     
@@ -176,7 +235,20 @@ class ToolManager:
         """Register a new tool"""
         if tool.schema.name in self._tools:
             raise ValueError(f"Tool '{tool.schema.name}' already registered")
-        self._tools[tool.schema.name] = tool
+        self._tools[tool.schema.name] = tool.compile()
+    
+    def get_tool(self, name: str) -> Tool:
+        tool = self._tools.get(name)
+        if tool is None:
+            raise ValueError(f"Tool {name} not found")
+        return tool
+    
+    def execute_calls(self, calls: List[Dict[str, Any]]) -> List[ToolCallResult]:
+        """Run one LLM turn's function calls concurrently"""
+        return self.executor.run(calls)
+    
+    def close(self):
+        self.executor.close()
     
     def register_function(self, 
                          func: Callable,
@@ -189,4 +261,24 @@ class ToolManager:
         parameters = []
         required_params = []
         for param_name, param in sig.parameters.items():
-            if
+            if param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD):
+                continue
+            required = param.default is inspect.Parameter.empty
+            parameters.append(ToolParameter(
+                name=param_name,
+                type=_JSON_TYPES.get(param.annotation, "string"),
+                description=param_name,
+                required=required,
+                default=None if required else param.default
+            ))
+            if required:
+                required_params.append(param_name)
+        
+        schema = ToolSchema(
+            name=name or func.__name__,
+            description=description or inspect.getdoc(func) or func.__name__,
+            parameters=parameters,
+            required_params=required_params
+        )
+        self.register_tool(Tool(schema=schema, function=func))
+        return func
@@ -0,0 +1,336 @@
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+
+def kmeans(x: np.ndarray,
+           k: int,
+           iters: int = 15,
+           seed: int = 0,
+           chunk: int = 65536) -> np.ndarray:
+    """Plain Lloyd's k-means on float32 data; returns (k, d) centroids"""
+    rng = np.random.default_rng(seed)
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = assign_nearest(x, centroids, chunk)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        counts = np.bincount(assign, minlength=k).astype(np.float32)
+        empty = counts == 0
+        centroids = sums / np.maximum(counts, 1)[:, None]
+        if empty.any():
+            centroids[empty] = x[rng.choice(len(x), size=int(empty.sum()))]
+    return centroids
+
+
+def assign_nearest(x: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    """Index of the nearest centroid (L2) for every row of x"""
+    c_norms = (centroids ** 2).sum(axis=1)
+    out = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), chunk):
+        block = x[start:start + chunk]
+        out[start:start + chunk] = np.argmin(c_norms[None, :] - 2 * block @ centroids.T, axis=1)
+    return out
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest scores, best first"""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+class Float16Codec:
+    trained = True
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.code_dtype = np.float16
+        self.code_width = dim
+
+    @property
+    def bytes_per_vector(self) -> int:
+        return self.dim * 2
+
+    def train(self, x: np.ndarray):
+        pass
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        return x.astype(np.float16)
+
+    def scorer(self, q: np.ndarray):
+        q16 = q.astype(np.float32)
+        return lambda codes: codes.astype(np.float32) @ q16
+
+
+class Int8Codec:
+    """Per-dimension affine scalar quantization to uint8"""
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.code_dtype = np.uint8
+        self.code_width = dim
+        self.trained = False
+        self.offset = np.zeros(dim, dtype=np.float32)
+        self.scale = np.ones(dim, dtype=np.float32)
+
+    @property
+    def bytes_per_vector(self) -> int:
+        return self.dim
+
+    def train(self, x: np.ndarray):
+        lo, hi = x.min(axis=0), x.max(axis=0)
+        self.offset = lo.astype(np.float32)
+        self.scale = np.maximum(hi - lo, 1e-8).astype(np.float32) / 255.0
+        self.trained = True
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        codes = np.rint((x - self.offset) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def scorer(self, q: np.ndarray):
+        # <codes * scale + offset, q> = codes . (q * scale) + offset . q
+        q_scaled = (q * self.scale).astype(np.float32)
+        bias = float(self.offset @ q)
+        return lambda codes: codes.astype(np.float32) @ q_scaled + bias
+
+
+class PQCodec:
+    """Product quantization with asymmetric distance (ADC) lookup tables"""
+    def __init__(self, dim: int, m: int = 16, nbits: int = 8, train_iters: int = 15):
+        if dim % m:
+            raise ValueError(f"dim {dim} is not divisible by m={m}")
+        self.dim = dim
+        self.m = m
+        self.ksub = 1 << nbits
+        self.dsub = dim // m
+        self.train_iters = train_iters
+        self.code_dtype = np.uint8 if nbits <= 8 else np.uint16
+        self.code_width = m
+        self.codebooks: Optional[np.ndarray] = None  # (m, ksub, dsub)
+        self.trained = False
+
+    @property
+    def bytes_per_vector(self) -> int:
+        return self.m * np.dtype(self.code_dtype).itemsize
+
+    def train(self, x: np.ndarray):
+        subs = x.reshape(len(x), self.m, self.dsub)
+        books = [kmeans(subs[:, j], self.ksub, iters=self.train_iters, seed=j) for j in range(self.m)]
+        ksub = min(len(b) for b in books)
+        self.ksub = ksub
+        self.codebooks = np.stack([b[:ksub] for b in books]).astype(np.float32)
+        self.trained = True
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        subs = x.reshape(len(x), self.m, self.dsub)
+        codes = np.empty((len(x), self.m), dtype=self.code_dtype)
+        for j in range(self.m):
+            codes[:, j] = assign_nearest(subs[:, j], self.codebooks[j])
+        return codes
+
+    def scorer(self, q: np.ndarray):
+        # table[j, c] = <q_j, codebook[j, c]>; a vector's score is the sum over its codes
+        table = np.einsum("jd,jcd->jc", q.reshape(self.m, self.dsub), self.codebooks)
+        cols = np.arange(self.m)
+        return lambda codes: table[cols, codes.astype(np.int64)].sum(axis=1)
+
+
+CODECS = {
+    "fp16": Float16Codec,
+    "int8": Int8Codec,
+    "pq": PQCodec,
+}
+
+
+class CompressedVectorStore:
+    """Inner-product vector store over compressed codes.
+
+    Vectors are (optionally) L2-normalized, encoded with the selected
+    codec and scanned with asymmetric scoring: the query stays float32 and
+    only the stored side is quantized. When ``raw_path`` is set the
+    float32 originals are appended to that file and memory-mapped, so the
+    top ``k * rescore_factor`` candidates can be re-scored exactly without
+    keeping full-precision vectors resident. The file is truncated when the
+    store is created, since its rows must line up with this store's codes.
+    """
+    def __init__(self,
+                 dim: int,
+                 encoding: str = "int8",
+                 normalize: bool = True,
+                 raw_path: Optional[str] = None,
+                 rescore_factor: int = 4,
+                 train_size: int = 1024,
+                 **codec_kwargs):
+        if encoding not in CODECS:
+            raise ValueError(f"Unknown encoding {encoding!r}; choose from {sorted(CODECS)}")
+        self.dim = dim
+        self.encoding = encoding
+        self.codec = CODECS[encoding](dim, **codec_kwargs)
+        self.normalize = normalize
+        self.rescore_factor = rescore_factor
+        self.train_size = train_size
+        self.raw_path = Path(raw_path) if raw_path else None
+        if self.raw_path:
+            # Rows left by an earlier store would shift every position used for rescoring
+            self.raw_path.parent.mkdir(parents=True, exist_ok=True)
+            open(self.raw_path, "wb").close()
+        self._codes = np.empty((0, self.codec.code_width), dtype=self.codec.code_dtype)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._size = 0
+        self._ids_sorted = True
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._raw: Optional[np.memmap] = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._size + sum(len(ids) for ids, _ in self._pending)
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        x = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if self.normalize:
+            x = x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+        return x
+
+    def train(self, sample: np.ndarray):
+        """Fit the quantizer explicitly instead of on the first train_size vectors"""
+        with self._lock:
+            self.codec.train(self._prepare(sample))
+            self._flush_pending()
+
+    def add(self, vectors: np.ndarray, ids: Optional[Iterable[int]] = None):
+        x = self._prepare(vectors)
+        ids = np.arange(len(self), len(self) + len(x)) if ids is None else np.asarray(list(ids), dtype=np.int64)
+        with self._lock:
+            if self.raw_path:
+                with open(self.raw_path, "ab") as f:
+                    x.tofile(f)
+                self._raw = None
+            if not self.codec.trained:
+                # Buffer until there is enough data to fit the quantizer
+                self._pending.append((ids, x))
+                if len(self) - self._size >= self.train_size:
+                    self._train_on_pending()
+                return
+            self._append(self.codec.encode(x), ids)
+
+    def _train_on_pending(self):
+        self.codec.train(np.concatenate([x for _, x in self._pending]))
+        self._flush_pending()
+
+    def _flush_pending(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        for ids, x in pending:
+            self._append(self.codec.encode(x), ids)
+
+    def _append(self, codes: np.ndarray, ids: np.ndarray):
+        needed = self._size + len(codes)
+        if needed > len(self._codes):
+            capacity = max(needed, 2 * len(self._codes), 1024)
+            grown = np.empty((capacity, self.codec.code_width), dtype=self.codec.code_dtype)
+            grown[:self._size] = self._codes[:self._size]
+            grown_ids = np.empty(capacity, dtype=np.int64)
+            grown_ids[:self._size] = self._ids[:self._size]
+            self._codes, self._ids = grown, grown_ids
+        if len(ids) and (np.any(ids[1:] < ids[:-1]) or (self._size and ids[0] < self._ids[self._size - 1])):
+            self._ids_sorted = False
+        self._codes[self._size:needed] = codes
+        self._ids[self._size:needed] = ids
+        self._size = needed
+
+    def memory_bytes(self) -> int:
+        """Resident bytes of compressed codes plus ids"""
+        return self._size * (self.codec.bytes_per_vector + self._ids.itemsize)
+
+    def _raw_vectors(self) -> Optional[np.memmap]:
+        if not self.raw_path or not self.raw_path.exists():
+            return None
+        if self._raw is None:
+            rows = os.path.getsize(self.raw_path) // (4 * self.dim)
+            self._raw = np.memmap(self.raw_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._raw
+
+    def _positions(self, allowed_ids: Any) -> np.ndarray:
+        wanted = np.fromiter(allowed_ids, dtype=np.int64)
+        ids = self._ids[:self._size]
+        if not self._ids_sorted:
+            return np.nonzero(np.isin(ids, wanted))[0]
+        pos = np.searchsorted(ids, wanted)
+        valid = pos < len(ids)
+        pos, wanted = pos[valid], wanted[valid]
+        return pos[ids[pos] == wanted]
+
+    def _score(self, q: np.ndarray, codes: np.ndarray, block: int = 65536) -> np.ndarray:
+        scorer = self.codec.scorer(q)
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), block):
+            scores[start:start + block] = scorer(codes[start:start + block])
+        return scores
+
+    def search(self,
+               query: np.ndarray,
+               k: int = 10,
+               allowed_ids: Any = None,
+               rescore: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (ids, scores) of the k best matches"""
+        with self._lock:
+            if self._pending:
+                self._train_on_pending()
+            q = self._prepare(query)[0]
+            if allowed_ids is not None:
+                positions = self._positions(allowed_ids)
+                codes = self._codes[positions]
+            else:
+                positions = None
+                codes = self._codes[:self._size]
+            if not len(codes):
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+            scores = self._score(q, codes)
+            raw = self._raw_vectors() if rescore else None
+            depth = k * self.rescore_factor if raw is not None else k
+            best = top_k(scores, depth)
+            rows = best if positions is None else positions[best]
+
+            if raw is not None:
+                exact = np.asarray(raw[np.sort(rows)] @ q)
+                order = np.argsort(rows)
+                scores_best = np.empty(len(rows), dtype=np.float32)
+                scores_best[order] = exact
+                keep = top_k(scores_best, k)
+                return self._ids[rows[keep]], scores_best[keep]
+            return self._ids[rows[:k]], scores[best[:k]].astype(np.float32)
+
+
+class DenseVectorRetriever:
+    """Dense backend for HybridRetriever on top of a CompressedVectorStore"""
+    def __init__(self, embedder: Any, store: CompressedVectorStore):
+        from core.embedding import embed_texts
+        self.embedder = embedder
+        self._embed = lambda texts: embed_texts(embedder, texts)
+        self.store = store
+        self._docs: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+
+    def add_documents(self,
+                      documents: List[str],
+                      metadata: List[Dict[str, Any]],
+                      embeddings: Optional[np.ndarray] = None):
+        vectors = embeddings if embeddings is not None else self._embed(documents)
+        ids = [meta["doc_id"] for meta in metadata]
+        self.store.add(vectors, ids)
+        for doc_id, text, meta in zip(ids, documents, metadata):
+            self._docs[doc_id] = (text, meta)
+
+    def search(self, query: str, k: int = 5, allowed_ids: Any = None) -> List[Tuple[str, Dict[str, Any]]]:
+        ids, scores = self.store.search(self._embed([query])[0], k=k, allowed_ids=allowed_ids)
+        results = []
+        for doc_id, score in zip(ids.tolist(), scores.tolist()):
+            text, meta = self._docs[doc_id]
+            results.append((text, dict(meta, score=score)))
+        return results
@@ -1,11 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from ..core.agent import BaseAgent
 from ..core.mcp_integration import validate_mcp_request
+from ..core.http_pool import HTTPClientPool, set_default_pool
 import json
+import yaml
 
-app = FastAPI(title="AI Agent Framework API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One configured pool for the whole server; tools and MCP clients without their own use it
+    with open("configs/base_config.yaml") as f:
+        config = yaml.safe_load(f)
+    pool = HTTPClientPool.from_config(config)
+    set_default_pool(pool)
+    yield
+    # Drain keep-alive connections held by HTTP tools and MCP clients
+    await pool.aclose()
+
+app = FastAPI(title="AI Agent Framework API", lifespan=lifespan)
 
 # CORS configuration
 app.add_middleware(
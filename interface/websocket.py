@@ -1,13 +1,18 @@
 import asyncio
 import json
+from contextlib import nullcontext
+import yaml
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List
+from typing import Dict, List, Optional
 from ..core.llm import QuantizedLLM
 from ..core.mcp_integration import MCPHandler
+from ..core.session_memory import SessionMemoryManager
 
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, sessions: Optional[SessionMemoryManager] = None):
         self.active_connections: Dict[str, WebSocket] = {}
+        # Per-client memory shards; idle clients are paged out to disk
+        self.sessions = sessions
 
     async def connect(self, websocket: WebSocket, client_id: str):
         await websocket.accept()
@@ -21,7 +26,10 @@ class ConnectionManager:
         if client_id in self.active_connections:
             await self.active_connections[client_id].send_text(message)
 
-manager = ConnectionManager()
+with open("configs/base_config.yaml") as f:
+    config = yaml.safe_load(f)
+
+manager = ConnectionManager(SessionMemoryManager.from_config(config))
 
 async def handle_websocket(websocket: WebSocket, client_id: str):
     llm = QuantizedLLM.load_from_config()
@@ -31,15 +39,25 @@ async def handle_websocket(websocket: WebSocket, client_id: str):
     try:
         while True:
             data = await websocket.receive_text()
-            
-            # Stream tokens one by one
-            async for token in llm.stream_generate(data):
-                await manager.send_personal_message(token, client_id)
+            # Pinned for the whole turn so the manager can't spill it between awaits
+            with manager.sessions.session(client_id) if manager.sessions else nullcontext() as memory:
+                if memory:
+                    memory.add(data, memory_type="episodic", role="user")
                 
-                # Check for MCP interrupts
-                if mcp.check_interrupt(client_id):
-                    await manager.send_personal_message("[MCP_INTERRUPT]", client_id)
-                    break
+                # Stream tokens one by one
+                reply = []
+                async for token in llm.stream_generate(data):
+                    reply.append(token)
+                    await manager.send_personal_message(token, client_id)
+                    
+                    # Check for MCP interrupts
+                    if mcp.check_interrupt(client_id):
+                        await manager.send_personal_message("[MCP_INTERRUPT]", client_id)
+                        break
+                if memory:
+                    memory.add("".join(reply), memory_type="episodic", role="assistant")
                     
     except WebSocketDisconnect:
         manager.disconnect(client_id)
+        if manager.sessions:
+            manager.sessions.spill(client_id)
@@ -1,10 +1,19 @@
 from core.agent import BaseAgent
 from core.tools import SECSearchTool, FinancialDataTool
 from core.memory import FinancialMemory
+from core.context_packer import ContextPacker
+from core.expressions import ExpressionEngine
 from datetime import datetime
+import numpy as np
 import yfinance as yf
 import pandas as pd
 
+RATIO_FORMULAS = {
+    "pe_ratio": "price / eps",
+    "current_ratio": "current_assets / current_liabilities",
+    "debt_to_equity": "total_debt / total_equity"
+}
+
 class FinanceAgent(BaseAgent):
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
@@ -13,6 +22,8 @@ class FinanceAgent(BaseAgent):
         self.tools.register_tool("analyze_sec_filings", self.analyze_sec_filings)
         self.tools.register_tool("calculate_financial_ratios", self.calculate_ratios)
         self.memory = FinancialMemory()
+        self.context_packer = ContextPacker.from_config(config)
+        self.expressions = ExpressionEngine()
         
     def get_stock_data(self, ticker: str, period: str = "1y") -> pd.DataFrame:
         """Retrieve historical stock data"""
@@ -27,20 +38,22 @@ class FinanceAgent(BaseAgent):
             query=f"{company} {filing_type}",
             filters={"source": "sec.gov"}
         )
+        context = self.context_packer.pack(results)
         analysis = self.llm.generate(
-            prompt=f"Analyze this SEC filing: {results}",
+            prompt=f"Analyze this SEC filing:\n\n{context.text}",
             response_format={"type": "json_object"}
         )
         return analysis
     
     def calculate_ratios(self, financials: Dict) -> Dict:
-        """Calculate key financial ratios"""
-        ratios = {
-            "pe_ratio": financials["price"] / financials["eps"],
-            "current_ratio": financials["current_assets"] / financials["current_liabilities"],
-            "debt_to_equity": financials["total_debt"] / financials["total_equity"]
-        }
-        return ratios
+        """Calculate key financial ratios for one company, or per row for a portfolio of columns"""
+        if isinstance(financials, pd.DataFrame):
+            financials = {column: financials[column].to_numpy() for column in financials.columns}
+        if any(np.ndim(v) for v in financials.values()):
+            return {name: self.expressions.evaluate_batch(formula, financials)
+                    for name, formula in RATIO_FORMULAS.items()}
+        return {name: self.expressions.evaluate(formula, **financials)
+                for name, formula in RATIO_FORMULAS.items()}
     
     def generate_investment_thesis(self, ticker: str) -> str:
         """Generate comprehensive investment analysis"""
@@ -9,10 +9,10 @@ class HealthcareAgent(BaseAgent):
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self.specialization = "healthcare"
-        self.clinical_retriever = HybridRetriever(
-            index_name="clinical_knowledge",
-            embedding_model="biobert",
-            reranker="colbert"
+        retriever_config = config.get("retriever", {})
+        colbert_config = dict(retriever_config.get("colbert", {}), index_name="clinical_knowledge")
+        self.clinical_retriever = HybridRetriever.from_config(
+            dict(config, retriever=dict(retriever_config, colbert=colbert_config))
         )
         self.tools.register_tool("clinical_guidelines_search", self.search_clinical_guidelines)
         self.tools.register_tool("drug_interaction_check", self.check_drug_interactions)
@@ -0,0 +1,53 @@
+import time
+import pytest
+import numpy as np
+from core.vector_store import CompressedVectorStore
+
+DIM = 768
+N_VECTORS = 20_000
+N_QUERIES = 100
+K = 10
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(7)
+    centers = rng.normal(size=(256, DIM))
+    x = centers[rng.integers(0, 256, N_VECTORS)] + 0.5 * rng.normal(size=(N_VECTORS, DIM))
+    q = x[rng.choice(N_VECTORS, N_QUERIES, replace=False)] + 0.3 * rng.normal(size=(N_QUERIES, DIM))
+    xn = x / np.linalg.norm(x, axis=1, keepdims=True)
+    qn = q / np.linalg.norm(q, axis=1, keepdims=True)
+    truth = np.argsort(-(qn @ xn.T), axis=1)[:, :K]
+    return x.astype(np.float32), q.astype(np.float32), truth
+
+class TestCompressionTradeoffs:
+    def _measure(self, store, queries, truth):
+        start = time.perf_counter()
+        found = [store.search(q, k=K)[0] for q in queries]
+        latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = np.mean([len(set(f) & set(t)) / K for f, t in zip(found, truth)])
+        return recall, latency_ms
+
+    @pytest.mark.parametrize("encoding,kwargs,min_recall,min_rescored_recall", [
+        ("fp16", {}, 0.99, 0.99),
+        ("int8", {}, 0.9, 0.99),
+        ("pq", {"m": 96}, 0.25, 0.95),
+    ])
+    def test_memory_vs_recall(self, corpus, encoding, kwargs, min_recall, min_rescored_recall, tmp_path):
+        x, queries, truth = corpus
+        float32_bytes = x.nbytes
+
+        plain = CompressedVectorStore(DIM, encoding=encoding, **kwargs)
+        plain.add(x)
+        recall, latency = self._measure(plain, queries, truth)
+
+        rescored = CompressedVectorStore(DIM, encoding=encoding, raw_path=str(tmp_path / "raw.f32"),
+                                         rescore_factor=8, **kwargs)
+        rescored.add(x)
+        rescored_recall, rescored_latency = self._measure(rescored, queries, truth)
+
+        ratio = float32_bytes / plain.memory_bytes()
+        print(f"\n{encoding}: {ratio:.1f}x smaller, recall@{K} {recall:.3f} ({latency:.2f}ms), "
+              f"with rescoring {rescored_recall:.3f} ({rescored_latency:.2f}ms)")
+        assert recall >= min_recall, f"{encoding} recall below expected floor"
+        assert rescored_recall >= min_rescored_recall, "Exact re-scoring should recover recall"
+        assert ratio > 1.5, "Compressed codes should be smaller than float32"
@@ -0,0 +1,24 @@
+import time
+import numpy as np
+from core.expressions import ExpressionEngine
+
+class TestExpressionThroughput:
+    def test_batch_beats_per_row_calls(self):
+        engine = ExpressionEngine()
+        rng = np.random.default_rng(0)
+        n = 100_000
+        columns = {"price": rng.uniform(10, 500, n), "eps": rng.uniform(0.5, 20, n)}
+        formula = "price / eps"
+
+        start = time.perf_counter()
+        per_row = [engine.evaluate(formula, price=p, eps=e) for p, e in zip(columns["price"], columns["eps"])]
+        row_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = engine.evaluate_batch(formula, columns)
+        batch_time = time.perf_counter() - start
+
+        print(f"\nper-row: {row_time * 1e3:.1f} ms, batch: {batch_time * 1e3:.2f} ms for {n} rows")
+        np.testing.assert_allclose(batch, per_row)
+        assert batch_time * 20 < row_time, "Vectorized evaluation should be far faster than per-row calls"
+        assert engine.stats.misses == 1, "The formula is compiled once"
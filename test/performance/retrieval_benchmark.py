@@ -0,0 +1,384 @@
+"""Retrieval benchmark: synthetic corpora with known-item ground truth.
+
+Every query is built from the words of one source document, so the
+ground truth is known without an exhaustive scan and the harness scales to
+10M documents. Each HybridRetriever backend (dense, sparse, ColBERT) and
+the fused hybrid are built from the same corpus and report recall@k,
+p50/p99 latency, QPS, build time and build memory; results are written as
+JSON and compared against a stored baseline. Scales are 10k (the test
+default), 1m and 10m; the larger ones only run when asked for.
+
+    python test/performance/retrieval_benchmark.py --scale 1m --backends dense_int8,dense_pq
+    python test/performance/retrieval_benchmark.py --scale 10m --backends dense_pq,sparse_bm25
+    python test/performance/retrieval_benchmark.py --scale 10k --baseline base.json --update-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+import numpy as np
+import pytest
+from core.vector_store import CompressedVectorStore, DenseVectorRetriever, top_k
+from core.colbert_engine import PlaidColBERT
+
+SCALES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_BACKENDS = ("dense_fp16", "dense_int8", "dense_pq", "sparse_bm25", "colbert_plaid", "hybrid")
+
+
+class SyntheticCorpus:
+    """Deterministic topic-model corpus of ``w<id>`` word documents"""
+    def __init__(self,
+                 n_docs: int,
+                 vocab_size: int = 50_000,
+                 n_topics: int = 1_000,
+                 topic_words: int = 200,
+                 doc_len: Tuple[int, int] = (20, 60),
+                 seed: int = 0,
+                 block_size: int = 10_000):
+        self.n_docs = n_docs
+        self.vocab_size = vocab_size
+        self.doc_len = doc_len
+        self.seed = seed
+        self.block_size = block_size
+        rng = np.random.default_rng(seed)
+        self.topics = rng.integers(0, vocab_size, size=(n_topics, topic_words))
+
+    def _block(self, block: int) -> List[np.ndarray]:
+        rng = np.random.default_rng([self.seed, block])
+        start = block * self.block_size
+        docs = []
+        for _ in range(start, min(start + self.block_size, self.n_docs)):
+            topics = self.topics[rng.integers(0, len(self.topics), size=2)].ravel()
+            docs.append(rng.choice(topics, size=rng.integers(*self.doc_len)))
+        return docs
+
+    def batches(self, batch_size: int = 10_000) -> Iterator[List[str]]:
+        """Stream document texts in insertion (= doc id) order"""
+        batch: List[str] = []
+        for block in range((self.n_docs + self.block_size - 1) // self.block_size):
+            for words in self._block(block):
+                batch.append(" ".join(f"w{w}" for w in words))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def queries(self, n: int, words: int = 6, noise_words: int = 1) -> List[Tuple[str, int]]:
+        """(query text, source doc id) pairs drawn from random documents"""
+        rng = np.random.default_rng([self.seed, 1 << 30])
+        sources = np.sort(rng.choice(self.n_docs, size=min(n, self.n_docs), replace=False))
+        queries, cached_block, docs = [], None, []
+        for source in sources:
+            if source // self.block_size != cached_block:
+                cached_block = source // self.block_size
+                docs = self._block(cached_block)
+            doc = docs[source % self.block_size]
+            picked = list(rng.choice(doc, size=min(words, len(doc)), replace=False))
+            picked[:noise_words] = rng.integers(0, self.vocab_size, size=noise_words)
+            queries.append((" ".join(f"w{w}" for w in picked), int(source)))
+        rng.shuffle(queries)
+        return queries
+
+
+class SyntheticEncoder:
+    """Maps ``w<id>`` words to fixed vectors (dense = mean, ColBERT = per token).
+
+    Words are grouped into semantic clusters so token embeddings have the
+    clustered structure real ColBERT vectors have.
+    """
+    def __init__(self, vocab_size: int = 50_000, dim: int = 64, n_clusters: int = 4096,
+                 spread: float = 0.35, seed: int = 0):
+        rng = np.random.default_rng([seed, 7])
+        centers = rng.normal(size=(n_clusters, dim))
+        centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+        table = centers[rng.integers(0, n_clusters, vocab_size)] + spread * rng.normal(size=(vocab_size, dim)) / np.sqrt(dim)
+        self.table = (table / np.linalg.norm(table, axis=1, keepdims=True)).astype(np.float32)
+
+    def _ids(self, text: str) -> np.ndarray:
+        return np.fromiter((int(w[1:]) for w in text.split()), dtype=np.int64)
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        return np.stack([self.table[self._ids(t)].mean(axis=0) for t in texts])
+
+    def docFromText(self, texts: List[str], keep_dims: bool = False) -> List[np.ndarray]:
+        return [self.table[self._ids(t)] for t in texts]
+
+    def queryFromText(self, queries: List[str]) -> np.ndarray:
+        return np.stack([self.table[self._ids(q)] for q in queries])
+
+
+class SparseBM25:
+    """BM25 over a CSR inverted index with HybridRetriever's sparse backend interface.
+
+    The repo ships no sparse retriever, so this is the lexical baseline the
+    other backends are measured against. Postings are accumulated per batch
+    and compacted into CSR on the first search after an add.
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab: Dict[str, int] = {}
+        self.texts: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self._postings: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._doc_lens: List[np.ndarray] = []
+        self._index = None
+
+    def add_documents(self, documents: List[str], metadata: List[Dict] = None):
+        tokens = [text.split() for text in documents]
+        lens = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+        terms = np.fromiter((self.vocab.setdefault(w, len(self.vocab)) for doc in tokens for w in doc),
+                            dtype=np.int64, count=int(lens.sum()))
+        docs = np.repeat(np.arange(len(self.texts), len(self.texts) + len(documents)), lens)
+        pairs, tfs = np.unique(np.stack([docs, terms], axis=1), axis=0, return_counts=True)
+        self._postings.append((pairs[:, 1], pairs[:, 0], tfs))
+        self._doc_lens.append(lens)
+        self.texts.extend(documents)
+        self.metadata.extend(metadata or [{} for _ in documents])
+        self._index = None
+
+    def _build(self):
+        terms, docs, tfs = (np.concatenate(parts) for parts in zip(*self._postings))
+        order = np.argsort(terms, kind="stable")
+        df = np.bincount(terms, minlength=len(self.vocab))
+        doc_lens = np.concatenate(self._doc_lens).astype(np.float32)
+        n = len(doc_lens)
+        self._index = {
+            "offsets": np.concatenate([[0], np.cumsum(df)]),
+            "docs": docs[order],
+            "tfs": tfs[order].astype(np.float32),
+            "idf": np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32),
+            "norm": self.k1 * (1 - self.b + self.b * doc_lens / doc_lens.mean()),
+        }
+        self._postings = [(terms, docs, tfs)]
+        self._doc_lens = [doc_lens.astype(np.int64)]
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, Dict]]:
+        if not self.texts:
+            return []
+        if self._index is None:
+            self._build()
+        index = self._index
+        docs, contrib = [], []
+        for term in {self.vocab[w] for w in query.split() if w in self.vocab}:
+            start, end = index["offsets"][term], index["offsets"][term + 1]
+            d, tf = index["docs"][start:end], index["tfs"][start:end]
+            docs.append(d)
+            contrib.append(index["idf"][term] * tf * (self.k1 + 1) / (tf + index["norm"][d]))
+        if not docs:
+            return []
+        candidates, inverse = np.unique(np.concatenate(docs), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(contrib))
+        return [(self.texts[candidates[i]], dict(self.metadata[candidates[i]], score=float(scores[i])))
+                for i in top_k(scores, k)]
+
+
+def _dense(encoder: SyntheticEncoder, encoding: str, **kwargs) -> DenseVectorRetriever:
+    return DenseVectorRetriever(encoder, CompressedVectorStore(encoder.table.shape[1], encoding=encoding, **kwargs))
+
+
+def build_backend(name: str, encoder: SyntheticEncoder, n_docs: int) -> Tuple[Callable, Callable]:
+    """Return (add(batch, start_id), search(query, k) -> doc ids) for a backend name"""
+    if name.startswith("dense_"):
+        kwargs = {"m": 16} if name == "dense_pq" else {}
+        retriever = _dense(encoder, name.split("_", 1)[1], **kwargs)
+
+        def add(batch, start):
+            retriever.add_documents(batch, [{"doc_id": start + i} for i in range(len(batch))])
+
+        def search(query, k):
+            return [meta["doc_id"] for _, meta in retriever.search(query, k=k)]
+        return add, search
+
+    if name == "sparse_bm25":
+        sparse = SparseBM25()
+
+        def add(batch, start):
+            sparse.add_documents(batch, [{"doc_id": start + i} for i in range(len(batch))])
+
+        def search(query, k):
+            return [meta["doc_id"] for _, meta in sparse.search(query, k=k)]
+        return add, search
+
+    num_centroids = 1 << int(np.log2(max(16, 4 * np.sqrt(n_docs * 40))))
+    plaid = PlaidColBERT(encoder=encoder, nbits=2, num_centroids=min(num_centroids, 1 << 16))
+    if name == "colbert_plaid":
+        def add(batch, start):
+            plaid.index(collection=batch)
+
+        def search(query, k):
+            return [r.docid for r in plaid.search(query, k=k)]
+        return add, search
+
+    if name == "hybrid":
+        from core.retriever import HybridRetriever
+        retriever = HybridRetriever({}, dense_retriever=_dense(encoder, "int8"),
+                                    colbert_searcher=plaid, result_cache_size=0)
+
+        def add(batch, start):
+            retriever.add_documents(batch)
+
+        def search(query, k):
+            return [item["metadata"]["doc_id"] for _, item in retriever.search(query, k=k, hybrid_weights=(0.5, 0.5, 0.0))]
+        return add, search
+
+    raise ValueError(f"Unknown backend: {name}")
+
+
+def run_backend(name: str,
+                corpus: SyntheticCorpus,
+                encoder: SyntheticEncoder,
+                queries: List[Tuple[str, int]],
+                k: int = 10,
+                batch_size: int = 10_000) -> Dict[str, float]:
+    add, search = build_backend(name, encoder, corpus.n_docs)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    doc_id = 0
+    for batch in corpus.batches(batch_size):
+        add(batch, doc_id)
+        doc_id += len(batch)
+    build_s = time.perf_counter() - start
+    memory_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+
+    for query, _ in queries[:5]:
+        search(query, k)  # warm-up
+
+    latencies, hits = [], 0
+    start = time.perf_counter()
+    for query, source in queries:
+        t = time.perf_counter()
+        found = search(query, k)
+        latencies.append((time.perf_counter() - t) * 1000)
+        hits += source in found
+    total_s = time.perf_counter() - start
+
+    return {
+        "recall_at_k": hits / len(queries),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "qps": len(queries) / total_s,
+        "build_s": build_s,
+        "memory_mb": memory_mb,
+    }
+
+
+def run_benchmark(scale: str = "10k",
+                  backends=DEFAULT_BACKENDS,
+                  n_queries: int = 200,
+                  k: int = 10,
+                  seed: int = 0) -> Dict[str, Any]:
+    corpus = SyntheticCorpus(SCALES[scale], seed=seed)
+    encoder = SyntheticEncoder(vocab_size=corpus.vocab_size, seed=seed)
+    queries = corpus.queries(n_queries)
+    return {
+        "scale": scale,
+        "n_docs": corpus.n_docs,
+        "n_queries": len(queries),
+        "k": k,
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "backends": {name: run_backend(name, corpus, encoder, queries, k) for name in backends},
+    }
+
+
+def compare_to_baseline(current: Dict[str, Any],
+                        baseline: Dict[str, Any],
+                        latency_tolerance: float = 0.2,
+                        recall_tolerance: float = 0.02) -> List[str]:
+    """Human-readable regressions of current vs baseline (empty list = no regressions)"""
+    regressions = []
+    for name, metrics in current["backends"].items():
+        base = baseline.get("backends", {}).get(name)
+        if not base:
+            continue
+        if metrics["recall_at_k"] < base["recall_at_k"] - recall_tolerance:
+            regressions.append(f"{name}: recall@k {base['recall_at_k']:.3f} -> {metrics['recall_at_k']:.3f}")
+        for key in ("p50_ms", "p99_ms"):
+            if metrics[key] > base[key] * (1 + latency_tolerance):
+                regressions.append(f"{name}: {key} {base[key]:.2f} -> {metrics[key]:.2f}")
+        if metrics["qps"] < base["qps"] * (1 - latency_tolerance):
+            regressions.append(f"{name}: qps {base['qps']:.1f} -> {metrics['qps']:.1f}")
+    return regressions
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{report['n_docs']:,} docs, {report['n_queries']} queries, k={report['k']}",
+             f"{'backend':<16}{'recall':>8}{'p50 ms':>9}{'p99 ms':>9}{'qps':>9}{'build s':>9}{'mem MB':>9}"]
+    for name, m in report["backends"].items():
+        lines.append(f"{name:<16}{m['recall_at_k']:>8.3f}{m['p50_ms']:>9.2f}{m['p99_ms']:>9.2f}"
+                     f"{m['qps']:>9.1f}{m['build_s']:>9.1f}{m['memory_mb']:>9.1f}")
+    return "\n".join(lines)
+
+
+@pytest.fixture(scope="module")
+def report():
+    return run_benchmark("10k", n_queries=200)
+
+class TestRetrievalBenchmark:
+    def test_known_item_recall(self, report):
+        print("\n" + format_report(report))
+        # Mean-pooled dense vectors only see the topic mix; token-level matching finds the document
+        floors = {"dense": 0.25, "sparse": 0.9, "colbert": 0.9, "hybrid": 0.9}
+        for name, metrics in report["backends"].items():
+            floor = floors[name.split("_")[0]]
+            assert metrics["recall_at_k"] >= floor, f"{name} recall below expected floor"
+            assert metrics["qps"] > 0 and metrics["p99_ms"] >= metrics["p50_ms"]
+
+    def test_against_baseline(self, report):
+        baseline_path = os.environ.get("RETRIEVAL_BASELINE")
+        if not baseline_path or not Path(baseline_path).exists():
+            pytest.skip("Set RETRIEVAL_BASELINE to a saved baseline JSON to compare")
+        regressions = compare_to_baseline(report, json.loads(Path(baseline_path).read_text()))
+        assert not regressions, "Retrieval regressions:\n" + "\n".join(regressions)
+
+    def test_regression_detection(self):
+        base = {"backends": {"dense": {"recall_at_k": 0.9, "p50_ms": 1.0, "p99_ms": 2.0, "qps": 500}}}
+        slower = {"backends": {"dense": {"recall_at_k": 0.9, "p50_ms": 1.5, "p99_ms": 2.1, "qps": 450}}}
+        assert compare_to_baseline(base, base) == []
+        assert compare_to_baseline(slower, base) == ["dense: p50_ms 1.00 -> 1.50"]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k")
+    parser.add_argument("--backends", default=",".join(DEFAULT_BACKENDS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite --baseline with this run")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.scale, args.backends.split(","), args.queries, args.k)
+    print(format_report(report))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = Path(args.baseline)
+        if args.update_baseline or not baseline.exists():
+            baseline.write_text(json.dumps(report, indent=2))
+            print(f"Baseline written to {baseline}")
+            return 0
+        regressions = compare_to_baseline(report, json.loads(baseline.read_text()))
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
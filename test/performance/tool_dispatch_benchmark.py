@@ -0,0 +1,50 @@
+import time
+import pytest
+from dataclasses import dataclass
+from typing import Any, List, Optional
+from core.agent import BaseAgent, Tool
+from core.tool_validation import ArgumentValidator
+
+@dataclass
+class Param:
+    name: str
+    type: str
+    required: bool = False
+    default: Any = None
+    enum: Optional[List[str]] = None
+
+class CatalogAgent(BaseAgent):
+    """Agent whose tool_<name> handlers are generated for a large catalog"""
+    def generate(self, prompt: str, **kwargs) -> str:
+        return prompt
+
+    def __getattr__(self, name):
+        if name.startswith("tool_"):
+            return lambda **params: params
+        raise AttributeError(name)
+
+def per_call_seconds(fn, calls=20_000):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+class TestToolDispatch:
+    @pytest.mark.parametrize("sizes", [(10, 5_000)])
+    def test_dispatch_cost_is_independent_of_registry_size(self, sizes):
+        timings = {}
+        for size in sizes:
+            agent = CatalogAgent(llm=None, memory=None,
+                                 tools=[Tool(name=f"t{i}", description="", parameters={}) for i in range(size)])
+            last = f"t{size - 1}"
+            timings[size] = per_call_seconds(lambda: agent.run_tool(last, {"x": 1}))
+            print(f"\n{size:>5} tools: {timings[size] * 1e6:.2f} us/call")
+        assert timings[sizes[-1]] < timings[sizes[0]] * 2, "Dispatch should not scan the registry"
+
+    def test_validator_overhead(self):
+        params = [Param(f"p{i}", "integer", default=i, enum=[str(j) for j in range(100)]) for i in range(20)]
+        validate = ArgumentValidator(params)
+        arguments = {f"p{i}": 99 for i in range(20)}
+        seconds = per_call_seconds(lambda: validate(arguments))
+        print(f"\n20-parameter validation: {seconds * 1e6:.2f} us/call")
+        assert seconds < 50e-6
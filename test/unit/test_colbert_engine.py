@@ -0,0 +1,95 @@
+import pytest
+import numpy as np
+from core.colbert_engine import PlaidColBERT
+
+def _normalize(x):
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(0)
+    topics = rng.normal(size=(40, 32))
+    docs = []
+    for _ in range(400):
+        picks = rng.choice(40, size=rng.integers(8, 24))
+        docs.append((topics[picks] + 0.3 * rng.normal(size=(len(picks), 32))).astype(np.float32))
+    engine = PlaidColBERT(nbits=4, nprobe=8, ndocs=64)
+    engine.add_embeddings(docs[:200], texts=[f"doc {i}" for i in range(200)])
+    engine.add_embeddings(docs[200:], texts=[f"doc {i}" for i in range(200, 400)])
+    return engine, docs
+
+class TestPlaidColBERT:
+    def _brute_force(self, docs, Q, k):
+        Q = _normalize(Q)
+        scores = np.array([(_normalize(d) @ Q.T).max(axis=0).sum() for d in docs])
+        return np.argsort(-scores)[:k]
+
+    def test_matches_exhaustive_maxsim(self, corpus):
+        engine, docs = corpus
+        rng = np.random.default_rng(1)
+        overlap = []
+        for source in rng.choice(len(docs), size=10, replace=False):
+            Q = docs[source][:6] + 0.05 * rng.normal(size=(min(6, len(docs[source])), 32))
+            pids, _ = engine.search_embeddings(Q, k=5)
+            assert pids[0] == source, "The passage the query was drawn from should rank first"
+            overlap.append(len(set(pids) & set(self._brute_force(docs, Q, 5))) / 5)
+        assert np.mean(overlap) >= 0.8, "Pruned search should closely track exhaustive MaxSim"
+
+    def test_pid_filter(self, corpus):
+        engine, docs = corpus
+        pids, scores = engine.search_embeddings(docs[10][:4], k=3, pids=[5, 10, 15])
+        assert set(pids) == {5, 10, 15}
+        assert pids[0] == 10 and np.all(np.diff(scores) <= 0)
+
+    def test_memory_mapped_reload(self, corpus, tmp_path):
+        engine, docs = corpus
+        engine.save(str(tmp_path))
+        reloaded = PlaidColBERT(nprobe=8, ndocs=64)
+        reloaded.load(str(tmp_path))
+        assert isinstance(reloaded.residuals, np.memmap), "Large arrays should stay on disk"
+        expected = engine.search_embeddings(docs[3][:4], k=5)
+        actual = reloaded.search_embeddings(docs[3][:4], k=5)
+        np.testing.assert_array_equal(actual[0], expected[0])
+        assert reloaded.collection[3] == "doc 3"
+
+    def test_incremental_adds_match_full_rebuild(self, corpus):
+        _, docs = corpus
+        engine = PlaidColBERT(nbits=4, nprobe=8, ndocs=64)
+        for start in range(0, 400, 10):
+            engine.add_embeddings(docs[start:start + 10])
+        assert engine._trained_tokens > len(docs[0]) * 10, "Growth should have refreshed the codec"
+
+        incremental = engine._generate_candidates(engine.codec.centroids @ _normalize(docs[7][:4]).T)
+        engine._build_ivf()
+        rebuilt = engine._generate_candidates(engine.codec.centroids @ _normalize(docs[7][:4]).T)
+        np.testing.assert_array_equal(incremental, rebuilt)
+        pids, _ = engine.search_embeddings(docs[7][:6], k=3)
+        assert pids[0] == 7
+
+    def test_add_after_reload(self, corpus, tmp_path):
+        engine, docs = corpus
+        engine.save(str(tmp_path))
+        reloaded = PlaidColBERT(nprobe=8, ndocs=64)
+        reloaded.load(str(tmp_path))
+        reloaded.add_embeddings([docs[0][::-1]], texts=["appended"])
+        assert len(reloaded) == 401 and reloaded.collection[-1] == "appended"
+        pids, _ = reloaded.search_embeddings(docs[0][::-1][:6], k=2)
+        assert 400 in pids
+
+    def test_save_over_loaded_index(self, corpus, tmp_path):
+        engine, docs = corpus
+        engine.save(str(tmp_path))
+        reloaded = PlaidColBERT(nprobe=8, ndocs=64)
+        reloaded.load(str(tmp_path))
+        reloaded.save(str(tmp_path))  # unchanged save over its own memory-mapped files
+        reloaded.add_embeddings([docs[0][::-1]], texts=["appended"])
+        reloaded.save(str(tmp_path))
+
+        again = PlaidColBERT(nprobe=8, ndocs=64)
+        again.load(str(tmp_path))
+        np.testing.assert_array_equal(again.codec.centroids, engine.codec.centroids)
+        assert len(again) == 401
+        pids, scores = again.search_embeddings(docs[3][:4], k=3)
+        assert pids[0] == 3 and scores[0] > 0
+        pids, _ = again.search_embeddings(docs[0][::-1][:6], k=2)
+        assert 400 in pids
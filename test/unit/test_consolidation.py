@@ -0,0 +1,136 @@
+import time
+import threading
+import pytest
+import numpy as np
+from core.consolidation import MemoryConsolidator
+from core.memory import AgentMemory, MemoryItem
+
+class RecordingRetriever:
+    def __init__(self, fail_times: int = 0):
+        self.batches = []
+        self.fail_times = fail_times
+        self.lock = threading.Lock()
+
+    def add_documents(self, documents, metadata=None):
+        with self.lock:
+            if self.fail_times:
+                self.fail_times -= 1
+                raise RuntimeError("index unavailable")
+            self.batches.append(list(zip(documents, metadata)))
+
+    @property
+    def documents(self):
+        return [doc for batch in self.batches for doc, _ in batch]
+
+class EmbeddingRetriever(RecordingRetriever):
+    def __init__(self, embedder):
+        super().__init__()
+        self.embedder = embedder
+        self.received = []
+
+    def add_documents(self, documents, metadata=None, embeddings=None):
+        self.received.append(embeddings)
+        super().add_documents(documents, metadata)
+
+def item(text, importance=0.5, ts=None, embedding=None, **metadata):
+    return MemoryItem(content=text, metadata=metadata, importance=importance,
+                      timestamp=ts or time.time(), embedding=embedding)
+
+class TestMemoryConsolidator:
+    def test_commits_in_size_batches(self):
+        retriever = RecordingRetriever()
+        consolidator = MemoryConsolidator(retriever, batch_size=10, flush_interval=60)
+        for i in range(25):
+            consolidator.submit(item(f"memory {i}"))
+        consolidator.close()
+
+        assert [len(b) for b in retriever.batches] == [10, 10, 5], "Size threshold then flush-on-close"
+        assert consolidator.stats.committed == 25
+
+    def test_flushes_on_interval(self):
+        retriever = RecordingRetriever()
+        consolidator = MemoryConsolidator(retriever, batch_size=1000, flush_interval=0.05)
+        consolidator.submit(item("lonely memory"))
+        deadline = time.time() + 2
+        while not retriever.batches and time.time() < deadline:
+            time.sleep(0.01)
+        assert retriever.documents == ["lonely memory"]
+        consolidator.close()
+
+    def test_merges_duplicates(self):
+        retriever = RecordingRetriever()
+        consolidator = MemoryConsolidator(retriever, batch_size=100, flush_interval=60)
+        consolidator.submit(item("User prefers  dark mode", importance=0.3, ts=1.0, source="chat"))
+        consolidator.submit(item("user prefers dark mode", importance=0.9, ts=2.0, channel="web"))
+        consolidator.flush()
+        consolidator.submit(item("USER PREFERS DARK MODE"))
+        consolidator.close()
+
+        [(text, meta)] = retriever.batches[0]
+        assert text == "user prefers dark mode"
+        assert meta["importance"] == 0.9 and meta["source"] == "chat" and meta["channel"] == "web"
+        assert len(retriever.batches) == 1, "Already committed memories should not be re-added"
+        assert consolidator.stats.merged == 1 and consolidator.stats.skipped == 1
+
+    def test_failed_commit_is_retried(self):
+        retriever = RecordingRetriever(fail_times=1)
+        consolidator = MemoryConsolidator(retriever, batch_size=100, flush_interval=60)
+        consolidator.submit(item("keep me"))
+        with pytest.raises(RuntimeError):
+            consolidator.flush()
+        consolidator.flush()
+        consolidator.close()
+        assert retriever.documents == ["keep me"]
+        assert consolidator.stats.failed_batches == 1
+
+    def test_outage_applies_backpressure(self):
+        retriever = RecordingRetriever(fail_times=10**9)
+        consolidator = MemoryConsolidator(retriever, batch_size=5, flush_interval=0.02, max_queue=5)
+        writer = threading.Thread(target=lambda: [consolidator.submit(item(f"m{i}")) for i in range(30)])
+        writer.start()
+        writer.join(0.5)
+        assert writer.is_alive(), "submit should block once the queue is full"
+        assert len(consolidator._pending) == 5, "Pending items are capped at one batch during an outage"
+        with pytest.raises(RuntimeError):
+            consolidator.flush()
+
+        retriever.fail_times = 0
+        writer.join(5)
+        assert not writer.is_alive()
+        consolidator.close()
+        assert sorted(retriever.documents) == sorted(f"m{i}" for i in range(30))
+
+    def test_close_during_outage_does_not_hang(self):
+        retriever = RecordingRetriever(fail_times=10**9)
+        consolidator = MemoryConsolidator(retriever, batch_size=2, flush_interval=0.02, max_queue=2)
+        for i in range(4):
+            consolidator.submit(item(f"m{i}"))
+        with pytest.raises(RuntimeError):
+            consolidator.close()
+        assert consolidator.pending() == 4
+
+    def test_embeddings_only_for_the_same_model(self):
+        model, other = object(), object()
+        for embedder, passed in ((model, True), (other, False), (None, False)):
+            retriever = EmbeddingRetriever(model)
+            consolidator = MemoryConsolidator(retriever, batch_size=10, flush_interval=60, embedder=embedder)
+            consolidator.submit(item("vector memory", embedding=np.array([0.1, 0.2])))
+            consolidator.close()
+            assert (retriever.received[0] is not None) == passed
+
+class TestAgentMemoryConsolidation:
+    def test_evicted_and_important_items_reach_long_term(self):
+        retriever = RecordingRetriever()
+        consolidator = MemoryConsolidator(retriever, batch_size=100, flush_interval=60)
+        memory = AgentMemory(short_term_capacity=3, long_term_retriever=retriever,
+                             consolidator=consolidator, consolidate_importance=0.8)
+
+        memory.add("critical fact", importance=0.95)
+        for i in range(4):
+            memory.add(f"turn {i}")
+        memory.add("explicit long-term note", memory_type="long_term")
+        assert retriever.batches == [], "Writes should only be queued"
+
+        memory.close()
+        # "critical fact" was promoted on write and again on eviction; it is stored once
+        assert sorted(retriever.documents) == ["critical fact", "explicit long-term note", "turn 0"]
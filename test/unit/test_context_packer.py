@@ -0,0 +1,62 @@
+import pytest
+from core.context_packer import ContextChunk, ContextPacker
+from core.ingestion import SourceDocument, TokenChunker
+from core.memory import MemoryItem
+
+def retrieval_result(text, score, **metadata):
+    return (text, {"text": text, "score": score, "metadata": metadata})
+
+class TestContextPacker:
+    @pytest.fixture
+    def filing(self):
+        doc = SourceDocument(source_id="10-K", text=" ".join(f"w{i}" for i in range(60)))
+        return list(TokenChunker(chunk_size=20, overlap=5).chunk(doc))
+
+    def test_respects_token_budget(self):
+        packer = ContextPacker(token_budget=12)
+        results = [retrieval_result(" ".join(f"doc{i}_{j}" for j in range(5)), score=1.0 - i / 10, doc_id=i)
+                   for i in range(5)]
+        packed = packer.pack(results)
+
+        assert packed.tokens <= 12 and len(packed.chunks) == 2
+        assert {c.metadata["doc_id"] for c in packed.chunks} == {0, 1}, "Best-scoring chunks should win"
+        assert packed.dropped == 3
+
+    def test_overlapping_spans_are_merged(self, filing):
+        packer = ContextPacker(token_budget=1000)
+        results = [retrieval_result(c.text, score=1.0, **c.metadata) for c in filing[:2]]
+        packed = packer.pack(results)
+
+        assert len(packed.chunks) == 1
+        assert packed.chunks[0].text == " ".join(f"w{i}" for i in range(35))
+        assert packed.tokens == 35, "Overlapping tokens should be paid for once"
+
+    def test_duplicates_keep_best_copy(self):
+        packer = ContextPacker(token_budget=1000)
+        text = "the quarterly revenue grew twelve percent on strong services demand"
+        packed = packer.pack([
+            retrieval_result(text, 0.4, doc_id=1),
+            retrieval_result(text.upper(), 0.9, doc_id=2),
+            retrieval_result(text + " overall", 0.5, doc_id=3),
+        ])
+        assert [c.metadata["doc_id"] for c in packed.chunks] == [2]
+
+    def test_order_is_stable_across_queries(self, filing):
+        packer = ContextPacker(token_budget=1000)
+        memories = [MemoryItem(content="user owns AAPL", metadata={}, timestamp=1.0, score=0.2),
+                    MemoryItem(content="user is risk averse", metadata={}, timestamp=2.0, score=0.9)]
+        first = packer.pack([retrieval_result(filing[2].text, 0.3, **filing[2].metadata),
+                             retrieval_result("unrelated note", 0.8, source_id="a")], memories)
+        second = packer.pack([retrieval_result("unrelated note", 0.1, source_id="a"),
+                              retrieval_result(filing[2].text, 0.95, **filing[2].metadata)], memories[::-1])
+
+        assert first.text == second.text, "Score changes should not reorder the prompt"
+        assert first.text.endswith("user owns AAPL\n\nuser is risk averse")
+
+    def test_token_counts_are_cached(self):
+        calls = []
+        packer = ContextPacker(token_budget=100, tokenizer=lambda text: calls.append(text) or text.split())
+        chunk = ContextChunk(text="one two three", score=1.0)
+        packer.pack([chunk])
+        packer.pack([chunk])
+        assert calls == ["one two three"]
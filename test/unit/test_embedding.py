@@ -0,0 +1,102 @@
+import gc
+import threading
+import pytest
+import numpy as np
+from core.embedding import EmbeddingService, embed_texts, embedding_service
+
+class CountingEmbedder:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def embed_batch(self, texts):
+        self.batch_sizes.append(len(texts))
+        return np.array([[len(t), 1.0, 0.0] for t in texts], dtype=np.float64)
+
+class TestEmbeddingService:
+    @pytest.fixture
+    def embedder(self):
+        return CountingEmbedder()
+
+    def test_batch_returns_float32(self, embedder):
+        service = EmbeddingService(embedder)
+        vectors = service.embed_batch(["a", "bb", "a"])
+        assert vectors.dtype == np.float32 and vectors.shape == (3, 3)
+        assert embedder.batch_sizes == [2], "Duplicate texts should be embedded once"
+
+    def test_memory_cache_hit(self, embedder):
+        service = EmbeddingService(embedder)
+        first = service.embed("hello")
+        second = service.embed("hello")
+        assert second is first, "Cached vectors should be returned without copying"
+        assert not second.flags.writeable, "Shared cached vectors must be read-only"
+        assert service.stats.memory_hits == 1
+
+    def test_concurrent_calls_coalesce(self, embedder):
+        service = EmbeddingService(embedder, max_wait_ms=50)
+        results = {}
+        threads = [threading.Thread(target=lambda i=i: results.setdefault(i, service.embed(f"text {i}")))
+                   for i in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        service.close()
+
+        assert len(results) == 16
+        assert sum(embedder.batch_sizes) == 16
+        assert len(embedder.batch_sizes) < 16, "Concurrent single calls should share model batches"
+
+    def test_disk_cache_survives_restart(self, embedder, tmp_path):
+        path = str(tmp_path / "emb.sqlite")
+        service = EmbeddingService(embedder, cache_path=path)
+        expected = service.embed_batch(["persisted"])[0]
+        service.close()
+
+        restarted = EmbeddingService(CountingEmbedder(), cache_path=path)
+        np.testing.assert_array_equal(restarted.embed("persisted"), expected)
+        assert restarted.stats.disk_hits == 1
+        assert restarted.embedder.batch_sizes == [], "Disk hits should not call the model"
+
+    def test_single_text_batches_coalesce(self, embedder):
+        service = EmbeddingService(embedder, max_wait_ms=50)
+        threads = [threading.Thread(target=embed_texts, args=(service, [f"text {i}"])) for i in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        service.close()
+        assert len(embedder.batch_sizes) < 16, "Batches of one should go through the coalescing embed() path"
+
+    def test_config_shares_one_service_per_embedder(self, embedder):
+        config = {"embedding": {"max_wait_ms": 1.0}}
+        service = embedding_service(embedder, config)
+        assert isinstance(service, EmbeddingService) and service.embedder is embedder
+        assert embedding_service(embedder, config) is service
+        assert embedding_service(service, config) is service
+        assert embedding_service(embedder, {"embedding": {"enabled": False}}) is embedder
+        assert embedding_service(None, config) is None
+
+    def test_registry_is_keyed_on_config_and_held_weakly(self, embedder):
+        fast = embedding_service(embedder, {"embedding": {"max_wait_ms": 1.0}})
+        slow = embedding_service(embedder, {"embedding": {"max_wait_ms": 50.0}})
+        assert fast is not slow and slow.max_wait == pytest.approx(0.05)
+        assert embedding_service(embedder, {"embedding": {"max_wait_ms": 1.0}}) is fast
+
+        del fast, slow
+        gc.collect()
+        other = CountingEmbedder()
+        assert embedding_service(other, {"embedding": {"max_wait_ms": 1.0}}).embedder is other
+
+    def test_stats_are_exact_under_concurrency(self, embedder):
+        service = EmbeddingService(embedder)
+        def work(i):
+            for j in range(200):
+                service.embed_batch([f"{i}-{j}", "shared"])
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = service.stats
+        assert stats.computed == sum(embedder.batch_sizes) and stats.batches == len(embedder.batch_sizes)
+        assert stats.memory_hits + stats.computed == 8 * 200 * 2
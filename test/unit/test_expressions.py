@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from core.expressions import ExpressionEngine
+
+class TestExpressionEngine:
+    @pytest.fixture
+    def engine(self):
+        return ExpressionEngine(cache_size=2)
+
+    def test_arithmetic(self, engine):
+        assert engine.evaluate("2 + 3 * 4") == 14
+        assert engine.evaluate("sqrt(16) + max(1, 2, 3) - abs(-1)") == 6
+        assert engine.evaluate("price / eps", price=150, eps=6) == 25
+
+    @pytest.mark.parametrize("expression", [
+        "__import__('os').system('true')",
+        "().__class__.__bases__",
+        "open('/etc/passwd')",
+        "[x for x in range(10)]",
+        "a[0]",
+        "lambda: 1",
+        "'text' * 3",
+    ])
+    def test_rejects_unsafe_syntax(self, engine, expression):
+        with pytest.raises(ValueError):
+            engine.evaluate(expression, a=1)
+
+    def test_integer_literals_are_kept(self, engine):
+        result = engine.evaluate("2 + 2")
+        assert result == 4 and isinstance(result, int)
+        assert engine.evaluate("2 ** 10") == 1024 and isinstance(engine.evaluate("2 ** 10"), int)
+        assert engine.evaluate("round(x, 2)", x=3.14159) == 3.14
+        assert engine.evaluate_batch("round(x, 2)", {"x": [1.234, 5.678]}).tolist() == [1.23, 5.68]
+        assert engine.evaluate_batch("x ** 2", {"x": [2.0, 3.0]}).tolist() == [4.0, 9.0]
+
+    def test_runaway_and_invalid_math(self, engine):
+        with pytest.raises(ValueError, match="Calculation failed"):
+            engine.evaluate("9 ** 9 ** 9")
+        with pytest.raises(ValueError, match="Calculation failed"):
+            engine.evaluate_batch("x + 9 ** 9 ** 9", {"x": [1.0]})
+        with pytest.raises(ValueError, match="Calculation failed"):
+            engine.evaluate("1 / 0")
+        with pytest.raises(ValueError, match="Missing values for: eps"):
+            engine.evaluate("price / eps", price=1)
+
+    def test_batch_matches_scalar(self, engine):
+        rng = np.random.default_rng(0)
+        columns = {"total_debt": rng.uniform(1, 100, 1000), "total_equity": rng.uniform(1, 100, 1000)}
+        batch = engine.evaluate_batch("total_debt / total_equity", columns)
+        assert batch.shape == (1000,)
+        assert batch[7] == pytest.approx(engine.evaluate("total_debt / total_equity",
+                                                         total_debt=columns["total_debt"][7],
+                                                         total_equity=columns["total_equity"][7]))
+        assert np.isinf(engine.evaluate_batch("a / b", {"a": [1.0, 2.0], "b": [1.0, 0.0]})[1]), \
+            "A bad row should not fail the batch"
+
+    def test_compiled_expressions_are_cached(self, engine):
+        for _ in range(3):
+            engine.evaluate("x  *  2", x=1)
+        engine.evaluate("x + 1", x=1)
+        engine.evaluate("x + 2", x=1)
+        assert engine.stats.hits == 2 and engine.stats.misses == 3
+        assert engine.stats.evictions == 1
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from core.event_loop import run_sync
+from core.http_pool import HTTPClientPool
+
+class CountingHandler(BaseHTTPRequestHandler):
+    """Keep-alive JSON endpoint; one handler instance per TCP connection"""
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with CountingHandler.lock:
+            CountingHandler.connections += 1
+
+    def do_GET(self):
+        with CountingHandler.lock:
+            CountingHandler.active += 1
+            CountingHandler.peak = max(CountingHandler.peak, CountingHandler.active)
+        if "slow" in self.path:
+            threading.Event().wait(0.05)
+        body = json.dumps({"results": [self.path]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with CountingHandler.lock:
+            CountingHandler.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://localhost:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture(autouse=True)
+def reset_counts():
+    CountingHandler.connections = CountingHandler.peak = 0
+
+class TestHTTPClientPool:
+    def test_connections_are_reused(self, server):
+        pool = HTTPClientPool()
+
+        async def run():
+            for i in range(20):
+                response = await pool.get(f"{server}/search?q={i}")
+                assert response.json() == {"results": [f"/search?q={i}"]}
+            await pool.aclose()
+
+        asyncio.run(run())
+        assert CountingHandler.connections == 1, "Sequential requests should share one keep-alive connection"
+        assert pool.stats.connections_opened == 1 and pool.stats.reuse_ratio == pytest.approx(0.95)
+        assert pool.stats.dns_misses == 1 and pool.stats.dns_hits == 0, "Resolved once per new connection"
+
+    def test_per_host_limit(self, server):
+        pool = HTTPClientPool(per_host_limit=2)
+
+        async def run():
+            await asyncio.gather(*(pool.get(f"{server}/slow/{i}") for i in range(8)))
+            await pool.aclose()
+
+        asyncio.run(run())
+        assert CountingHandler.peak <= 2
+        assert CountingHandler.connections == 2
+
+    def test_dns_is_cached_across_connections(self, server):
+        pool = HTTPClientPool(max_keepalive=0)
+
+        async def run():
+            for _ in range(3):
+                await pool.get(f"{server}/q")
+            await pool.aclose()
+
+        asyncio.run(run())
+        assert pool.stats.connections_opened == 3
+        assert pool.stats.dns_misses == 1 and pool.stats.dns_hits == 2
+
+    def test_client_per_event_loop(self, server):
+        pool = HTTPClientPool()
+        for _ in range(2):
+            response = asyncio.run(pool.get(f"{server}/q"))
+            assert response.status_code == 200, "A new loop gets a fresh client instead of dead connections"
+
+    def test_dead_loop_clients_are_released(self, server):
+        pool = HTTPClientPool()
+        asyncio.run(pool.get(f"{server}/q"))
+        asyncio.run(pool.get(f"{server}/q"))
+        assert len(pool._clients) == 1, "The first loop's client should be dropped once that loop closed"
+        assert len(pool._backend._streams) == 1
+
+    def test_sync_turns_share_connections(self, server):
+        pool = HTTPClientPool()
+        for i in range(5):
+            assert run_sync(pool.get(f"{server}/turn/{i}")).status_code == 200
+        assert CountingHandler.connections == 1, "Synchronous turns should reuse the keep-alive connection"
+        run_sync(pool.aclose())
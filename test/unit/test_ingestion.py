@@ -0,0 +1,98 @@
+import json
+import pytest
+import numpy as np
+from core.ingestion import _MERSENNE_PRIME, BloomFilter, IngestionPipeline, MinHashDeduper, SourceDocument, TokenChunker
+
+class RecordingRetriever:
+    def __init__(self):
+        self.batches = []
+
+    def add_documents(self, documents, metadata=None, embeddings=None):
+        self.batches.append((documents, metadata, embeddings))
+
+class TestIngestion:
+    @pytest.fixture
+    def corpus(self):
+        return [f"filing {i} " + " ".join(f"word{i}_{j}" for j in range(40)) for i in range(20)]
+
+    def test_chunker_overlap(self):
+        chunker = TokenChunker(chunk_size=10, overlap=3)
+        doc = SourceDocument(source_id="d", text=" ".join(str(i) for i in range(25)))
+        chunks = list(chunker.chunk(doc))
+        assert [c.text.split()[0] for c in chunks] == ["0", "7", "14", "21"], "Windows should advance by size - overlap"
+        assert all(len(c.text.split()) <= 10 for c in chunks)
+        assert chunks[-1].text.split()[-1] == "24", "Last window should reach the end of the document"
+
+    def test_near_duplicates_dropped(self):
+        deduper = MinHashDeduper()
+        text = " ".join(f"token{i}" for i in range(200))
+        assert not deduper.is_duplicate(text)
+        assert deduper.is_duplicate(text + " trailing"), "Near-identical chunk should collide"
+        assert not deduper.is_duplicate(" ".join(f"other{i}" for i in range(200)))
+
+    def test_signature_matches_exact_arithmetic(self):
+        deduper = MinHashDeduper(bands=2, rows=3)
+        text = " ".join(f"token{i}" for i in range(30))
+        shingles = [int(x) for x in deduper._shingles(text)]
+        expected = [min((int(a) * x + int(b)) % _MERSENNE_PRIME for x in shingles)
+                    for a, b in zip(deduper._a, deduper._b)]
+        assert deduper.signature(text).tolist() == expected
+
+    def test_bloom_filter_is_fixed_size(self):
+        bloom = BloomFilter(capacity=10_000, error_rate=1e-3)
+        size = bloom.bits.nbytes
+        keys = np.random.default_rng(0).integers(-2**63, 2**63 - 1, size=20_000, dtype=np.int64)
+        bloom.add(keys[:10_000])
+        assert bloom.contains(keys[:10_000]).all(), "Added keys are always reported present"
+        assert bloom.contains(keys[10_000:]).mean() < 5e-3
+        assert bloom.bits.nbytes == size
+
+    def test_batched_commit_with_embeddings(self, corpus):
+        retriever = RecordingRetriever()
+        embedder = type("E", (), {"embed_batch": lambda self, texts: np.ones((len(texts), 4))})()
+        stats = IngestionPipeline(retriever, embedder=embedder, chunk_size=16, overlap=4, batch_size=8).run(corpus)
+
+        assert stats.documents == 20
+        assert stats.chunks == sum(len(b[0]) for b in retriever.batches)
+        assert all(b[2].dtype == np.float32 and len(b[2]) == len(b[0]) for b in retriever.batches)
+        assert stats.peak_rss_mb > 0
+
+    def test_resume_from_checkpoint(self, corpus, tmp_path):
+        checkpoint = tmp_path / "ingest.json"
+        first = RecordingRetriever()
+        IngestionPipeline(first, chunk_size=16, overlap=4, batch_size=8,
+                          checkpoint_path=str(checkpoint)).run(corpus[:10])
+        assert json.loads(checkpoint.read_text())["documents_done"] == 10
+
+        second = RecordingRetriever()
+        stats = IngestionPipeline(second, chunk_size=16, overlap=4, batch_size=8,
+                                  checkpoint_path=str(checkpoint)).run(corpus)
+        assert stats.skipped_documents == 10, "Committed documents should not be re-ingested"
+        assert stats.documents == 10
+
+        third = RecordingRetriever()
+        stats = IngestionPipeline(third, chunk_size=16, overlap=4, batch_size=8).run(corpus[:10])
+        replayed = IngestionPipeline(RecordingRetriever(), chunk_size=16, overlap=4, batch_size=8,
+                                     checkpoint_path=str(checkpoint))
+        replayed._load_checkpoint()
+        assert all(replayed.deduper.is_duplicate(text) for batch in third.batches for text in batch[0]), \
+            "Band keys persisted with the checkpoint should be restored on resume"
+
+    def test_keys_past_the_checkpoint_are_discarded(self, corpus, tmp_path):
+        checkpoint = tmp_path / "ingest.json"
+        IngestionPipeline(RecordingRetriever(), chunk_size=16, overlap=4, batch_size=8,
+                          checkpoint_path=str(checkpoint)).run(corpus[:10])
+
+        # Crash after the band keys of documents 10-19 hit disk but before the checkpoint did
+        crashed = IngestionPipeline(RecordingRetriever(), chunk_size=16, overlap=4, batch_size=8,
+                                    checkpoint_path=str(checkpoint))
+        for i, text in enumerate(corpus[10:]):
+            for chunk in crashed.chunker.chunk(SourceDocument(source_id=str(i), text=text)):
+                crashed.deduper.is_duplicate(chunk.text)
+        crashed.deduper.save(crashed._lsh_path)
+
+        resumed = RecordingRetriever()
+        stats = IngestionPipeline(resumed, chunk_size=16, overlap=4, batch_size=8,
+                                  checkpoint_path=str(checkpoint)).run(corpus)
+        assert stats.documents == 10 and stats.duplicates == 0
+        assert resumed.batches, "Uncommitted documents must not be dropped as their own duplicates"
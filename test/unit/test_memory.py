@@ -0,0 +1,134 @@
+import time
+import pytest
+import numpy as np
+from core.memory import AgentMemory, MemoryBuffer, MemoryItem
+
+class WordEmbedder:
+    """Bag-of-words vectors over a fixed vocabulary"""
+    VOCAB = ["invoice", "refund", "shipping", "password", "weather", "python", "deploy", "billing"]
+
+    def embed_batch(self, texts):
+        return [[float(w in t.split()) for w in self.VOCAB] for t in texts]
+
+class TestMemoryBuffer:
+    def test_ring_buffer_evicts_oldest(self):
+        buffer = MemoryBuffer(capacity=3)
+        evicted = [buffer.append(MemoryItem(content=str(i), metadata={})) for i in range(5)]
+
+        assert [e.content if e else None for e in evicted] == [None, None, None, "0", "1"]
+        assert [item.content for item in buffer] == ["2", "3", "4"]
+        assert len(buffer) == 3
+
+    def test_ring_grows_lazily_to_capacity(self):
+        buffer = MemoryBuffer(capacity=10000)
+        assert buffer._size() < 10000, "An empty ring should not preallocate its capacity"
+        for i in range(200):
+            buffer.append(MemoryItem(content=str(i), metadata={}, embedding=np.ones(8)))
+        assert 200 <= buffer._size() < 10000
+        assert buffer.embeddings.shape[0] == buffer._size()
+        assert [item.content for item in buffer][:3] == ["0", "1", "2"]
+
+        small = MemoryBuffer(capacity=100)
+        for i in range(150):
+            small.append(MemoryItem(content=str(i), metadata={}))
+        assert small._size() == 100 and [item.content for item in small][0] == "50"
+
+    def test_unbounded_buffer_grows(self):
+        buffer = MemoryBuffer()
+        for i in range(200):
+            buffer.append(MemoryItem(content=str(i), metadata={}, embedding=np.ones(4)))
+        assert [item.content for item in buffer] == [str(i) for i in range(200)]
+        assert buffer.embeddings.shape[0] >= 200
+
+    def test_vectorized_scores_match_formula(self):
+        buffer = MemoryBuffer(capacity=8)
+        now = time.time()
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(6, 4))
+        for i, v in enumerate(vectors):
+            buffer.append(MemoryItem(content=str(i), metadata={}, embedding=v, importance=i / 10, timestamp=now - i * 60))
+
+        query = vectors[2] / np.linalg.norm(vectors[2])
+        scores = buffer.scores(query, now, (0.5, 0.3, 0.2), half_life=120.0)
+        for i, v in enumerate(vectors):
+            expected = 0.5 * (v / np.linalg.norm(v)) @ query + 0.3 * 2 ** (-i * 60 / 120.0) + 0.2 * i / 10
+            assert scores[i] == pytest.approx(expected, abs=1e-5)
+
+        top = buffer.search(query, 2, now, (0.5, 0.3, 0.2), half_life=120.0)
+        assert top[0].content == "2" and top[0].score >= top[1].score
+
+class TestAgentMemory:
+    @pytest.fixture
+    def memory(self):
+        return AgentMemory(short_term_capacity=100, embedder=WordEmbedder())
+
+    def test_retrieve_uses_query_similarity(self, memory):
+        memory.add("customer asked about a refund for invoice 12", importance=0.2)
+        memory.add("weather in paris is sunny", importance=0.9)
+        memory.add("deploy the python service on friday", memory_type="episodic", importance=0.9)
+
+        results = memory.retrieve("refund status", n_results=2)
+        assert results[0].content.startswith("customer asked about a refund")
+        assert results[0].score > results[1].score
+
+    def test_importance_and_recency_without_embedder(self):
+        memory = AgentMemory(short_term_capacity=10)
+        memory.add("old but important", importance=0.9)
+        memory.add("new and trivial", importance=0.1)
+        assert memory.retrieve("anything", n_results=1)[0].content == "old but important"
+
+    def test_invalid_memory_type(self, memory):
+        with pytest.raises(ValueError):
+            memory.add("x", memory_type="archive")
+
+    def test_search_latency_with_thousands_of_items(self):
+        dim = 384
+        buffer = MemoryBuffer(capacity=5000)
+        rng = np.random.default_rng(1)
+        for v in rng.normal(size=(5000, dim)).astype(np.float32):
+            buffer.append(MemoryItem(content="m", metadata={}, embedding=v, timestamp=time.time()))
+        query = rng.normal(size=dim).astype(np.float32)
+        query /= np.linalg.norm(query)
+
+        buffer.search(query, 5, time.time())
+        start = time.perf_counter()
+        for _ in range(50):
+            buffer.search(query, 5, time.time())
+        per_query_ms = (time.perf_counter() - start) * 1000 / 50
+        assert per_query_ms < 5.0, f"Memory search took {per_query_ms:.2f}ms"
+
+class TestCompactRecords:
+    def test_roundtrip_through_arena(self):
+        buffer = MemoryBuffer(capacity=4)
+        for i in range(2000):
+            buffer.append(MemoryItem(content=f"turn {i} " + "é" * (i % 7), metadata={"role": "user", "turn": i}))
+
+        items = list(buffer)
+        assert [i.metadata["turn"] for i in items] == [1996, 1997, 1998, 1999]
+        assert items[-1].content == "turn 1999 " + "é" * 4
+        assert items[0].content == "turn 1996 " + "é" * 1
+        assert len(buffer._arena) < 8192, "Dead text should be compacted away"
+
+    def test_usage_is_tracked_per_tier(self):
+        memory = AgentMemory(short_term_capacity=1000, embedder=WordEmbedder())
+        for i in range(300):
+            memory.add(f"invoice {i} was paid", role="user")
+        before = memory.usage_breakdown()
+        # Columns have doubled to 512 slots by now, so these writes cost only their records
+        for i in range(300, 500):
+            memory.add(f"invoice {i} was paid", role="user")
+        after = memory.usage_breakdown()
+
+        per_item = (after["short_term"] - before["short_term"]) / 200
+        assert after["episodic"] == before["episodic"]
+        assert 0 < per_item < 200, f"Each record should cost well under 200 bytes, got {per_item:.0f}"
+        assert memory.estimate_usage() == pytest.approx(sum(after.values()) / 2**20)
+
+    def test_ring_buffer_usage_is_bounded(self):
+        memory = AgentMemory(short_term_capacity=100)
+        for i in range(200):
+            memory.add(f"message number {i}", source="chat")
+        filled = memory.estimate_usage()
+        for i in range(5000):
+            memory.add(f"message number {i}", source="chat")
+        assert memory.estimate_usage() <= filled * 1.5
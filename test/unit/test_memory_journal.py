@@ -0,0 +1,146 @@
+import time
+import threading
+import pytest
+import numpy as np
+from core.consolidation import MemoryConsolidator
+from core.memory import AgentMemory
+from core.memory_journal import MemoryJournal
+
+class HashEmbedder:
+    def embed_batch(self, texts):
+        return [np.random.default_rng(abs(hash(t)) % 2**32).normal(size=8) for t in texts]
+
+class RecordingRetriever:
+    def __init__(self, fail_times=0):
+        self.documents = []
+        self.fail_times = fail_times
+
+    def add_documents(self, documents, metadata=None):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("index unavailable")
+        self.documents.extend(documents)
+
+def contents(buffer):
+    return [item.content for item in buffer]
+
+class TestMemoryJournal:
+    def test_restart_replays_log(self, tmp_path):
+        memory = AgentMemory(short_term_capacity=5, embedder=HashEmbedder(), journal=MemoryJournal(str(tmp_path)))
+        for i in range(8):
+            memory.add(f"turn {i}", importance=i / 10, user="u1")
+        memory.add("summary so far", memory_type="episodic")
+        memory.close()
+
+        restored = AgentMemory(short_term_capacity=5, embedder=HashEmbedder(), journal=MemoryJournal(str(tmp_path)))
+        assert contents(restored.short_term) == [f"turn {i}" for i in range(3, 8)]
+        assert contents(restored.episodic) == ["summary so far"]
+        item = list(restored.short_term)[-1]
+        original = list(memory.short_term)[-1]
+        assert item.metadata == {"user": "u1"} and item.importance == pytest.approx(0.7)
+        np.testing.assert_allclose(item.embedding, original.embedding, rtol=1e-6)
+        assert restored.retrieve("turn 7", n_results=1)[0].content == "turn 7"
+
+    def test_snapshot_bounds_replay(self, tmp_path):
+        journal = MemoryJournal(str(tmp_path), snapshot_every=10)
+        memory = AgentMemory(short_term_capacity=4, journal=journal)
+        for i in range(25):
+            memory.add(f"turn {i}")
+            journal.wait()  # snapshots are written in the background; pace them deterministically
+        memory.close()
+
+        assert len(list(tmp_path.glob("journal-*.log"))) == 1, "Snapshots should drop superseded segments"
+        restored_journal = MemoryJournal(str(tmp_path), snapshot_every=10)
+        restored = AgentMemory(short_term_capacity=4, journal=restored_journal)
+        assert contents(restored.short_term) == ["turn 21", "turn 22", "turn 23", "turn 24"]
+        assert restored_journal.records_since_snapshot == 5, "Only the tail after the snapshot is replayed"
+
+    def test_torn_tail_is_discarded(self, tmp_path):
+        memory = AgentMemory(short_term_capacity=10, journal=MemoryJournal(str(tmp_path)))
+        memory.add("complete")
+        memory.add("torn")
+        memory.close()
+        [segment] = tmp_path.glob("journal-*.log")
+        segment.write_bytes(segment.read_bytes()[:-3])
+
+        restored = AgentMemory(short_term_capacity=10, journal=MemoryJournal(str(tmp_path)))
+        restored.add("after restart")
+        restored.close()
+        again = AgentMemory(short_term_capacity=10, journal=MemoryJournal(str(tmp_path)))
+        assert contents(again.short_term) == ["complete", "after restart"]
+
+    def test_recovery_time_independent_of_history(self, tmp_path):
+        memory = AgentMemory(short_term_capacity=200, journal=MemoryJournal(str(tmp_path), snapshot_every=500))
+        for i in range(20_000):
+            memory.add(f"turn {i}", timestamp_hint=i)
+        memory.close()
+
+        start = time.perf_counter()
+        restored = AgentMemory(short_term_capacity=200, journal=MemoryJournal(str(tmp_path), snapshot_every=500))
+        elapsed = time.perf_counter() - start
+        assert len(restored.short_term) == 200
+        assert elapsed < 0.5, f"Recovery took {elapsed:.2f}s"
+
+    def test_write_that_triggers_snapshot_survives(self, tmp_path):
+        memory = AgentMemory(short_term_capacity=10, journal=MemoryJournal(str(tmp_path), snapshot_every=3))
+        for i in range(3):
+            memory.add(f"t{i}")
+        memory.close()
+
+        restored = AgentMemory(short_term_capacity=10, journal=MemoryJournal(str(tmp_path), snapshot_every=3))
+        assert contents(restored.short_term) == ["t0", "t1", "t2"]
+
+    def test_snapshot_is_written_outside_the_lock(self, tmp_path):
+        release = threading.Event()
+
+        class SlowJournal(MemoryJournal):
+            def _write_tier(self, prefix, items):
+                release.wait(5)
+                super()._write_tier(prefix, items)
+
+        journal = SlowJournal(str(tmp_path), snapshot_every=3)
+        memory = AgentMemory(short_term_capacity=10, journal=journal)
+        for i in range(3):
+            memory.add(f"t{i}")
+        assert journal.snapshotting()
+        writer = threading.Thread(target=lambda: memory.add("while snapshotting"))
+        writer.start()
+        writer.join(2)
+        assert not writer.is_alive(), "Writes should not wait for the snapshot files"
+        release.set()
+        memory.close()
+
+        restored = AgentMemory(short_term_capacity=10, journal=MemoryJournal(str(tmp_path)))
+        assert contents(restored.short_term) == ["t0", "t1", "t2", "while snapshotting"]
+
+    def test_unserializable_metadata_leaves_tiers_unchanged(self, tmp_path):
+        memory = AgentMemory(short_term_capacity=10, journal=MemoryJournal(str(tmp_path)))
+        memory.add("ok")
+        with pytest.raises(TypeError):
+            memory.add("bad", handle=object())
+        assert contents(memory.short_term) == ["ok"]
+
+    def test_queued_long_term_writes_survive_a_crash(self, tmp_path):
+        down = RecordingRetriever(fail_times=10**9)
+        memory = AgentMemory(short_term_capacity=2, long_term_retriever=down,
+                             consolidator=MemoryConsolidator(down, flush_interval=60),
+                             journal=MemoryJournal(str(tmp_path), snapshot_every=4))
+        memory.add("explicit note", memory_type="long_term")
+        for i in range(5):
+            memory.add(f"turn {i}")
+        memory.journal.close()  # crash: the consolidator never committed anything
+
+        store = RecordingRetriever()
+        restored = AgentMemory(short_term_capacity=2, long_term_retriever=store,
+                               consolidator=MemoryConsolidator(store, flush_interval=60),
+                               journal=MemoryJournal(str(tmp_path), snapshot_every=4))
+        restored.consolidator.flush()
+        assert sorted(store.documents) == ["explicit note", "turn 0", "turn 1", "turn 2"]
+        restored.journal.close()
+
+        again_store = RecordingRetriever()
+        again = AgentMemory(short_term_capacity=2, long_term_retriever=again_store,
+                            consolidator=MemoryConsolidator(again_store, flush_interval=60),
+                            journal=MemoryJournal(str(tmp_path), snapshot_every=4))
+        again.close()
+        assert again_store.documents == [], "Committed writes should not be replayed"
@@ -0,0 +1,40 @@
+import pytest
+from datetime import date
+from core.metadata_index import MetadataIndex
+
+class TestMetadataIndex:
+    @pytest.fixture
+    def index(self):
+        index = MetadataIndex(range_fields=["filed"])
+        index.add_many(range(4), [
+            {"source": "sec.gov", "document_type": "10-K", "filed": "2022-03-01"},
+            {"source": "sec.gov", "document_type": "10-Q", "filed": "2023-05-10"},
+            {"source": "pubmed", "document_type": "guideline", "year": 2021},
+            {"source": "pubmed", "document_type": "drug_interactions", "tags": ["cyp3a4", "warfarin"]},
+        ])
+        return index
+
+    def test_no_filter_returns_none(self, index):
+        assert index.evaluate(None) is None, "Missing filters should not restrict the search"
+
+    def test_equality(self, index):
+        assert list(index.evaluate({"source": "sec.gov"})) == [0, 1]
+        assert list(index.evaluate({"tags": "warfarin"})) == [3], "List values index every element"
+
+    def test_boolean_expressions(self, index):
+        assert list(index.evaluate({"document_type": {"$in": ["guideline", "drug_interactions"]}})) == [2, 3]
+        assert list(index.evaluate({"$or": [{"document_type": "10-K"}, {"source": "pubmed"}]})) == [0, 2, 3]
+        assert list(index.evaluate({"$not": {"source": "sec.gov"}})) == [2, 3]
+        assert list(index.evaluate({"source": "sec.gov", "document_type": {"$ne": "10-K"}})) == [1]
+
+    def test_date_range(self, index):
+        assert list(index.evaluate({"filed": {"$gte": "2023-01-01"}})) == [1]
+        assert list(index.evaluate({"filed": {"$lt": date(2023, 1, 1)}})) == [0]
+        assert list(index.evaluate({"year": {"$gt": 2020, "$lte": 2021}})) == [2]
+
+    def test_unknown_value_is_empty(self, index):
+        assert len(index.evaluate({"source": "example.com"})) == 0
+
+    def test_unsupported_operator(self, index):
+        with pytest.raises(ValueError):
+            index.evaluate({"source": {"$regex": "sec.*"}})
@@ -0,0 +1,86 @@
+import json
+import numpy as np
+import pytest
+from core.plan_cache import PlanCache, extract_template
+from core.planner import Planner
+
+THESIS_PLAN = {
+    "fetch_AAPL": {"description": "Fetch AAPL 10-K filings", "dependencies": []},
+    "model": {"description": "Build a DCF for AAPL", "dependencies": ["fetch_AAPL"], "tool": "dcf"},
+    "write": {"description": "Write the AAPL investment thesis", "dependencies": ["model"]},
+}
+
+class ScriptedLLM:
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    def generate(self, prompt, **kwargs):
+        self.calls += 1
+        return self.response
+
+class KeywordEmbedder:
+    """Bag-of-words vectors over a fixed vocabulary"""
+    VOCAB = ["generate", "write", "investment", "thesis", "for", "review", "contract", "an", "{0}"]
+
+    def embed(self, text):
+        words = text.lower().split()
+        return np.array([words.count(w) for w in self.VOCAB], dtype=np.float32)
+
+class TestPlanCache:
+    def test_template_extraction(self):
+        assert extract_template("generate investment thesis for AAPL") == ("generate investment thesis for {0}", ["AAPL"])
+        assert extract_template("Review contract for Delaware by 2024-06-30") == (
+            "Review contract for {0} by {1}", ["Delaware", "2024-06-30"])
+
+    def test_repeated_goal_skips_llm(self):
+        llm = ScriptedLLM(json.dumps(THESIS_PLAN))
+        planner = Planner(llm, plan_cache=PlanCache())
+        planner.create_plan("generate investment thesis for AAPL")
+        plan = planner.create_plan("generate investment thesis for MSFT")
+
+        assert llm.calls == 1
+        assert plan["model"] == {"description": "Build a DCF for MSFT", "dependencies": ["fetch_MSFT"], "tool": "dcf"}
+        assert planner.get_next_tasks() == ["fetch_MSFT"]
+        assert planner.plan_cache.stats.hit_rate == 0.5
+
+    def test_semantic_match(self):
+        cache = PlanCache(embedder=KeywordEmbedder(), similarity_threshold=0.75)
+        cache.store("generate investment thesis for AAPL", THESIS_PLAN)
+        plan = cache.lookup("write investment thesis for NVDA")
+        assert plan is not None and "fetch_NVDA" in plan
+        assert cache.stats.semantic_hits == 1
+        assert cache.lookup("review contract for Delaware") is None
+
+    def test_lookup_embeds_outside_the_lock(self):
+        cache = PlanCache(embedder=KeywordEmbedder(), similarity_threshold=0.75)
+        cache.store("generate investment thesis for AAPL", THESIS_PLAN)
+        embed = cache.embedder.embed
+
+        def unlocked_embed(text):
+            assert cache._lock.acquire(blocking=False), "Embedding must not hold the cache lock"
+            cache._lock.release()
+            return embed(text)
+
+        cache.embedder.embed = unlocked_embed
+        assert cache.lookup("write investment thesis for NVDA") is not None
+
+    def test_staleness(self, monkeypatch):
+        cache = PlanCache(max_age=60)
+        cache.store("generate investment thesis for AAPL", THESIS_PLAN)
+        now = __import__("time").time()
+        monkeypatch.setattr("core.plan_cache.time.time", lambda: now + 120)
+        assert cache.lookup("generate investment thesis for IBM") is None
+        assert cache.stats.stale == 1 and len(cache) == 0
+
+        cache.store("generate investment thesis for AAPL", THESIS_PLAN)
+        cache.invalidate()
+        assert cache.lookup("generate investment thesis for AAPL") is None
+
+    def test_invalid_plans_are_not_cached(self):
+        cyclic = {"a": {"description": "a", "dependencies": ["b"]}, "b": {"description": "b", "dependencies": ["a"]}}
+        llm = ScriptedLLM(json.dumps(cyclic))
+        planner = Planner(llm, plan_cache=PlanCache())
+        plan = planner.create_plan("summarize TSLA")
+        assert list(plan) == ["goal"], "Falls back to a single-task plan"
+        assert len(planner.plan_cache) == 0
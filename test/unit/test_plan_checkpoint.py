@@ -0,0 +1,81 @@
+import json
+import pytest
+from core.plan_checkpoint import PlanCheckpointStore
+from core.plan_executor import PlanExecutor
+from core.planner import Planner, TaskStatus
+
+TASKS = {
+    "fetch": {"description": "fetch filings", "dependencies": []},
+    "model": {"description": "build model", "dependencies": ["fetch"]},
+    "report": {"description": "write report", "dependencies": ["model"]},
+}
+
+class ScriptedLLM:
+    def generate(self, prompt, **kwargs):
+        return json.dumps(TASKS)
+
+class CrashingRunner:
+    """Records calls and fails on the named task, standing in for a worker crash"""
+    def __init__(self, crash_on=None):
+        self.calls = []
+        self.crash_on = crash_on
+
+    def __call__(self, name, data, inputs):
+        self.calls.append(name)
+        if name == self.crash_on:
+            raise RuntimeError("worker died")
+        return {"task": name, "inputs": inputs}
+
+class TestPlanCheckpoint:
+    @pytest.fixture
+    def store(self, tmp_path):
+        store = PlanCheckpointStore(str(tmp_path / "plans.sqlite"), lease=0.0)
+        yield store
+        store.close()
+
+    def test_transitions_are_persisted(self, store):
+        planner = Planner(ScriptedLLM(), checkpoint=store)
+        planner.create_plan("analyze AAPL")
+        planner.update_task("fetch", TaskStatus.COMPLETED, output={"rows": 3}, started=1.0, finished=2.5)
+
+        goal, tasks, states = store.load(planner.plan_id)
+        assert goal == "analyze AAPL" and tasks == TASKS
+        assert states["fetch"] == {"status": TaskStatus.COMPLETED.value, "output": {"rows": 3}, "error": None,
+                                   "started": 1.0, "finished": 2.5}
+
+    def test_resume_skips_completed_tasks(self, store):
+        first = Planner(ScriptedLLM(), checkpoint=store, worker_id="w1")
+        first.create_plan("analyze AAPL")
+        # The worker dies while "model" is running
+        first.update_task("fetch", TaskStatus.COMPLETED, output={"task": "fetch", "inputs": {}})
+        first.update_task("model", TaskStatus.IN_PROGRESS)
+        assert store.incomplete_plans() == [first.plan_id]
+
+        second = Planner(llm=None, checkpoint=store, worker_id="w2")
+        second.resume(first.plan_id)
+        assert second.get_next_tasks() == ["model"]
+        runner = CrashingRunner()
+        results = PlanExecutor(second, runner).run()
+
+        assert runner.calls == ["model", "report"], "Completed tasks must not re-run"
+        assert results["model"].output["inputs"] == {"fetch": {"task": "fetch", "inputs": {}}}
+        assert store.incomplete_plans(claimable_only=False) == []
+
+    def test_failed_plan_is_terminal(self, store):
+        planner = Planner(ScriptedLLM(), checkpoint=store)
+        planner.create_plan("analyze AAPL")
+        results = PlanExecutor(planner, CrashingRunner(crash_on="model")).run()
+        assert results["report"].status == TaskStatus.SKIPPED
+        assert store.incomplete_plans(claimable_only=False) == [], "No task is left to run"
+
+    def test_live_lease_blocks_other_workers(self, tmp_path):
+        store = PlanCheckpointStore(str(tmp_path / "plans.sqlite"), lease=60.0)
+        owner = Planner(ScriptedLLM(), checkpoint=store, worker_id="w1")
+        owner.create_plan("analyze AAPL")
+        with pytest.raises(ValueError, match="another worker"):
+            Planner(llm=None, checkpoint=store, worker_id="w2").resume(owner.plan_id)
+        assert store.incomplete_plans() == []
+
+        store.release(owner.plan_id, "w1")
+        Planner(llm=None, checkpoint=store, worker_id="w2").resume(owner.plan_id)
+        store.close()
@@ -0,0 +1,81 @@
+import asyncio
+import time
+import pytest
+from core.planner import Planner, TaskStatus
+from core.plan_executor import DurationEstimator, PlanExecutor
+
+def make_planner(tasks):
+    planner = Planner(llm=None)
+    planner._build_graph(tasks)
+    return planner
+
+class SleepRunner:
+    """Sleeps for the task's `sleep` attribute and records concurrency"""
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.order = []
+
+    async def __call__(self, name, data, inputs):
+        self.order.append(name)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(data.get("sleep", 0.01))
+        self.active -= 1
+        if data.get("fail"):
+            raise RuntimeError("tool crashed")
+        return {"task": name, "inputs": sorted(inputs)}
+
+class TestPlanExecutor:
+    def test_runs_in_critical_path_time(self):
+        tasks = {"fetch": {"description": "fetch data", "sleep": 0.1}}
+        for i in range(6):
+            tasks[f"analyze{i}"] = {"description": f"analyze {i}", "dependencies": ["fetch"], "sleep": 0.1}
+        tasks["report"] = {"description": "write report", "dependencies": [f"analyze{i}" for i in range(6)], "sleep": 0.1}
+        planner = make_planner(tasks)
+        runner = SleepRunner()
+
+        start = time.perf_counter()
+        results = PlanExecutor(planner, runner, max_concurrent=8).run()
+        elapsed = time.perf_counter() - start
+
+        assert all(r.status == TaskStatus.COMPLETED for r in results.values())
+        assert elapsed < 0.5, f"Expected ~0.3s critical path, took {elapsed:.2f}s (serial is 0.8s)"
+        assert results["report"].output["inputs"] == [f"analyze{i}" for i in range(6)]
+        assert planner.task_graph.nodes["report"]["status"] == TaskStatus.COMPLETED
+
+    def test_concurrency_is_bounded(self):
+        tasks = {f"t{i}": {"description": f"task {i}", "sleep": 0.02} for i in range(10)}
+        runner = SleepRunner()
+        PlanExecutor(make_planner(tasks), runner, max_concurrent=3).run()
+        assert runner.peak == 3
+
+    def test_critical_path_goes_first(self):
+        tasks = {
+            "short": {"description": "short", "estimated_duration": 1.0},
+            "chain1": {"description": "chain 1", "estimated_duration": 1.0},
+            "chain2": {"description": "chain 2", "dependencies": ["chain1"], "estimated_duration": 5.0},
+        }
+        runner = SleepRunner()
+        executor = PlanExecutor(make_planner(tasks), runner, max_concurrent=1)
+        assert executor.critical_path_ranks()["chain1"] == 6.0
+        executor.run()
+        assert runner.order == ["chain1", "chain2", "short"]
+
+    def test_failure_skips_dependents_only(self):
+        tasks = {
+            "a": {"description": "a", "fail": True},
+            "b": {"description": "b", "dependencies": ["a"]},
+            "c": {"description": "c"},
+        }
+        results = PlanExecutor(make_planner(tasks), SleepRunner()).run()
+        assert results["a"].status == TaskStatus.FAILED and "tool crashed" in results["a"].error
+        assert results["b"].status == TaskStatus.SKIPPED
+        assert results["c"].status == TaskStatus.COMPLETED
+
+    def test_sync_runner_and_duration_learning(self):
+        estimator = DurationEstimator(default=1.0)
+        tasks = {"t": {"description": "Search Filings", "tool": "sec_search"}}
+        PlanExecutor(make_planner(tasks), lambda name, data, inputs: time.sleep(0.02) or "ok",
+                     estimator=estimator).run()
+        assert estimator.estimate({"tool": "sec_search"}) == pytest.approx(0.02, abs=0.02)
@@ -0,0 +1,57 @@
+import pytest
+from core.planner import ArrayTaskGraph, Planner, TaskStatus
+
+TASKS = {
+    "fetch": {"description": "fetch filings"},
+    "prices": {"description": "fetch prices"},
+    "analyze": {"description": "analyze", "dependencies": ["fetch", "prices"]},
+    "report": {"description": "write report", "dependencies": ["analyze"]},
+}
+
+@pytest.fixture(params=["networkx", "array"])
+def planner(request):
+    planner = Planner(llm=None, graph_backend=request.param)
+    planner._build_graph(TASKS)
+    return planner
+
+class TestPlanner:
+    def test_ready_set_follows_updates(self, planner):
+        assert planner.get_next_tasks() == ["fetch", "prices"]
+
+        planner.update_task("fetch", TaskStatus.IN_PROGRESS)
+        assert planner.get_next_tasks() == ["prices"], "Started tasks leave the ready set"
+        planner.update_task("fetch", TaskStatus.COMPLETED)
+        assert planner.get_next_tasks() == ["prices"]
+        planner.update_task("prices", TaskStatus.COMPLETED, output=42)
+        assert planner.get_next_tasks() == ["analyze"]
+        assert planner.task_graph.nodes["prices"]["output"] == 42
+
+    def test_reverting_completion_blocks_successors(self, planner):
+        planner.update_task("fetch", TaskStatus.COMPLETED)
+        planner.update_task("prices", TaskStatus.COMPLETED)
+        planner.update_task("fetch", TaskStatus.PENDING)
+        assert planner.get_next_tasks() == ["fetch"], "analyze lost a dependency and must wait again"
+
+    def test_topological_order(self, planner):
+        order = planner.topological_order()
+        assert order.index("analyze") > max(order.index("fetch"), order.index("prices"))
+        assert order[-1] == "report"
+        assert sorted(planner.task_graph.predecessors("analyze")) == ["fetch", "prices"]
+        assert planner.task_graph.in_degree("analyze") == 2
+
+    def test_cycle_is_rejected(self, planner):
+        tasks = {"a": {"description": "a", "dependencies": ["c"]},
+                 "b": {"description": "b", "dependencies": ["a"]},
+                 "c": {"description": "c", "dependencies": ["b"]},
+                 "d": {"description": "d"}}
+        with pytest.raises(ValueError, match="cycle") as err:
+            planner._build_graph(tasks)
+        assert "d" not in str(err.value).split(":")[-1]
+
+    def test_unknown_dependency_is_rejected(self, planner):
+        with pytest.raises(ValueError, match="unknown task"):
+            planner._build_graph({"a": {"description": "a", "dependencies": ["missing"]}})
+
+    def test_array_graph_has_no_networkx(self):
+        planner = Planner(llm=None, graph_backend="array")
+        assert isinstance(planner.task_graph, ArrayTaskGraph)
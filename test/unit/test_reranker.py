@@ -0,0 +1,66 @@
+import time
+import pytest
+import numpy as np
+from core.reranker import CascadeReranker, SearchReport
+
+class LengthScorer:
+    """Scores longer texts higher; optionally sleeps per document"""
+    def __init__(self, delay_s: float = 0.0):
+        self.delay_s = delay_s
+        self.scored = 0
+
+    def score(self, query, texts, batch_size):
+        time.sleep(self.delay_s * len(texts))
+        self.scored += len(texts)
+        return np.array([len(t) for t in texts], dtype=np.float32)
+
+class TestCascadeReranker:
+    @pytest.fixture
+    def results(self):
+        return [{"text": "x" * (i + 1), "score": 1.0 - i * 0.01, "components": {}} for i in range(40)]
+
+    def test_reorders_by_rerank_score(self, results):
+        reranker = CascadeReranker(LengthScorer(), max_candidates=10, budget_ms=1000)
+        report = SearchReport()
+        reranked = reranker.rerank("q", results, k=5, report=report)
+
+        assert [r["text"] for r in reranked] == ["x" * n for n in (10, 9, 8, 7, 6)]
+        assert reranked[0]["components"]["first_stage"] == pytest.approx(0.91)
+        assert report.reranked == 10 and "rerank" in report.timings_ms
+
+    def test_depth_shrinks_to_budget(self, results):
+        scorer = LengthScorer(delay_s=0.002)
+        reranker = CascadeReranker(scorer, max_candidates=40, budget_ms=30, batch_size=4)
+        reranker.rerank("q", results, k=5)  # calibrates the per-document cost
+        scorer.scored = 0
+
+        report = SearchReport()
+        reranked = reranker.rerank("q", results, k=5, report=report)
+        assert scorer.scored < 40, "Rerank depth should shrink to fit the budget"
+        assert report.truncated
+        assert len(reranked) == 5
+
+    def test_exhausted_budget_keeps_first_stage_order(self, results):
+        scorer = LengthScorer(delay_s=0.001)
+        reranker = CascadeReranker(scorer, budget_ms=10)
+        reranker.rerank("q", results[:4])
+        reranked = reranker.rerank("q", results, k=3, elapsed_ms=50)
+        assert [r["text"] for r in reranked] == ["x", "xx", "xxx"], "No budget left means no reranking"
+
+    def test_estimate_recovers_after_slow_spell(self, results):
+        scorer = LengthScorer(delay_s=0.02)
+        reranker = CascadeReranker(scorer, max_candidates=10, budget_ms=20, batch_size=4)
+        reranker.rerank("q", results)
+        assert reranker.plan_depth(len(results), 20) == reranker.probe_size
+
+        scorer.delay_s = 0.0
+        for _ in range(30):
+            reranker.rerank("q", results)
+        report = SearchReport()
+        reranker.rerank("q", results, report=report)
+        assert report.reranked == 10, "Probes should pull the cost estimate back down"
+
+    def test_from_config(self):
+        config = {"retriever": {"rerank_candidates": 20, "rerank_budget_ms": 15.0, "rerank_batch_size": 4}}
+        reranker = CascadeReranker.from_config(LengthScorer(), config)
+        assert (reranker.max_candidates, reranker.budget_ms, reranker.batch_size) == (20, 15.0, 4)
@@ -0,0 +1,53 @@
+import threading
+import time
+import pytest
+from core.optimization.result_cache import ResultCache, normalize_query, canonical_filters
+
+class TestResultCache:
+    @pytest.fixture
+    def cache(self):
+        return ResultCache(max_entries=2)
+
+    def test_hit_after_miss(self, cache):
+        calls = []
+        compute = lambda: calls.append(1) or ["doc1"]
+
+        assert cache.get_or_compute("q", 0, compute) == ["doc1"]
+        assert cache.get_or_compute("q", 0, compute) == ["doc1"]
+        assert len(calls) == 1, "Second lookup should be served from cache"
+        assert cache.stats.hits == 1 and cache.stats.misses == 1
+
+    def test_generation_bump_invalidates(self, cache):
+        cache.get_or_compute("q", 0, lambda: ["old"])
+        result = cache.get_or_compute("q", 1, lambda: ["new"])
+        assert result == ["new"], "Entries from older generations must not be served"
+        assert cache.stats.stale == 1
+
+    def test_lru_eviction(self, cache):
+        for key in ("a", "b", "c"):
+            cache.get_or_compute(key, 0, lambda: key)
+        assert len(cache) == 2
+        assert cache.stats.evictions == 1
+        assert cache.get("a", 0) == (False, None), "Least recently used entry should be evicted"
+
+    def test_concurrent_misses_single_backend_call(self, cache):
+        calls = []
+
+        def slow_backend():
+            calls.append(1)
+            time.sleep(0.05)
+            return ["doc"]
+
+        threads = [threading.Thread(target=cache.get_or_compute, args=("q", 0, slow_backend))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1, "Concurrent identical misses should query the backend once"
+        assert cache.stats.misses + cache.stats.coalesced + cache.stats.hits == 8
+
+    def test_key_normalization(self):
+        assert normalize_query("  Apple   10-K ") == normalize_query("apple 10-k")
+        assert canonical_filters({"a": 1, "b": 2}) == canonical_filters({"b": 2, "a": 1})
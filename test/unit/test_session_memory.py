@@ -0,0 +1,99 @@
+import time
+import threading
+import numpy as np
+from core.memory import AgentMemory
+from core.session_memory import SessionMemoryManager
+
+class TestSessionMemoryManager:
+    def test_sessions_are_isolated(self, tmp_path):
+        sessions = SessionMemoryManager(str(tmp_path))
+        sessions.get("alice").add("alice likes tea")
+        sessions.get("bob").add("bob likes coffee")
+
+        assert [i.content for i in sessions.get("alice").short_term] == ["alice likes tea"]
+        assert [i.content for i in sessions.get("bob").short_term] == ["bob likes coffee"]
+        assert set(sessions.footprint()["sessions"]) == {"alice", "bob"}
+
+    def test_budget_spills_lru_and_pages_back(self, tmp_path):
+        embedder = type("E", (), {"embed_batch": lambda self, texts: np.ones((len(texts), 256))})()
+        sessions = SessionMemoryManager(
+            str(tmp_path),
+            memory_factory=lambda journal: AgentMemory(short_term_capacity=50, embedder=embedder, journal=journal),
+            memory_budget_mb=0.2
+        )
+        for s in range(20):
+            memory = sessions.get(f"session-{s}")
+            for turn in range(20):
+                memory.add(f"session {s} turn {turn}")
+        sessions.get("session-19")  # refresh the last writer's footprint
+
+        footprint = sessions.footprint()
+        assert footprint["resident_bytes"] <= footprint["budget_bytes"]
+        assert footprint["resident_sessions"] < 20
+        assert sessions.stats.budget_evictions > 0
+
+        restored = sessions.get("session-0")
+        assert [i.content for i in restored.short_term][-1] == "session 0 turn 19"
+        assert len(restored.short_term) == 20
+        assert sessions.stats.page_ins >= 1
+
+    def test_idle_sessions_are_evicted(self, tmp_path):
+        sessions = SessionMemoryManager(str(tmp_path), idle_timeout=0.05)
+        sessions.get("idle").add("remember me")
+        time.sleep(0.1)
+        sessions.get("active")
+
+        assert "idle" not in sessions.footprint()["sessions"]
+        assert sessions.stats.idle_evictions == 1
+        assert [i.content for i in sessions.get("idle").short_term] == ["remember me"]
+
+    def test_spill_without_writes_keeps_snapshot(self, tmp_path):
+        sessions = SessionMemoryManager(str(tmp_path))
+        sessions.get("s").add("first")
+        sessions.spill("s")
+        sessions.get("s")  # read-only page-in
+        sessions.close()
+        assert [i.content for i in sessions.get("s").short_term] == ["first"]
+
+    def test_pinned_sessions_are_not_spilled(self, tmp_path):
+        sessions = SessionMemoryManager(str(tmp_path), idle_timeout=0.05)
+        with sessions.session("busy") as memory:
+            memory.add("mid-turn")
+            time.sleep(0.1)
+            sessions.get("other")
+            sessions.spill("busy")
+            assert "busy" in sessions.footprint()["sessions"]
+            assert sessions.get("busy") is memory
+        sessions.spill("busy")
+        assert "busy" not in sessions.footprint()["sessions"]
+        assert [i.content for i in sessions.get("busy").short_term] == ["mid-turn"]
+
+    def test_spill_writes_outside_the_manager_lock(self, tmp_path):
+        release = threading.Event()
+
+        class SlowMemory(AgentMemory):
+            def close_journal(self):
+                release.wait(5)
+                super().close_journal()
+
+        sessions = SessionMemoryManager(str(tmp_path), memory_factory=lambda journal: SlowMemory(journal=journal))
+        sessions.get("slow").add("paged out")
+        spiller = threading.Thread(target=sessions.spill, args=("slow",))
+        spiller.start()
+        while "slow" not in sessions._spilling:
+            time.sleep(0.01)
+
+        other = threading.Thread(target=lambda: sessions.get("other").add("meanwhile"))
+        other.start()
+        other.join(2)
+        assert not other.is_alive(), "Other sessions should not wait for the snapshot write"
+
+        paged_in = []
+        reader = threading.Thread(target=lambda: paged_in.append(sessions.get("slow")))
+        reader.start()
+        reader.join(0.2)
+        assert reader.is_alive(), "The spilled session is paged in only after its write"
+        release.set()
+        spiller.join()
+        reader.join()
+        assert [i.content for i in paged_in[0].short_term] == ["paged out"]
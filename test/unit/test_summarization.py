@@ -0,0 +1,116 @@
+import threading
+import pytest
+from core.memory import AgentMemory
+from core.memory_journal import MemoryJournal
+from core.summarization import EpisodicCompactor, LLMSummarizer
+
+class RecordingSummarizer:
+    """Appends folded turns to the summary, recording what each call saw"""
+    def __init__(self, gate: threading.Event = None):
+        self.calls = []
+        self.gate = gate
+
+    def __call__(self, summary, turns):
+        if self.gate:
+            self.gate.wait()
+        self.calls.append((summary, list(turns)))
+        return (summary + " | " if summary else "") + ",".join(t.split(": ")[-1] for t in turns)
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt, max_tokens=512, temperature=0.7):
+        self.prompts.append((prompt, max_tokens))
+        return " summary "
+
+class TestEpisodicCompaction:
+    def test_only_new_turns_are_folded(self):
+        summarizer = RecordingSummarizer()
+        memory = AgentMemory(compactor=EpisodicCompactor(summarizer, buffer_size=3, fold_batch=2, background=False))
+        for i in range(9):
+            memory.add(f"t{i}", memory_type="episodic", role="user")
+
+        assert [turns for _, turns in summarizer.calls] == [["user: t0", "user: t1"], ["user: t2", "user: t3"],
+                                                             ["user: t4", "user: t5"]]
+        assert summarizer.calls[-1][0] == "t0,t1 | t2,t3", "Each call should see the previous summary, not history"
+        context = memory.episodic_context()
+        assert [m.content for m in context] == ["t0,t1 | t2,t3 | t4,t5", "t6", "t7", "t8"]
+        assert context[0].metadata["role"] == "summary"
+
+    def test_context_size_is_constant(self):
+        memory = AgentMemory(compactor=EpisodicCompactor(RecordingSummarizer(), buffer_size=5, fold_batch=1,
+                                                         background=False))
+        sizes = []
+        for i in range(50):
+            memory.add(f"turn {i}", memory_type="episodic")
+            sizes.append(len(memory.episodic_context()))
+        assert max(sizes[10:]) == 6, "Summary plus buffer_size recent turns"
+
+    def test_background_fold_does_not_block_writes(self):
+        gate = threading.Event()
+        summarizer = RecordingSummarizer(gate)
+        compactor = EpisodicCompactor(summarizer, buffer_size=2, fold_batch=1)
+        memory = AgentMemory(compactor=compactor)
+        for i in range(6):
+            memory.add(f"t{i}", memory_type="episodic")
+        assert len(memory.episodic) == 6, "Writes should not wait on the summarizer"
+
+        gate.set()
+        compactor.flush()
+        memory.add("t6", memory_type="episodic")
+        compactor.flush()
+        assert [m.content for m in memory.episodic_context()][-2:] == ["t5", "t6"]
+        assert len(memory.episodic) == 2
+        memory.close()
+
+    def test_summary_survives_restart(self, tmp_path):
+        compactor = EpisodicCompactor(RecordingSummarizer(), buffer_size=2, fold_batch=1, background=False)
+        memory = AgentMemory(journal=MemoryJournal(str(tmp_path)), compactor=compactor)
+        for i in range(5):
+            memory.add(f"t{i}", memory_type="episodic")
+        memory.close()
+
+        restored = AgentMemory(journal=MemoryJournal(str(tmp_path)))
+        assert [m.content for m in restored.episodic_context()] == ["t0 | t1 | t2", "t3", "t4"]
+
+    def test_llm_summarizer_prompt(self):
+        llm = FakeLLM()
+        summary = LLMSummarizer(llm, max_tokens=64)("user wants a refund", ["user: order 12 arrived broken"])
+        prompt, max_tokens = llm.prompts[0]
+        assert summary == "summary" and max_tokens == 64
+        assert "user wants a refund" in prompt and "order 12 arrived broken" in prompt
+
+    def test_session_memories_compact_episodic_turns(self, tmp_path):
+        from core.session_memory import SessionMemoryManager
+        config = {"memory": {"episodic_buffer_size": 2, "episodic_fold_batch": 1,
+                             "sessions": {"spill_path": str(tmp_path)}}}
+        sessions = SessionMemoryManager.from_config(config, summarizer=RecordingSummarizer())
+        memory = sessions.get("s")
+        for i in range(4):
+            memory.add(f"t{i}", memory_type="episodic")
+        memory.compactor.flush()
+        assert memory.episodic_summary is not None and len(memory.episodic) <= 3
+        sessions.close()
+
+    def test_search_while_compacting(self):
+        memory = AgentMemory(compactor=EpisodicCompactor(RecordingSummarizer(), buffer_size=4, fold_batch=1))
+        stop = threading.Event()
+        errors = []
+
+        def search():
+            while not stop.is_set():
+                try:
+                    memory.retrieve("t", n_results=3)
+                except Exception as e:
+                    errors.append(e)
+
+        reader = threading.Thread(target=search)
+        reader.start()
+        for i in range(300):
+            memory.add(f"t{i}", memory_type="episodic")
+        memory.compactor.flush()
+        stop.set()
+        reader.join()
+        memory.close()
+        assert not errors
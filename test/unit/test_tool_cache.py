@@ -0,0 +1,119 @@
+import asyncio
+import pytest
+from core.tool_cache import ToolResultCache
+from core.tool_executor import ToolExecutor
+
+FRESHNESS_TTL = {"day": 0.05, "year": 60.0}
+
+class CountingSearch:
+    """Async search tool with a freshness-based cache policy, counting upstream calls"""
+    def __init__(self, delay=0.05):
+        self.calls = 0
+        self.delay = delay
+
+    async def function(self, query, freshness=None):
+        self.calls += 1
+        n = self.calls
+        await asyncio.sleep(self.delay)
+        return f"{query}#{n}"
+
+    def cache_policy(self, arguments):
+        return FRESHNESS_TTL.get(arguments.get("freshness"), 60.0)
+
+class Schema:
+    def __init__(self, cache_ttl):
+        self.cache_ttl = cache_ttl
+
+class LiveQuote:
+    """Opts out of caching through its schema"""
+    schema = Schema(cache_ttl=0)
+
+    def __init__(self):
+        self.calls = 0
+
+    def function(self, ticker):
+        self.calls += 1
+        return self.calls
+
+class TestToolResultCache:
+    @pytest.fixture
+    def search(self):
+        return CountingSearch()
+
+    @pytest.fixture
+    def executor(self, search):
+        executor = ToolExecutor({"search": search, "quote": LiveQuote()}, timeout=1.0, cache=ToolResultCache())
+        yield executor
+        executor.close()
+
+    def test_argument_order_does_not_matter(self, executor, search):
+        executor.run([{"name": "search", "arguments": {"query": "AAPL", "freshness": "year"}}])
+        result = executor.run([{"name": "search", "arguments": '{"freshness": "year", "query": "AAPL"}'}])[0]
+        assert result.output == "AAPL#1" and search.calls == 1
+        assert executor.cache.stats.hits == 1
+
+    def test_concurrent_identical_calls_share_one_execution(self, executor, search):
+        call = {"name": "search", "arguments": {"query": "rates"}}
+        results = executor.run([call] * 5 + [{"name": "search", "arguments": {"query": "oil"}}])
+        assert [r.output for r in results[:5]] == ["rates#1"] * 5
+        assert search.calls == 2
+        assert executor.cache.stats.coalesced == 4
+
+    def test_freshness_controls_ttl(self, executor, search):
+        day = {"name": "search", "arguments": {"query": "news", "freshness": "day"}}
+        executor.run([day])
+        asyncio.run(asyncio.sleep(0.06))
+        assert executor.run([day])[0].output == "news#2", "Day-fresh results expire quickly"
+        assert executor.cache.stats.stale == 1
+
+    def test_opt_out(self, executor):
+        outputs = [executor.run([{"name": "quote", "arguments": {"ticker": "AAPL"}}])[0].output for _ in range(2)]
+        assert outputs == [1, 2]
+        assert len(executor.cache) == 0
+
+    def test_failures_are_not_cached(self):
+        attempts = []
+
+        def flaky(x):
+            attempts.append(x)
+            if len(attempts) == 1:
+                raise RuntimeError("rate limited")
+            return x * 2
+
+        executor = ToolExecutor({"flaky": flaky}, cache=ToolResultCache(default_ttl=60.0))
+        assert not executor.run([{"name": "flaky", "arguments": {"x": 2}}])[0].ok
+        assert executor.run([{"name": "flaky", "arguments": {"x": 2}}])[0].output == 4
+        executor.close()
+
+    def test_caching_is_opt_in(self):
+        calls = []
+
+        def lookup(x):
+            calls.append(x)
+            return x
+
+        executor = ToolExecutor({"lookup": lookup}, cache=ToolResultCache())
+        executor.run([{"name": "lookup", "arguments": {"x": 1}}] * 2)
+        assert len(calls) == 2, "Tools without a TTL are not cached by default"
+        executor.close()
+
+    def test_key_uses_prepared_arguments(self, executor, search):
+        search.prepare_arguments = lambda args: {"freshness": "year", **args}
+        executor.run([{"name": "search", "arguments": {"query": "AAPL"}}])
+        executor.run([{"name": "search", "arguments": {"query": "AAPL", "freshness": "year"}}])
+        assert search.calls == 1, "Filling in a default should not change the cache key"
+
+    def test_hits_return_copies(self):
+        def listing():
+            return {"items": [1, 2]}
+
+        executor = ToolExecutor({"listing": listing}, cache=ToolResultCache(default_ttl=60.0))
+        executor.run([{"name": "listing", "arguments": {}}])[0].output["items"].append(3)
+        assert executor.run([{"name": "listing", "arguments": {}}])[0].output == {"items": [1, 2]}
+        executor.close()
+
+    def test_leader_timeout_reaches_followers(self):
+        executor = ToolExecutor({"search": CountingSearch(delay=1.0)}, timeout=0.1, cache=ToolResultCache())
+        results = executor.run([{"name": "search", "arguments": {"query": "slow"}}] * 3)
+        assert all(r.error and r.error.startswith("TimeoutError") for r in results)
+        executor.close()
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import time
+import pytest
+from core.tool_executor import ToolExecutor, parse_call
+
+async def slow_search(query: str, delay: float = 0.2):
+    await asyncio.sleep(delay)
+    return f"results for {query}"
+
+def blocking_lookup(ticker: str):
+    time.sleep(0.2)
+    return {"ticker": ticker, "thread": threading.current_thread().name}
+
+def broken():
+    raise RuntimeError("upstream 500")
+
+class TestToolExecutor:
+    @pytest.fixture
+    def executor(self):
+        executor = ToolExecutor({"search": slow_search, "lookup": blocking_lookup, "broken": broken}, timeout=1.0)
+        yield executor
+        executor.close()
+
+    def test_turn_takes_slowest_tool_time(self, executor):
+        calls = [{"name": "search", "arguments": '{"query": "AAPL news"}'},
+                 {"name": "lookup", "arguments": {"ticker": "AAPL"}},
+                 {"name": "lookup", "arguments": {"ticker": "MSFT"}}]
+        start = time.perf_counter()
+        results = executor.run(calls)
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.4, f"Expected ~0.2s for concurrent calls, took {elapsed:.2f}s (serial is 0.6s)"
+        assert results[0].output == "results for AAPL news"
+        assert [r.output["ticker"] for r in results[1:]] == ["AAPL", "MSFT"]
+        assert results[1].output["thread"].startswith("tool"), "Sync tools run on the bounded pool"
+
+    def test_timeout_cancels_call(self):
+        cancelled = []
+
+        async def hang():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        executor = ToolExecutor({"hang": hang, "search": slow_search}, timeout=0.1)
+        results = executor.run([{"name": "hang"}, {"name": "search", "arguments": {"query": "q", "delay": 0.01}}])
+        assert results[0].error.startswith("TimeoutError") and cancelled == [True]
+        assert results[1].ok, "Other calls in the turn are unaffected"
+        executor.close()
+
+    def test_errors_are_reported_per_call(self, executor):
+        results = executor.run([{"name": "broken"}, {"name": "missing"}, {"name": "search", "arguments": "{bad"}])
+        assert results[0].error == "RuntimeError: upstream 500"
+        assert "not found" in results[1].error
+        assert results[2].error.startswith("JSONDecodeError")
+
+    def test_parse_call(self):
+        assert parse_call({"name": "calc", "arguments": ""}) == ("calc", {})
+        with pytest.raises(ValueError):
+            parse_call({"name": "calc", "arguments": "[1, 2]"})
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from core.agent import BaseAgent, Tool
+from core.tool_selection import ToolSelector
+
+TOPICS = ["stock", "weather", "contract", "deploy", "invoice", "patient", "tweet", "search"]
+
+class TopicEmbedder:
+    """One dimension per topic word, so similarity follows shared topics"""
+    def __init__(self):
+        self.texts = []
+
+    def embed_batch(self, texts):
+        self.texts.extend(texts)
+        return np.array([[t.lower().count(w) for w in TOPICS] + [0.1] for t in texts], dtype=np.float32)
+
+def catalog(n):
+    return [Tool(name=f"{TOPICS[i % len(TOPICS)]}_{i}", description=f"{TOPICS[i % len(TOPICS)]} helper {i}",
+                 parameters={}) for i in range(n)]
+
+class RecordingLLM:
+    def __init__(self):
+        self.bound = []
+
+    def bind_tools(self, tools, preamble=None):
+        self.bound.append(([t.name for t in tools], preamble))
+
+class EchoAgent(BaseAgent):
+    def generate(self, prompt, **kwargs):
+        return prompt
+
+    def _should_use_tool(self, text):
+        return False
+
+class TestToolSelector:
+    def test_selects_relevant_tools(self):
+        selector = ToolSelector(TopicEmbedder(), top_k=3, always_include=["search_7"])
+        selector.add(catalog(40))
+        names = [t.name for t in selector.select("what is the weather tomorrow")]
+        assert names[0] == "search_7", "Pinned tools always come first"
+        assert len(names) == 4 and all(n.startswith("weather_") for n in names[1:])
+
+    def test_descriptions_are_embedded_once(self):
+        embedder = TopicEmbedder()
+        selector = ToolSelector(embedder, top_k=2)
+        selector.add(catalog(10))
+        selector.add(catalog(12))
+        for _ in range(3):
+            selector.select("stock price")
+        assert len(embedder.texts) == 12 + 3, "Each description once, then one embedding per query"
+
+    def test_preamble_size_is_constant_as_catalog_grows(self):
+        sizes = []
+        for n in (20, 2000):
+            selector = ToolSelector(TopicEmbedder(), top_k=4)
+            selector.add(catalog(n))
+            sizes.append(len(selector.preamble(selector.select("invoice overdue")).split("\n")))
+        assert sizes == [5, 5]
+
+    def test_agent_binds_selected_subset(self):
+        llm = RecordingLLM()
+        agent = EchoAgent(llm, memory=None, tools=catalog(30), tool_selector=ToolSelector(TopicEmbedder(), top_k=2))
+        assert llm.bound == [], "Nothing is bound up front"
+
+        agent("deploy the service")
+        agent("deploy again")
+        names, preamble = llm.bound[-1]
+        assert len(llm.bound) == 1, "Same subset should not be re-bound"
+        assert all(n.startswith("deploy_") for n in names) and "deploy helper" in preamble
+
+        agent.add_tool(Tool(name="tweet_thread", description="tweet thread writer", parameters={}))
+        assert len(llm.bound) == 1, "Adding a tool should not re-bind the whole catalog"
+        agent("tweet about the launch")
+        assert len(llm.bound) == 2 and llm.bound[-1][0][0].startswith("tweet_")
+        assert len(agent.tool_selector) == 31
+
+    def test_incremental_adds_and_empty_selection(self):
+        selector = ToolSelector(TopicEmbedder(), top_k=3, always_include=["search_7"])
+        for tool in catalog(100):
+            selector.add([tool])
+        assert len(selector) == 100 and selector._matrix.shape[0] < 256, "The matrix should grow geometrically"
+        names = [t.name for t in selector.select("weather report")]
+        assert len(names) == 4 and all(n.startswith("weather_") for n in names[1:])
+        assert [t.name for t in selector.select("weather report", k=0)] == ["search_7"]
+        assert ToolSelector(TopicEmbedder()).select("anything", k=0) == []
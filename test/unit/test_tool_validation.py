@@ -0,0 +1,47 @@
+import pytest
+from dataclasses import dataclass
+from typing import Any, List, Optional
+from core.tool_validation import ArgumentValidator
+
+@dataclass
+class Param:
+    name: str
+    type: str
+    required: bool = False
+    default: Any = None
+    enum: Optional[List[str]] = None
+
+SEARCH_PARAMS = [
+    Param("query", "string", required=True),
+    Param("num_results", "integer", default=5, enum=[str(i) for i in range(1, 11)]),
+    Param("freshness", "string", enum=["day", "week", "month", "year"]),
+    Param("safe", "boolean", default=True),
+]
+
+class TestArgumentValidator:
+    @pytest.fixture
+    def validate(self):
+        return ArgumentValidator(SEARCH_PARAMS)
+
+    def test_defaults_and_coercion(self, validate):
+        assert validate({"query": "AAPL"}) == {"query": "AAPL", "num_results": 5, "safe": True}
+        assert validate({"query": "AAPL", "num_results": "3", "safe": "false"})["num_results"] == 3
+        assert validate({"query": "AAPL", "safe": "false"})["safe"] is False
+
+    def test_enum_checked_after_coercion(self, validate):
+        assert validate({"query": "q", "num_results": 10.0})["num_results"] == 10
+        with pytest.raises(ValueError, match="Must be one of"):
+            validate({"query": "q", "num_results": 11})
+        with pytest.raises(ValueError, match="freshness"):
+            validate({"query": "q", "freshness": "hour"})
+
+    def test_errors(self, validate):
+        with pytest.raises(ValueError, match="Missing required parameter: query"):
+            validate({})
+        with pytest.raises(ValueError, match="num_results"):
+            validate({"query": "q", "num_results": "many"})
+
+    def test_caller_arguments_are_not_mutated(self, validate):
+        arguments = {"query": "q", "num_results": "2", "extra": 1}
+        assert validate(arguments) == {"query": "q", "num_results": 2, "safe": True, "extra": 1}
+        assert arguments == {"query": "q", "num_results": "2", "extra": 1}
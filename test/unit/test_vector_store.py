@@ -0,0 +1,49 @@
+import pytest
+import numpy as np
+from core.vector_store import CompressedVectorStore, DenseVectorRetriever
+
+class TestCompressedVectorStore:
+    @pytest.fixture
+    def vectors(self):
+        return np.random.default_rng(0).normal(size=(2000, 32)).astype(np.float32)
+
+    @pytest.mark.parametrize("encoding,kwargs", [("fp16", {}), ("int8", {}), ("pq", {"m": 8})])
+    def test_self_query_finds_itself(self, vectors, encoding, kwargs, tmp_path):
+        store = CompressedVectorStore(32, encoding=encoding, raw_path=str(tmp_path / "raw.f32"), **kwargs)
+        store.add(vectors)
+        ids, scores = store.search(vectors[42], k=5)
+        assert ids[0] == 42, "Exact re-scoring should rank the query vector first"
+        assert scores[0] == pytest.approx(1.0, abs=1e-5)
+
+    def test_reused_raw_path_starts_empty(self, vectors, tmp_path):
+        raw = str(tmp_path / "raw.f32")
+        CompressedVectorStore(32, encoding="int8", raw_path=raw).add(vectors[1000:])
+        store = CompressedVectorStore(32, encoding="int8", raw_path=raw)
+        store.add(vectors[:1000])
+        ids, scores = store.search(vectors[42], k=1)
+        assert ids[0] == 42 and scores[0] == pytest.approx(1.0, abs=1e-5), "Stale rows must not shift rescoring"
+
+    def test_compression_ratio(self, vectors):
+        for encoding, kwargs, ratio in [("fp16", {}, 2), ("int8", {}, 4), ("pq", {"m": 8}, 16)]:
+            store = CompressedVectorStore(32, encoding=encoding, **kwargs)
+            store.add(vectors)
+            assert store.codec.bytes_per_vector * ratio == 32 * 4
+
+    def test_allowed_ids_restrict_scan(self, vectors):
+        store = CompressedVectorStore(32, encoding="int8")
+        store.add(vectors, ids=range(1000, 3000))
+        ids, _ = store.search(vectors[0], k=3, allowed_ids=[1005, 1500, 2999, 99999])
+        assert set(ids) == {1005, 1500, 2999}, "Only allowed ids should be returned"
+
+    def test_untrained_store_is_searchable(self, vectors):
+        store = CompressedVectorStore(32, encoding="int8", train_size=10_000)
+        store.add(vectors[:50])
+        ids, _ = store.search(vectors[7], k=1)
+        assert ids[0] == 7
+
+    def test_dense_retriever_backend(self, vectors):
+        embedder = type("E", (), {"embed_batch": lambda self, texts: vectors[[int(t) for t in texts]]})()
+        retriever = DenseVectorRetriever(embedder, CompressedVectorStore(32, encoding="fp16"))
+        retriever.add_documents([str(i) for i in range(10)], [{"doc_id": i} for i in range(10)])
+        text, meta = retriever.search("3", k=1)[0]
+        assert text == "3" and meta["doc_id"] == 3 and "score" in meta